@@ -1,41 +1,24 @@
 from owlready2 import *
 import json
+import os
+from ontology_cache import LazyOntologies
+from reasoning_delta import ReasoningSnapshot
+from ngsi_export import NgsiLdExporter
+from parallel_export import parallel_export, write_ngsi_ld_document
+from export_writer import NdjsonWriter, ChunkedWriter, stream_export
+from export_diff import incremental_export
+from pipeline_trace import stage, sync_reasoner
 
 def load_all_dependencies():
-    deps = [
-        
-        "onto/ssn.rdf",
-        "onto/sosa.rdf",
-        "onto/SysAgent.owl",
-        "onto/CognitionOnto.owl",
-        "onto/SOMA.owl",
-        "onto/DUL.owl",
-        "onto/AI4C2PS-core.owl"
-    ]
-    return [get_ontology(f"file://{path}").load() for path in deps]
+    # Ontologies de base ouvertes depuis le cache SQLite, sans re-parser le RDF/XML ; chacune n'est
+    # chargée qu'au premier accès (ou quand l'ontologie exportée l'importe)
+    ontologies = LazyOntologies()
+    return ontologies.world, ontologies
 
 # Enregistre l'état pré-raisonnement des individus
 def record_pre_reasoning_state(onto):
-    state = {}
-    for inst in onto.individuals():
-        # Capture les classes directes (hors restrictions)
-        classes = {cls for cls in inst.is_a if isinstance(cls, ThingClass)}
-        
-        # Capture les propriétés
-        obj_props = {}
-        for prop in onto.object_properties():
-            obj_props[prop] = set(prop[inst])
-        
-        data_props = {}
-        for prop in onto.data_properties():
-            data_props[prop] = set(prop[inst])
-        
-        state[inst] = {
-            "classes": classes,
-            "object_properties": obj_props,
-            "data_properties": data_props
-        }
-    return state
+    # Instantané du quadstore (journal des modifications) : le delta se calcule sur les triplets ajoutés
+    return ReasoningSnapshot(onto.world)
 def iri_to_ngsi_ld(inst):
     """Génère un IRI NGSI-LD avec le premier type déclaré"""
     class_name = get_first_declared_class(inst)
@@ -62,11 +45,7 @@ def get_first_declared_class(inst):
             if isinstance(triple[2], ThingClass):
                 return triple[2].name
     return "Entity"
-def extract_ontology_to_ngsi_ld(onto):
-    sync_reasoner([onto], infer_property_values=True, ignore_unsupported_datatypes=True)
-
-    entities = []
-    rules = []
+def build_context(onto, main_classes):
     context = {
         "@context": [
             "https://uri.etsi.org/ngsi-ld/v1/ngsi-ld-core-context-v1.jsonld",
@@ -74,48 +53,16 @@ def extract_ontology_to_ngsi_ld(onto):
             {}
         ]
     }
-
-    # Extraire les entités et mettre à jour le contexte
-    for inst in onto.individuals():
-        classes = [cls.name for cls in inst.is_a if isinstance(cls, ThingClass)]
-        if not classes:
-            continue
-        main_class = classes[0]
-        
-        # Ajouter la classe au contexte si elle n'existe pas déjà
-        if main_class not in context["@context"][2]:
-            cls=onto[main_class]
-            for parent_class in cls.is_a:
-                if isinstance(parent_class, ThingClass):
-                    context["@context"][2][main_class] = parent_class.iri
-
-        # Création de l'entité NGSI-LD
-        entity = {
-            "id": iri_to_ngsi_ld(inst),
-            "type": list(set(cls.name for cls in inst.is_a if isinstance(cls, ThingClass))),
-            "name": inst.name
-        }
-
-        # Propriétés et relations
-        for prop in onto.object_properties():
-            values = list(prop[inst])
-            if values:
-                objects = [iri_to_ngsi_ld(v) for v in values]
-                entity[prop.name] = {
-                    "type": "Relationship",
-                    "object": objects[0] if len(objects) == 1 else objects
-                }
-
-        for prop in onto.data_properties():
-            values = list(prop[inst])
-            if values:
-                entity[prop.name] = {
-                    "type": "Property",
-                    "value": values[0] if len(values) == 1 else values
-                }
-
-        entities.append(entity)
-
+    # Ajouter au contexte chaque type principal, avec l'IRI de sa classe parente
+    for main_class, class_storid in main_classes.items():
+        cls = onto.world._get_by_storid(class_storid)
+        for parent_class in cls.is_a:
+            if isinstance(parent_class, ThingClass):
+                context["@context"][2][main_class] = parent_class.iri
+    return context
+
+def extract_rules(onto):
+    rules = []
     # Extraction des règles SWRL
     for rule in onto.rules():
         try:
@@ -127,22 +74,70 @@ def extract_ontology_to_ngsi_ld(onto):
             })
         except Exception:
             pass
+    return rules
 
-    # Retourner les entités, règles et contexte
-    return { "context": context,"entities": entities, "rules": rules}
-
-# Chargement des ontologies
-ontos = load_all_dependencies()
-onto_main = get_ontology("file://onto/AI4C2PS.owl").load()
-record_pre_reasoning_state(onto_main)
-
-
-
+def extract_ontology_to_ngsi_ld(onto):
+    sync_reasoner([onto], infer_property_values=True, ignore_unsupported_datatypes=True)
 
+    # Extraire les entités en une passe sur le quadstore (triplets groupés par sujet)
+    with stage("ngsi_export"):
+        exporter = NgsiLdExporter(onto)
+        entities = exporter.export()
 
-# 3. Extraction des données avec inférences
-ontology_json = extract_ontology_to_ngsi_ld(onto_main)
+    # Retourner les entités, règles et contexte
+    return { "context": build_context(onto, exporter.main_classes),"entities": entities, "rules": extract_rules(onto)}
 
-# Sauvegarde
-with open("output_ontology.json", "w") as f:
-    json.dump(ontology_json, f, indent=2)
\ No newline at end of file
+def export_ontology_parallel(onto, file, workers):
+    """Même document que extract_ontology_to_ngsi_ld + json.dump, entités sérialisées par un pool de processus"""
+    sync_reasoner([onto], infer_property_values=True, ignore_unsupported_datatypes=True)
+    entity_texts, main_classes = parallel_export(onto, workers)
+    write_ngsi_ld_document(file, build_context(onto, main_classes), entity_texts, extract_rules(onto))
+
+# Export en parallèle par intervalles de storids (nombre de processus ; 0 = export séquentiel)
+PARALLEL_EXPORT_WORKERS = 0
+# Sortie : "json" (document unique indenté), "ndjson" (en-tête puis une entité par ligne, mémoire constante)
+# ou "chunks" (dossier output_ontology/ : header.json + fichiers d'entités de taille fixe)
+OUTPUT_MODE = "json"
+# Export incrémental : seules les entités créées, modifiées ou supprimées depuis l'exécution précédente
+# (opérations par lot NGSI-LD upsert/delete dans output_ontology_changes.json)
+INCREMENTAL_EXPORT = False
+# Ontologie exportée (pipeline_benchmark.py exporte onto/main.owl)
+EXPORT_SOURCE = os.environ.get("EXPORT_SOURCE", "file://onto/AI4C2PS.owl")
+
+def export_ontology(source=EXPORT_SOURCE, output="output_ontology.json"):
+    """Export NGSI-LD d'une ontologie (IRI ou file://...) et de ses inférences, selon OUTPUT_MODE"""
+    global onto_main
+    # Chargement des ontologies : seules celles que la source importe sont lues depuis le cache
+    with stage("ontology_load"):
+        world, ontos = load_all_dependencies()
+        onto_main = world.get_ontology(source).load()
+    pre_reasoning_state = record_pre_reasoning_state(onto_main)
+
+    # 3. Extraction des données avec inférences, puis sauvegarde
+    if INCREMENTAL_EXPORT:
+        sync_reasoner([onto_main], infer_property_values=True, ignore_unsupported_datatypes=True)
+        incremental_export(onto_main, "output_ontology_changes.json")
+    elif OUTPUT_MODE in ("ndjson", "chunks"):
+        sync_reasoner([onto_main], infer_property_values=True, ignore_unsupported_datatypes=True)
+        writer = NdjsonWriter("output_ontology.ndjson") if OUTPUT_MODE == "ndjson" else ChunkedWriter("output_ontology")
+        count = stream_export(onto_main, writer, lambda exporter: {
+            "context": build_context(onto_main, exporter.main_type_classes()),
+            "rules": extract_rules(onto_main)})
+        print(f"{count} entité(s) exportée(s) ({OUTPUT_MODE})")
+    elif PARALLEL_EXPORT_WORKERS:
+        export_ontology_parallel(onto_main, output, PARALLEL_EXPORT_WORKERS)
+    else:
+        ontology_json = extract_ontology_to_ngsi_ld(onto_main)
+        with stage("write_output"), open(output, "w") as f:
+            json.dump(ontology_json, f, indent=2)
+
+    # Inférences du raisonnement (nouveaux types et nouvelles relations), à côté de l'export NGSI-LD
+    with stage("reasoning_delta"):
+        reasoning_delta = pre_reasoning_state.delta()
+        reasoning_delta.save("output_ontology_inferences.json", iri_to_ngsi_ld)
+    print(f"{len(reasoning_delta)} assertion(s) inférée(s)")
+    return onto_main
+
+
+if __name__ == "__main__":
+    export_ontology()
@@ -0,0 +1,166 @@
+import types
+
+from owlready2 import Thing
+from owlready2.base import rdf_type, owl_named_individual, to_literal
+
+from context_resolver import compile_context
+from ingestion import (IGNORED_KEYS, entity_types, instance_name, property_values,
+                       relationship_targets)
+from property_index import get_property_index
+
+
+class BulkLoader:
+    """Chargement massif d'entités NGSI-LD directement en triplets dans le quadstore.
+
+    Chaque lot d'entités devient des lignes (sujet, prédicat, objet) insérées avec executemany,
+    sans créer d'objet Python par individu : owlready2 les matérialise à la demande
+    (onto.ur5, world[iri]...). Les relations vers des entités d'un lot ultérieur sont
+    insérées dès que la cible a été chargée.
+    """
+
+    def __init__(self, onto, context, ontologies=None, batch_size=5000):
+        self.onto = onto
+        self.world = onto.world
+        self.graph = onto.world.graph
+        self.context = compile_context(context, ontologies)
+        self.batch_size = batch_size
+        self.properties = get_property_index(self.world)
+        self._storids = {}      # IRI -> storid
+        self._classes = {}      # nom de type -> storid de la classe
+        self._props = {}        # nom de propriété -> (storid, type)
+        self._loaded = set()    # identifiants NGSI-LD déjà chargés
+        self.pending = {}       # id cible -> [(storid sujet, storid propriété)]
+        self.count = 0
+
+    # --- abréviations ---
+    def _abbreviate_many(self, iris):
+        """storid de chaque IRI ; les IRI inconnus sont enregistrés en un seul executemany"""
+        missing = [iri for iri in dict.fromkeys(iris) if iri not in self._storids]
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            rows = self.graph.execute(
+                f"SELECT iri, storid FROM resources WHERE iri IN ({','.join('?' * len(chunk))})", chunk)
+            self._storids.update(rows)
+        new = [iri for iri in missing if iri not in self._storids]
+        if new:
+            last = self.graph.execute("UPDATE store SET current_resource=current_resource+?", (len(new),)) \
+                             .execute("SELECT current_resource FROM store").fetchone()[0]
+            rows = [(last - len(new) + 1 + i, iri) for i, iri in enumerate(new)]
+            self.graph.db.executemany("INSERT INTO resources VALUES (?,?)", rows)
+            self._storids.update((iri, storid) for storid, iri in rows)
+
+    def _class_storid(self, type_name):
+        storid = self._classes.get(type_name)
+        if storid is None:
+            class_iri = self.context.expand(type_name)
+            cls = self.world[class_iri] if class_iri else None
+            if cls is None:
+                # Classe absente : créée normalement (rare, une fois par type)
+                with self.onto:
+                    cls = types.new_class(type_name, (Thing,))
+                    if class_iri:
+                        cls.iri = class_iri
+            storid = self._classes[type_name] = cls.storid
+        return storid
+
+    def _property(self, prop_name):
+        if prop_name not in self._props:
+            prop = self.properties.resolve(prop_name)
+            kind = self.properties.kind(prop_name)
+            self._props[prop_name] = (prop.storid, kind) if prop is not None else (None, None)
+        return self._props[prop_name]
+
+    def individual_iri(self, entity_id):
+        return self.onto.base_iri + instance_name(entity_id)
+
+    # --- chargement ---
+    def load(self, entities):
+        """Charge un itérable d'entités par lots ; retourne le nombre d'entités chargées"""
+        batch = []
+        for entity in entities:
+            batch.append(entity)
+            if len(batch) >= self.batch_size:
+                self._load_batch(batch)
+                batch = []
+        if batch:
+            self._load_batch(batch)
+        self.graph.analyze()
+        return self.count
+
+    def _load_batch(self, batch):
+        self._abbreviate_many([self.individual_iri(e["id"]) for e in batch])
+        for entity in batch:
+            self._loaded.add(entity["id"])
+
+        objs, datas = [], []
+        for entity in batch:
+            s = self._storids[self.individual_iri(entity["id"])]
+            objs.append((s, rdf_type, owl_named_individual))
+            for type_name in entity_types(entity):
+                objs.append((s, rdf_type, self._class_storid(type_name)))
+            self._entity_rows(entity, s, objs, datas)
+            # Relations en attente vers cette entité
+            for subject, p in self.pending.pop(entity["id"], ()):
+                objs.append((subject, p, s))
+
+        self._insert(objs, datas)
+        self.count += len(batch)
+
+    def _insert(self, objs, datas=()):
+        c = self.onto.graph.c
+        self.graph.acquire_write_lock()
+        try:
+            self.graph.db.executemany(f"INSERT OR IGNORE INTO objs VALUES ({c},?,?,?)", objs)
+            self.graph.db.executemany(f"INSERT OR IGNORE INTO datas VALUES ({c},?,?,?,?)", datas)
+        finally:
+            self.graph.release_write_lock()
+        self._forget_loaded([row[0] for row in objs] + [row[0] for row in datas])
+
+    def _entity_rows(self, entity, s, objs, datas):
+        for prop_name, prop_value in entity.items():
+            if prop_name in IGNORED_KEYS:
+                continue
+            p, kind = self._property(prop_name)
+            try:
+                if kind == "object":
+                    for target_id in relationship_targets(prop_value):
+                        if target_id in self._loaded:
+                            objs.append((s, p, self._storids[self.individual_iri(target_id)]))
+                        else:
+                            self.pending.setdefault(target_id, []).append((s, p))
+                elif kind == "data":
+                    for v in property_values(prop_value):
+                        o, d = to_literal(v)
+                        datas.append((s, p, o, d))
+            except Exception as e:
+                print(f"🔥 Erreur avec '{prop_name}' sur '{entity['id']}': {e}")
+
+    def _forget_loaded(self, storids):
+        """Les individus déjà matérialisés en Python seront relus depuis le quadstore"""
+        entities = self.world._entities
+        for storid in set(storids):
+            if storid in entities:
+                del entities[storid]
+
+    def finish(self):
+        """Relie les cibles déjà présentes dans le quadstore ; retourne les relations sans cible"""
+        unresolved, objs = {}, []
+        for target_id, refs in self.pending.items():
+            target = self.world[self.individual_iri(target_id)]
+            if target is None:
+                unresolved[target_id] = refs
+                print(f"[Avertissement] Cible introuvable {target_id} ({len(refs)} relation(s))")
+            else:
+                objs.extend((s, p, target.storid) for s, p in refs)
+        if objs:
+            self._insert(objs)
+        self.pending = {}
+        return unresolved
+
+
+def bulk_load_ngsi_ld(entities, onto, context, ontologies=None, batch_size=5000):
+    """Charge des entités NGSI-LD dans onto par insertion massive de triplets ; retourne le chargeur"""
+    loader = BulkLoader(onto, context, ontologies, batch_size)
+    loader.load(entities)
+    loader.unresolved = loader.finish()
+    return loader
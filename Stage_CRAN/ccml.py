@@ -0,0 +1,136 @@
+import re
+from collections import namedtuple
+
+# Condition ou conclusion : attribut, valeur (None = n'importe quelle valeur) et négation
+Condition = namedtuple("Condition", "attr value negated")
+
+_FEATURE = re.compile(r'feature\(\s*"([^"]*)"\s*,\s*"([^"]*)"\s*\)')
+_BRACKET_CHUNK = re.compile(r"^\[chunk\s+(.+?)\]$")
+
+
+class CcmlRule:
+    """Règle de production CCML : conditions (chaque alternative 'a or b' est un tuple) et conclusions"""
+
+    def __init__(self, name, conditions, conclusions):
+        self.name = name
+        self.conditions = conditions    # [Condition ou tuple de Condition (disjonction)]
+        self.conclusions = conclusions  # [Condition]
+
+    def alternatives(self):
+        """Conjonctions équivalentes à la règle, une par combinaison des disjonctions"""
+        combos = [[]]
+        for condition in self.conditions:
+            options = (condition,) if isinstance(condition, Condition) else condition
+            combos = [combo + [option] for combo in combos for option in options]
+        return combos
+
+    def __repr__(self):
+        return f"CcmlRule({self.name!r}, {len(self.conditions)} condition(s), {len(self.conclusions)} conclusion(s))"
+
+
+class CcmlStore:
+    """Contenu d'un fichier CCML : règles et chunks {nom: [(attribut, valeur)]}"""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.rules = []
+        self.chunks = {}
+        self._normalised = None
+
+    def chunk(self, name):
+        """Attributs d'un chunk ; les variantes '_' / '-' du nom sont acceptées (fichiers saisis à la main)"""
+        if name in self.chunks:
+            return name, self.chunks[name]
+        if self._normalised is None:
+            self._normalised = {n.replace("-", "_"): n for n in self.chunks}
+        actual = self._normalised.get(name.replace("-", "_"))
+        return (actual, self.chunks[actual]) if actual else (None, None)
+
+
+def _split_term(term):
+    """'vis#location box_true' -> ('vis#location', 'box_true') ; 'mcs/sl#match-1' -> ('mcs/sl#match-1', None)"""
+    parts = term.split(None, 1)
+    return parts[0], (parts[1].strip() if len(parts) > 1 else None)
+
+
+def chunk_header(line):
+    """Nom du chunk d'une ligne d'en-tête ('[chunk nom]' ou 'chunk nom:'), sinon None"""
+    match = _BRACKET_CHUNK.match(line)
+    if match:
+        return match.group(1).strip()
+    if line.startswith("chunk ") and line.endswith(":"):
+        return line[len("chunk "):-1].strip()
+    return None
+
+
+def chunk_features(line):
+    """[(attribut, valeur)] d'une ligne de chunk : feature("attribut", "valeur")... ou 'attribut valeur'"""
+    features = _FEATURE.findall(line)
+    return features if features else [_split_term(line)]
+
+
+def parse_ccml(text, source="<ccml>"):
+    """Analyse un store CCML (formats 'rule nom:' / conc: / cond:, '[chunk nom]' feature(...), 'chunk nom:')"""
+    store = CcmlStore()
+    raw_rules = []
+    rule = section = chunk = None
+    for lineno, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("store "):
+            store.name = line[len("store "):].rstrip(":").strip()
+        elif line.startswith("rule "):
+            rule = {"name": line[len("rule "):].rstrip(":").strip(), "cond": [], "conc": [], "line": lineno}
+            raw_rules.append(rule)
+            section = chunk = None
+        elif chunk_header(line) is not None:
+            chunk = store.chunks.setdefault(chunk_header(line), [])
+            rule = section = None
+        elif rule is not None and line.rstrip(":").strip() in ("cond", "conc"):
+            section = line.rstrip(":").strip()
+            if section == "cond" and (rule["cond"] and not rule["conc"]) and rule.get("sections") == ["cond"]:
+                print(f"[Avertissement] {source}:{lineno} règle {rule['name']} : deuxième section cond: lue comme conc:")
+                section = "conc"
+            rule.setdefault("sections", []).append(section)
+        elif chunk is not None:
+            chunk.extend(chunk_features(line))
+        elif rule is not None and section is not None:
+            rule[section].append(line)
+        else:
+            print(f"[Avertissement] {source}:{lineno} ligne ignorée : {line}")
+
+    aliases = {}    # orthographe rencontrée -> [nom du chunk, occurrences]
+    for raw in raw_rules:
+        conditions = []
+        for line in raw["cond"]:
+            options = tuple(c for term in line.split(" or ") for c in _resolve(store, term.strip(), True, source, raw, aliases))
+            conditions.append(options[0] if len(options) == 1 else options)
+        conclusions = [c for line in raw["conc"] for c in _resolve(store, line, False, source, raw, aliases)]
+        store.rules.append(CcmlRule(raw["name"], conditions, conclusions))
+    for term, (name, count) in aliases.items():
+        print(f"[Avertissement] {source} : '{term}' lu comme le chunk '{name}' ({count} occurrence(s))")
+    return store
+
+
+def _resolve(store, term, is_condition, source, raw, aliases):
+    negated = is_condition and term.startswith("-")
+    if negated:
+        term = term[1:]
+    if " " not in term:
+        name, features = store.chunk(term)
+        if features is not None:
+            if name != term:
+                aliases.setdefault(term, [name, 0])[1] += 1
+            if negated and len(features) > 1:
+                raise ValueError(f"{source}:{raw['line']} négation du chunk '{name}' à plusieurs attributs non supportée")
+            return [Condition(attr, value, negated) for attr, value in features]
+    attr, value = _split_term(term)
+    if value is None and not is_condition:
+        value = "true"
+    return [Condition(attr, value, negated)]
+
+
+def load_ccml(path):
+    with open(path, "r") as f:
+        return parse_ccml(f.read(), path)
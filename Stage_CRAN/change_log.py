@@ -0,0 +1,93 @@
+"""Suivi des modifications du quadstore d'un monde owlready2, par déclencheurs SQLite.
+
+Le rowid des tables objs et datas ne suffit pas : sans AUTOINCREMENT, SQLite réattribue le rowid
+maximal libéré par une suppression, si bien qu'un remplacement (suppression puis insertion, comme
+prop[inst] = valeurs) ne change ni le nombre de triplets ni le rowid max. Les déclencheurs voient
+chaque insertion et suppression :
+  - change_counts : compteur de modifications par ontologie (c), toujours actif ;
+  - change_log    : journal ordonné des triplets ajoutés et retirés (id AUTOINCREMENT, jamais
+                    réutilisé), activé par ChangeLog.
+
+Tables et déclencheurs sont TEMP : propres à la connexion du monde, jamais écrits dans le fichier
+du quadstore (ni dans le cache des ontologies).
+"""
+
+TABLES = {"objs": ("s", "p", "o", "NULL"), "datas": ("s", "p", "o", "d")}
+INSERT, DELETE = 1, -1
+
+
+def _count_trigger(table, event, rows):
+    body = " ".join(f"INSERT INTO change_counts VALUES ({row}.c, 1) ON CONFLICT(c) DO UPDATE SET n = n + 1;"
+                    for row in rows)
+    return (f"CREATE TEMP TRIGGER IF NOT EXISTS change_count_{table}_{event.lower()} "
+            f"AFTER {event} ON main.{table} BEGIN {body} END")
+
+
+def _log_trigger(table, event, rows):
+    s, p, o, d = TABLES[table]
+    body = " ".join(f"INSERT INTO change_log (tbl, op, c, s, p, o, d) "
+                    f"VALUES ('{table}', {op}, {row}.c, {row}.{s}, {row}.{p}, {row}.{o}, "
+                    f"{d if d == 'NULL' else f'{row}.{d}'});"
+                    for row, op in rows)
+    return (f"CREATE TEMP TRIGGER IF NOT EXISTS change_log_{table}_{event.lower()} "
+            f"AFTER {event} ON main.{table} WHEN EXISTS (SELECT 1 FROM change_cursors) BEGIN {body} END")
+
+
+def install(world):
+    """Installe (une fois par connexion) le compteur de modifications du monde"""
+    db = world.graph.db
+    if db.execute("SELECT 1 FROM sqlite_temp_master WHERE type='table' AND name='change_counts'").fetchone():
+        return
+    db.execute("CREATE TEMP TABLE change_counts (c INTEGER PRIMARY KEY, n INTEGER NOT NULL)")
+    db.execute("CREATE TEMP TABLE change_log (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+               "tbl TEXT, op INTEGER, c INTEGER, s INTEGER, p INTEGER, o, d)")
+    db.execute("CREATE TEMP TABLE change_cursors (name TEXT PRIMARY KEY, position INTEGER NOT NULL)")
+    for table in TABLES:
+        db.execute(_count_trigger(table, "INSERT", ["NEW"]))
+        db.execute(_count_trigger(table, "DELETE", ["OLD"]))
+        db.execute(_count_trigger(table, "UPDATE", ["OLD", "NEW"]))
+        # le journal n'est rempli que tant qu'un lecteur (ChangeLog) est enregistré
+        db.execute(_log_trigger(table, "INSERT", [("NEW", INSERT)]))
+        db.execute(_log_trigger(table, "DELETE", [("OLD", DELETE)]))
+        db.execute(_log_trigger(table, "UPDATE", [("OLD", DELETE), ("NEW", INSERT)]))
+
+
+def version(onto):
+    """Nombre de modifications (insertions, suppressions) de l'ontologie depuis l'installation"""
+    install(onto.world)
+    row = onto.world.graph.db.execute("SELECT n FROM change_counts WHERE c=?", (onto.graph.c,)).fetchone()
+    return row[0] if row else 0
+
+
+class ChangeLog:
+    """Lecteur du journal des modifications d'un monde.
+
+    Chaque lecteur a un nom et une position ; le journal est purgé jusqu'à la plus petite position
+    des lecteurs enregistrés.
+    """
+
+    def __init__(self, world, name):
+        install(world)
+        self.db = world.graph.db
+        self.name = name
+        self.db.execute("INSERT OR IGNORE INTO change_cursors VALUES (?, ?)", (name, self.position()))
+
+    def position(self):
+        """Identifiant de la dernière modification journalisée"""
+        row = self.db.execute("SELECT seq FROM temp.sqlite_sequence WHERE name='change_log'").fetchone()
+        return row[0] if row else 0
+
+    def changes(self, since):
+        """(table, op, c, s, p, o, d) journalisés après la position since, dans l'ordre"""
+        return self.db.execute("SELECT tbl, op, c, s, p, o, d FROM change_log WHERE id>? ORDER BY id",
+                               (since,)).fetchall()
+
+    def advance(self, position):
+        """Le lecteur a consommé le journal jusqu'à position : purge ce qu'aucun lecteur n'attend plus"""
+        self.db.execute("UPDATE change_cursors SET position=? WHERE name=?", (position, self.name))
+        self.db.execute("DELETE FROM change_log WHERE id<=(SELECT MIN(position) FROM change_cursors)")
+
+    def close(self):
+        self.db.execute("DELETE FROM change_cursors WHERE name=?", (self.name,))
+        self.db.execute("DELETE FROM change_log WHERE id<=COALESCE((SELECT MIN(position) FROM change_cursors), "
+                        "(SELECT MAX(id) FROM change_log))")
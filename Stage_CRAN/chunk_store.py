@@ -0,0 +1,125 @@
+import os
+
+from ccml import chunk_header, chunk_features, _split_term
+
+_SOMA = "http://www.ease-crc.org/ont/SOMA.owl#"
+_DUL = "http://www.ontologydesignpatterns.org/ont/dul/DUL.owl#"
+
+# Attribut de perception / de contrôle -> classe des individus associés aux chunks
+CHUNK_EVENT_CLASSES = {
+    "vis#piece_reached": _SOMA + "Reaching",
+    "vis#piece_taken": _SOMA + "PickingUp",
+    "vis#location": _SOMA + "Placing",
+    "vis#assembled": _SOMA + "Assembling",
+    "mcs/goals#set-goal": _DUL + "Goal",
+}
+
+
+def parse_chunks(text):
+    """{nom: [(attribut, valeur)]} d'un store de chunks ('chunk nom:' puis 'attribut valeur', ou '[chunk nom]' feature(...))"""
+    chunks = {}
+    features = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("store "):
+            continue
+        name = chunk_header(line)
+        if name is not None:
+            features = chunks.setdefault(name, [])
+        elif line.startswith("rule "):
+            features = None
+        elif features is not None:
+            features.extend(chunk_features(line))
+    return chunks
+
+
+class ChunkStore:
+    """Store de chunks CCML compilé en tables de hachage, rechargé seulement si le fichier change.
+
+    - by_feature : (attribut, valeur) -> nom du chunk (valeur None : chunk sans valeur, ex. mcs/sl#match-1) ;
+    - chunks : nom -> [(attribut, valeur)] ;
+    - individual(nom) : individu de l'ontologie correspondant (ex. rotor_taken -> SOMA PickingUp).
+    reload() ne coûte qu'un os.stat quand le fichier n'a pas changé.
+    """
+
+    def __init__(self, path="associations.ccml", world=None, event_classes=CHUNK_EVENT_CLASSES):
+        self.path = path
+        self.world = world
+        self.event_classes = event_classes
+        self.signature = None
+        self.chunks = {}
+        self.by_feature = {}
+        self.individuals = {}
+        self.reload()
+
+    def reload(self):
+        """Recompile le store si le fichier a changé (mtime, taille) ; retourne True s'il a été relu"""
+        st = os.stat(self.path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self.signature:
+            return False
+        with open(self.path, "r") as f:
+            self.chunks = parse_chunks(f.read())
+        by_feature = {}
+        for name, features in self.chunks.items():
+            for feature in features:
+                if feature in by_feature:
+                    print(f"[Avertissement] {self.path} : {feature[0]} {feature[1]} déjà associé au chunk "
+                          f"'{by_feature[feature]}', '{name}' ignoré")
+                else:
+                    by_feature[feature] = name
+        self.by_feature = by_feature
+        self.individuals = {}
+        self.signature = signature
+        return True
+
+    # --- recherche ---
+    def chunk_for(self, attr, value=None):
+        """Chunk d'un fait de perception (attribut, valeur), ou None"""
+        return self.by_feature.get((attr, value))
+
+    def resolve(self, fact):
+        """Chunk d'un fait écrit comme dans les stores : 'vis#assembled motor_true' -> 'motor_assembled'"""
+        return self.by_feature.get(_split_term(fact))
+
+    def features(self, name):
+        return self.chunks.get(name, [])
+
+    def __contains__(self, name):
+        return name in self.chunks
+
+    def __len__(self):
+        return len(self.chunks)
+
+    # --- ontologie ---
+    def individual(self, name, create=False):
+        """Individu associé au chunk (même nom, classe selon l'attribut), ou None.
+
+        Seuls les chunks positifs d'un attribut de CHUNK_EVENT_CLASSES ont un individu (les valeurs
+        *_false décrivent une absence d'événement). create=True crée l'individu dans l'ontologie de sa classe.
+        """
+        if name in self.individuals:
+            return self.individuals[name]
+        cls = None
+        features = self.chunks.get(name)
+        if features and self.world is not None:
+            attr, value = features[0]
+            class_iri = self.event_classes.get(attr)
+            if class_iri and not (value or "").endswith("_false"):
+                cls = self.world[class_iri]
+        if cls is None:
+            self.individuals[name] = None   # pas d'individu pour ce chunk
+            return None
+        onto = cls.namespace.ontology
+        inst = self.world[onto.base_iri + name]
+        if inst is None and create:
+            with onto:
+                inst = cls(name)
+        if inst is not None:
+            self.individuals[name] = inst
+        return inst
+
+    def individual_for(self, attr, value=None, create=False):
+        """Individu associé au fait de perception (attribut, valeur), ou None"""
+        name = self.by_feature.get((attr, value))
+        return self.individual(name, create) if name else None
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import re
+
+CONTEXT_CACHE_DIR = "onto/.cache/contexts"
+
+# Contextes distants utilisés par les fichiers NGSI-LD du projet
+ETSI_CORE_CONTEXT = "https://uri.etsi.org/ngsi-ld/v1/ngsi-ld-core-context-v1.jsonld"
+FIWARE_CONTEXT = "https://schema.lab.fiware.org/ld/context"
+
+_SCHEME = re.compile(r"^([A-Za-z][A-Za-z0-9+.-]*):")
+# Schémas sans autorité (pas de // après le schéma) : un IRI compact dont le préfixe n'est pas défini
+# (core:UR5) n'est pas un IRI absolu
+_OPAQUE_SCHEMES = {"urn", "mailto", "tag", "tel", "data", "did", "geo", "uuid"}
+
+
+def _is_absolute_iri(term):
+    """Vrai pour un IRI absolu : schéma suivi de //, ou schéma sans autorité connu (urn:, mailto:...)"""
+    match = _SCHEME.match(term)
+    return match is not None and (term.startswith("//", match.end()) or match.group(1).lower() in _OPAQUE_SCHEMES)
+
+
+def context_cache_file(url, cache_dir=CONTEXT_CACHE_DIR):
+    """Fichier local du cache pour un contexte distant"""
+    return os.path.join(cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".jsonld")
+
+
+def store_remote_context(url, document, cache_dir=CONTEXT_CACHE_DIR):
+    """Ajoute un contexte distant au cache local (document JSON ou chemin d'un fichier déjà téléchargé)"""
+    if isinstance(document, str):
+        with open(document, "r") as f:
+            document = json.load(f)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(context_cache_file(url, cache_dir), "w") as f:
+        json.dump(document, f)
+
+
+def load_remote_context(url, cache_dir=CONTEXT_CACHE_DIR):
+    """Contexte distant lu depuis le cache local uniquement (jamais de réseau) ; None s'il n'est pas en cache"""
+    try:
+        with open(context_cache_file(url, cache_dir), "r") as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return document.get("@context", {}) if isinstance(document, dict) else document
+
+
+class CompiledContext:
+    """@context JSON-LD compilé en tables de hachage : terme -> IRI, préfixe -> espace de noms, IRI -> ontologie"""
+
+    def __init__(self, context, ontologies=None, cache_dir=CONTEXT_CACHE_DIR):
+        self.terms = {}
+        self.prefixes = {}
+        self.vocab = None
+        self.missing_remote = []
+        self._cache_dir = cache_dir
+        self._seen_remote = set()
+        self._add(context)
+
+        # Espaces de noms des ontologies, pour la recherche du plus long préfixe. Seules les clés sont
+        # lues : une ontologie n'est demandée au dictionnaire (ex. LazyOntologies) qu'à sa première résolution
+        self.ontologies = ontologies if ontologies is not None else {}
+        self._namespaces = {ns.rstrip("#/"): ns for ns in self.ontologies}
+        self._owners = {}       # IRI -> espace de noms propriétaire, ou None
+
+    # --- compilation ---
+    def _add(self, context):
+        if context is None:
+            return
+        if isinstance(context, list):
+            for item in context:
+                self._add(item)
+        elif isinstance(context, str):
+            self._add_remote(context)
+        elif isinstance(context, dict):
+            self._add_definitions(context)
+
+    def _add_remote(self, url):
+        if url in self._seen_remote:
+            return
+        self._seen_remote.add(url)
+        remote = load_remote_context(url, self._cache_dir)
+        if remote is None:
+            self.missing_remote.append(url)
+        else:
+            self._add(remote)
+
+    def _add_definitions(self, definitions):
+        if "@vocab" in definitions:
+            self.vocab = definitions["@vocab"]
+        raw = {}
+        for term, value in definitions.items():
+            if term.startswith("@"):
+                continue
+            if isinstance(value, dict):
+                value = value.get("@id")
+            if isinstance(value, str):
+                raw[term] = value
+        # Préfixes d'abord : un terme peut utiliser un préfixe défini plus loin dans le même objet
+        for term, value in raw.items():
+            if value.endswith(("#", "/", ":")) and ":" in value:
+                self.prefixes[term] = value
+        for term, value in raw.items():
+            expanded = self._expand_compact(value)
+            if not _is_absolute_iri(expanded):
+                # préfixe non défini : le terme n'a pas d'IRI
+                self.prefixes.pop(term, None)
+                continue
+            self.terms[term] = expanded
+            if term in self.prefixes:
+                self.prefixes[term] = expanded
+
+    def _expand_compact(self, value):
+        prefix, sep, suffix = value.partition(":")
+        if sep and not suffix.startswith("//") and prefix in self.prefixes:
+            return self.prefixes[prefix] + suffix
+        return value
+
+    # --- résolution ---
+    def expand(self, term):
+        """IRI complet d'un terme, d'un IRI compact (soma:Screwing) ou d'un IRI absolu ; None si inconnu"""
+        iri = self.terms.get(term)
+        if iri is not None:
+            return iri
+        prefix, sep, suffix = term.partition(":")
+        if sep and prefix in self.prefixes and not suffix.startswith("//"):
+            return self.prefixes[prefix] + suffix
+        if _is_absolute_iri(term):
+            return term
+        if self.vocab:
+            return self.vocab + term
+        return None
+
+    def ontology_for(self, iri):
+        """Ontologie propriétaire d'un IRI : celle dont l'espace de noms est le plus long préfixe"""
+        ns = self.namespace_of(iri)
+        return None if ns is None else self.ontologies[ns]
+
+    def namespace_of(self, iri):
+        """Espace de noms (IRI de base) de l'ontologie propriétaire, ou None ; ne charge aucune ontologie"""
+        if iri in self._owners:
+            return self._owners[iri]
+        owner = None
+        candidate = iri.split("#", 1)[0] if "#" in iri else iri
+        while candidate:
+            owner = self._namespaces.get(candidate)
+            if owner is not None or "/" not in candidate:
+                break
+            candidate = candidate.rsplit("/", 1)[0]
+        self._owners[iri] = owner
+        return owner
+
+    def __contains__(self, term):
+        return term in self.terms
+
+
+def compile_context(context, ontologies=None, cache_dir=CONTEXT_CACHE_DIR):
+    """Compile un @context une seule fois ; un contexte déjà compilé est retourné tel quel"""
+    if isinstance(context, CompiledContext):
+        return context
+    compiled = CompiledContext(context, ontologies, cache_dir)
+    for url in compiled.missing_remote:
+        print(f"[Avertissement] Contexte distant absent du cache local ({cache_dir}) : {url}")
+    return compiled
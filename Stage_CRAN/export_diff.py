@@ -0,0 +1,68 @@
+import json
+
+from fingerprint_state import FingerprintState, fingerprint
+from ngsi_export import NgsiLdExporter
+
+EXPORT_STATE_FILE = "onto/.cache/export_state.json"
+
+
+class ExportState(FingerprintState):
+    """Empreintes {id: empreinte} du dernier export"""
+
+    def __init__(self, file=EXPORT_STATE_FILE):
+        super().__init__(file)
+
+
+class ChangeSet:
+    """Entités créées, modifiées et supprimées depuis l'export précédent"""
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.deleted = []       # identifiants
+        self.unchanged = 0
+        self.fingerprints = {}  # état complet après cet export
+
+    def __len__(self):
+        return len(self.created) + len(self.updated) + len(self.deleted)
+
+    def batch_operations(self):
+        """Corps des opérations par lot NGSI-LD : entityOperations/upsert (entités) et entityOperations/delete (ids)"""
+        return {"upsert": self.created + self.updated, "delete": self.deleted}
+
+    def save(self, file):
+        with open(file, "w") as f:
+            json.dump(self.batch_operations(), f, indent=2)
+
+
+def diff_export(onto, state, all_properties=False):
+    """Compare l'export courant de onto aux empreintes de state ; seules les entités modifiées sont conservées.
+
+    Un individu dont le premier type change change d'identifiant : il apparaît supprimé sous
+    l'ancien et créé sous le nouveau. state n'est pas modifié (voir ExportState.save).
+    """
+    previous = state.fingerprints
+    changes = ChangeSet()
+    for entity in NgsiLdExporter(onto, all_properties).iter_entities():
+        digest = fingerprint(entity)
+        old = previous.get(entity["id"])
+        changes.fingerprints[entity["id"]] = digest
+        if old is None:
+            changes.created.append(entity)
+        elif old != digest:
+            changes.updated.append(entity)
+        else:
+            changes.unchanged += 1
+    changes.deleted = sorted(entity_id for entity_id in previous if entity_id not in changes.fingerprints)
+    return changes
+
+
+def incremental_export(onto, file, state_file=EXPORT_STATE_FILE, all_properties=False):
+    """Écrit dans file les opérations upsert/delete depuis le dernier export, puis enregistre le nouvel état"""
+    state = ExportState(state_file)
+    changes = diff_export(onto, state, all_properties)
+    changes.save(file)
+    state.save(changes.fingerprints)
+    print(f"{len(changes.created)} créée(s), {len(changes.updated)} modifiée(s), "
+          f"{len(changes.deleted)} supprimée(s), {changes.unchanged} inchangée(s)")
+    return changes
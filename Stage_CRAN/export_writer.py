@@ -0,0 +1,104 @@
+import json
+import os
+
+from ngsi_export import NgsiLdExporter
+
+
+class NdjsonWriter:
+    """Sortie NDJSON : une ligne d'en-tête {"context", "rules"}, puis une entité par ligne, écrite dès qu'elle est produite"""
+
+    def __init__(self, file):
+        self.file = file
+        self.count = 0
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.file, "w")
+        return self
+
+    def header(self, record):
+        self._f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def write(self, entity):
+        self._f.write(json.dumps(entity, separators=(",", ":")) + "\n")
+        self.count += 1
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+
+class ChunkedWriter:
+    """Sortie en fichiers de taille fixe : header.json puis entities-00000.json, entities-00001.json...
+
+    Chaque fichier d'entités est un tableau JSON complet, lisible dès sa fermeture ; seule l'entité
+    en cours est en mémoire.
+    """
+
+    def __init__(self, directory, chunk_size=10000):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.count = 0
+        self.files = []
+        self._f = None
+
+    def __enter__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Les morceaux d'un export précédent plus long ne doivent pas survivre
+        for name in os.listdir(self.directory):
+            if name.startswith("entities-") and name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
+        return self
+
+    def header(self, record):
+        with open(os.path.join(self.directory, "header.json"), "w") as f:
+            json.dump(record, f, indent=2)
+
+    def write(self, entity):
+        if self.count % self.chunk_size == 0:
+            self._close_chunk()
+            path = os.path.join(self.directory, f"entities-{len(self.files):05d}.json")
+            self.files.append(path)
+            self._f = open(path, "w")
+            self._f.write("[\n")
+        else:
+            self._f.write(",\n")
+        self._f.write(json.dumps(entity))
+        self.count += 1
+
+    def _close_chunk(self):
+        if self._f is not None:
+            self._f.write("\n]\n")
+            self._f.close()
+            self._f = None
+
+    def __exit__(self, *exc):
+        self._close_chunk()
+
+
+def stream_export(onto, writer, header):
+    """Écrit l'en-tête puis chaque entité au fil de l'export ; retourne le nombre d'entités.
+
+    header(exporter) construit l'enregistrement d'en-tête avant le parcours (types principaux
+    disponibles via exporter.main_type_classes()).
+    """
+    exporter = NgsiLdExporter(onto)
+    with writer:
+        writer.header(header(exporter))
+        for entity in exporter.iter_entities():
+            writer.write(entity)
+    return writer.count
+
+
+def read_ndjson(file):
+    """(en-tête, itérateur d'entités) d'un export NDJSON"""
+    with open(file, "r") as f:
+        header = json.loads(f.readline())
+
+    # Le fichier n'est rouvert qu'à l'itération : un itérateur jamais parcouru ne garde rien d'ouvert
+    def entities():
+        with open(file, "r") as f:
+            f.readline()
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    return header, entities()
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from ontology_cache import file_fingerprint
+
+
+def fingerprint(entity):
+    """Empreinte du contenu d'une entité NGSI-LD (indépendante de l'ordre des attributs)"""
+    text = json.dumps(entity, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class FingerprintState:
+    """Empreintes {id: empreinte} du passage précédent, conservées entre deux exécutions.
+
+    files : fichiers dont l'état décrit le contenu (ex. ontologies écrites par l'ingestion). Si l'un
+    d'eux a changé hors du pipeline depuis l'enregistrement, les empreintes sont ignorées.
+    attributes : {id: noms des attributs} du passage précédent, optionnel (attributs retirés d'une entité).
+    """
+
+    def __init__(self, file, files=()):
+        self.file = file
+        self.files = list(files)
+        self.fingerprints = {}
+        self.attributes = {}
+        self.file_fingerprints = {}
+        if not os.path.exists(file):
+            return
+        try:
+            with open(file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Avertissement] État illisible {file} ({e}), passage complet")
+            return
+        self.file_fingerprints = data.get("files", {})
+        stale = [path for path in self.files if not self._unchanged(path)]
+        if stale:
+            print(f"[Avertissement] {', '.join(stale)} modifié(s) depuis le dernier passage, passage complet")
+        else:
+            self.fingerprints = data.get("fingerprints", {})
+            self.attributes = data.get("attributes", {})
+
+    def _unchanged(self, path):
+        previous = self.file_fingerprints.get(path)
+        if previous is None or not os.path.exists(path):
+            return False
+        return file_fingerprint(path, previous)["sha256"] == previous["sha256"]
+
+    def save(self, fingerprints, attributes=None):
+        """Remplace l'état (écriture atomique : un passage interrompu laisse l'état précédent)"""
+        directory = os.path.dirname(self.file) or "."
+        os.makedirs(directory, exist_ok=True)
+        files = {path: file_fingerprint(path, self.file_fingerprints.get(path))
+                 for path in self.files if os.path.exists(path)}
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"fingerprints": fingerprints, "attributes": attributes or {}, "files": files}, f)
+        os.replace(tmp, self.file)
+        self.fingerprints = fingerprints
+        self.attributes = attributes or {}
+        self.file_fingerprints = files
@@ -0,0 +1,440 @@
+import io
+
+from owlready2 import (World, ThingClass, ObjectPropertyClass, DataPropertyClass,
+                       TransitiveProperty, SymmetricProperty)
+from owlready2.reasoning import _apply_inferred_obj_relations
+from owlready2.base import (rdf_type, rdf_domain, rdf_range, rdfs_subclassof, rdfs_subpropertyof,
+                            owl_class, owl_named_individual, owl_object_property, owl_data_property,
+                            owl_annotation_property, owl_inverse_property, owl_restriction,
+                            owl_equivalentclass, owl_onproperty, owl_thing, swrl_imp, swrl_variable)
+
+from change_log import ChangeLog, INSERT
+from property_index import get_property_index
+from reasoner_cache import cached_sync_reasoner
+from pipeline_trace import stage, count, sync_reasoner
+
+INFERENCES_ONTOLOGY = "http://inferrences/"   # ontologie où owlready2 range les inférences
+
+_OWL = "http://www.w3.org/2002/07/owl#"
+_RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+_RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+_RDF_TYPE = _RDF + "type"
+_BUILTIN_NAMESPACES = (_OWL, _RDFS, _RDF)
+
+# Prédicats qui modifient la TBox / RBox : leur ajout impose un recalcul complet
+TBOX_PREDICATES = {rdfs_subclassof, rdfs_subpropertyof, owl_equivalentclass, owl_inverse_property,
+                   rdf_domain, rdf_range, owl_onproperty}
+TBOX_PREDICATE_IRIS = [_OWL + name for name in (
+    "disjointWith", "equivalentProperty", "propertyChainAxiom", "propertyDisjointWith",
+    "disjointUnionOf", "hasKey", "members", "distinctMembers", "sameAs", "differentFrom")]
+META_TYPES = {owl_class, owl_object_property, owl_data_property, owl_annotation_property, owl_restriction}
+META_TYPE_IRIS = [_OWL + name for name in (
+    "TransitiveProperty", "SymmetricProperty", "AsymmetricProperty", "ReflexiveProperty",
+    "IrreflexiveProperty", "FunctionalProperty", "InverseFunctionalProperty", "AllDisjointClasses",
+    "AllDifferent", "Ontology")] + [_RDFS + "Datatype"]
+
+
+def _table_signatures(graph):
+    """(nombre de triplets, rowid max) par table du quadstore"""
+    return {table: graph.execute(f"SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM {table}").fetchone()
+            for table in ("objs", "datas")}
+
+
+def rule_atoms(rule):
+    """(prédicats du corps, prédicats de la tête) d'une règle SWRL, en storids"""
+    def predicates(atoms):
+        found = set()
+        for atom in atoms:
+            entity = getattr(atom, "class_predicate", None) or getattr(atom, "property_predicate", None)
+            if entity is not None:
+                found.add(entity.storid)
+        return found
+    return predicates(rule.body), predicates(rule.head)
+
+
+def rule_nodes(world, rule_storids):
+    """Sujets (règle, atomes, listes, variables) qui décrivent les règles SWRL dans le quadstore"""
+    graph = world.graph
+    nodes, frontier = set(rule_storids), list(rule_storids)
+    while frontier:
+        s = frontier.pop()
+        for (o,) in graph.execute("SELECT o FROM objs WHERE s=?", (s,)):
+            if o in nodes:
+                continue
+            is_variable = o > 0 and graph.execute(
+                "SELECT 1 FROM objs WHERE s=? AND p=? AND o=?", (o, rdf_type, swrl_variable)).fetchone()
+            if o < 0 or is_variable:
+                nodes.add(o)
+                frontier.append(o)
+    return nodes
+
+
+def ntriples_terms(world, blank="b"):
+    """Fonctions (nœud, littéral) d'écriture N-Triples des storids de world ; blank préfixe les nœuds anonymes"""
+    iri = world._unabbreviate
+
+    def node(storid):
+        return f"_:{blank}{-storid}" if storid < 0 else f"<{iri(storid)}>"
+
+    def literal(o, d):
+        text = str(o).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+        if isinstance(d, str) and d.startswith("@"):
+            return f'"{text}"{d}'
+        if isinstance(d, int) and d > 0:
+            return f'"{text}"^^<{iri(d)}>'
+        return f'"{text}"'
+
+    return node, literal
+
+
+class DeltaReport:
+    """Classement des triplets ajoutés depuis le dernier raisonnement"""
+
+    def __init__(self):
+        self.facts = []             # (s, p, o) assertions de propriétés (objet ou donnée)
+        self.class_assertions = []  # (individu, classe)
+        self.rule_rows = 0
+        self.tbox_rows = []         # ajoutés ou retirés
+        self.new_rules = []
+        self.inconsistent = False   # journal incomplet par rapport au quadstore : recalcul complet
+
+    @property
+    def empty(self):
+        return not (self.facts or self.class_assertions or self.new_rules)
+
+
+class IncrementalReasoner:
+    """Raisonnement incrémental autour de sync_reasoner.
+
+    Le premier appel lance un raisonnement complet (HermiT ; seulement sur le module de localité de
+    l'ABox et des règles si modules est fourni). Les appels suivants ne considèrent que les triplets
+    ajoutés depuis, lus dans le journal des modifications (change_log ; un remplacement qui réutilise
+    un rowid libéré y figure aussi) :
+      - changement de TBox/RBox (ajout ou retrait), faits touchant une classe définie
+        (owl:equivalentClass), ou journal incohérent avec (nombre de triplets, rowid max) -> recalcul complet ;
+      - sinon seules les règles SWRL nouvelles ou dont le corps utilise un prédicat modifié sont
+        ré-évaluées, sur un module réduit (faits déjà inférés + RBox des prédicats concernés).
+    Comme sync_reasoner, les inférences sont monotones : les faits déjà inférés sont conservés.
+    """
+
+    def __init__(self, ontologies, evaluator=None, infer_property_values=True,
+                 ignore_unsupported_datatypes=True, debug=1, cache=None, modules=None):
+        self.ontologies = list(ontologies)
+        self.world = self.ontologies[0].world
+        self.evaluator = evaluator or HermitModuleEvaluator(debug=debug)
+        self.cache = cache      # ReasonerCache pour les raisonnements complets, optionnel
+        self.modules = modules  # ModuleExtractor : seul le module de localité est raisonné, optionnel
+        self.debug = debug
+        self.infer_property_values = infer_property_values
+        self.ignore_unsupported_datatypes = ignore_unsupported_datatypes
+        self.log = ChangeLog(self.world, f"incremental-{id(self)}")
+        self.mark = None        # (position du journal, signatures des tables)
+        self.known_rules = set()
+        self.last_mode = None
+        self.last_delta = None
+
+    # --- état ---
+    def rules(self):
+        return [rule for onto in self.ontologies for rule in onto.rules()]
+
+    def _iris_to_storids(self, iris):
+        storids = set()
+        for iri in iris:
+            storid = self.world._abbreviate(iri, False)
+            if storid is not None:
+                storids.add(storid)
+        return storids
+
+    def _inferences_c(self):
+        return self.world.get_ontology(INFERENCES_ONTOLOGY).graph.c
+
+    def _definition_symbols(self):
+        """Classes et propriétés citées dans une définition (owl:equivalentClass vers une expression)"""
+        graph = self.world.graph
+        symbols, frontier = set(), [o for (o,) in graph.execute(
+            "SELECT o FROM objs WHERE p=? AND o<0", (owl_equivalentclass,))]
+        seen = set(frontier)
+        while frontier:
+            s = frontier.pop()
+            for (o,) in graph.execute("SELECT o FROM objs WHERE s=?", (s,)):
+                if o < 0 and o not in seen:
+                    seen.add(o)
+                    frontier.append(o)
+                elif o > 0:
+                    symbols.add(o)
+        return symbols
+
+    def _record(self):
+        position = self.log.position()
+        self.mark = (position, _table_signatures(self.world.graph))
+        self.log.advance(position)
+        self.known_rules = {rule.storid for rule in self.rules()}
+        self.definition_symbols = self._definition_symbols()
+
+    # --- delta ---
+    def changes(self):
+        """(triplets ajoutés, triplets retirés) depuis le repère, hors ontologie d'inférences ; None si le journal
+        ne rend pas compte de l'évolution de (nombre de triplets, rowid max) d'une table"""
+        position, signatures = self.mark
+        changes = self.log.changes(position)
+        current = _table_signatures(self.world.graph)
+        for table, (count_at_mark, max_at_mark) in signatures.items():
+            inserted = sum(1 for change in changes if change[0] == table and change[1] == INSERT)
+            deleted = sum(1 for change in changes if change[0] == table and change[1] != INSERT)
+            rows, max_rowid = current[table]
+            if rows != count_at_mark + inserted - deleted:
+                return None
+            if (max_rowid > max_at_mark and not inserted) or (max_rowid < max_at_mark and not deleted):
+                return None
+
+        inferences_c = self._inferences_c()
+        last = {}   # triplet -> dernière opération
+        for table, op, c, s, p, o, d in changes:
+            if c != inferences_c:
+                last[table, c, s, p, o, d] = op
+        added = [(s, p, o, table) for (table, c, s, p, o, d), op in last.items() if op == INSERT]
+        removed = [(s, p, o, table) for (table, c, s, p, o, d), op in last.items() if op != INSERT]
+        return added, removed
+
+    def delta(self):
+        """Triplets ajoutés (et retraits de TBox ou de règles) depuis le dernier repère, hors ontologie d'inférences"""
+        report = DeltaReport()
+        changes = self.changes()
+        if changes is None:
+            report.inconsistent = True
+            return report
+        rows, removed = changes
+        rules = self.rules()
+        report.new_rules = [rule for rule in rules if rule.storid not in self.known_rules]
+        nodes = rule_nodes(self.world, [rule.storid for rule in rules])
+        tbox_predicates = TBOX_PREDICATES | self._iris_to_storids(TBOX_PREDICATE_IRIS)
+        meta_types = META_TYPES | self._iris_to_storids(META_TYPE_IRIS)
+        properties = get_property_index(self.world, refresh=True)
+
+        # Retraits : seuls ceux de TBox ou de règles comptent (les faits inférés restent, comme avec sync_reasoner)
+        for s, p, o, table in removed:
+            if (s in nodes or s < 0 or p in tbox_predicates
+                    or (p == rdf_type and o in meta_types | {swrl_imp, swrl_variable})):
+                report.tbox_rows.append((s, p, o))
+        for s, p, o, table in rows:
+            if s in nodes or (p == rdf_type and o in (swrl_imp, swrl_variable)):
+                report.rule_rows += 1
+            elif p in tbox_predicates or s < 0:
+                report.tbox_rows.append((s, p, o))
+            elif p == rdf_type:
+                if o in (owl_named_individual, owl_thing):
+                    continue
+                if o in meta_types:
+                    report.tbox_rows.append((s, p, o))
+                else:
+                    report.class_assertions.append((s, o))
+            else:
+                kind = properties.kind(self.world._unabbreviate(p))
+                if kind in ("object", "data"):
+                    report.facts.append((s, p, o))
+                elif kind != "annotation":
+                    report.tbox_rows.append((s, p, o))
+        return report
+
+    def affected_rules(self, report):
+        """Règles à ré-évaluer : nouvelles, ou dont le corps dépend (transitivement) d'un prédicat modifié"""
+        changed = set()
+        for _, p, _ in report.facts:
+            changed |= self._with_ancestors(p)
+        for _, cls in report.class_assertions:
+            changed |= self._with_ancestors(cls)
+
+        affected = list(report.new_rules)
+        for rule in affected:
+            changed |= self._heads(rule)
+        remaining = [rule for rule in self.rules() if rule not in affected]
+        grew = True
+        while grew:
+            grew = False
+            for rule in list(remaining):
+                body, _ = rule_atoms(rule)
+                if body & changed:
+                    affected.append(rule)
+                    remaining.remove(rule)
+                    changed |= self._heads(rule)
+                    grew = True
+        return affected, changed
+
+    def _with_ancestors(self, storid):
+        entity = self.world._get_by_storid(storid)
+        if isinstance(entity, (ThingClass, ObjectPropertyClass, DataPropertyClass)):
+            related = {e.storid for e in entity.ancestors() if hasattr(e, "storid")}
+            inverse = getattr(entity, "inverse", None)
+            if inverse is not None:
+                related |= {e.storid for e in inverse.ancestors()}
+            return related | {storid}
+        return {storid}
+
+    def _heads(self, rule):
+        _, head = rule_atoms(rule)
+        found = set()
+        for storid in head:
+            found |= self._with_ancestors(storid)
+        return found
+
+    # --- raisonnement ---
+    def full(self):
+        if self.modules is not None:
+            result = self.modules.sync_reasoner(self.ontologies, self.cache, self.infer_property_values,
+                                                self.ignore_unsupported_datatypes, self.debug)
+            if result is not None:
+                count("reasoner_cache_" + result)
+        elif self.cache is not None:
+            result = cached_sync_reasoner(self.ontologies, self.cache, self.infer_property_values,
+                                          self.ignore_unsupported_datatypes, self.debug)
+            count("reasoner_cache_" + result)
+        else:
+            sync_reasoner(self.ontologies, infer_property_values=self.infer_property_values,
+                          ignore_unsupported_datatypes=self.ignore_unsupported_datatypes, debug=self.debug)
+        self.last_mode = "full"
+        self._record()
+        return self.last_mode
+
+    def mark_reasoned(self):
+        """Le monde contient déjà ses inférences (ontologie issue d'un raisonnement précédent, moteur natif) :
+        pose le repère sans raisonner, les appels suivants de reason() sont incrémentaux"""
+        self._record()
+
+    def reason(self):
+        """Lance le raisonnement (complet ou incrémental) ; retourne 'full', 'incremental' ou 'unchanged'"""
+        if self.mark is None:
+            return self.full()
+
+        with stage("reasoning_delta"):
+            report = self.last_delta = self.delta()
+        if report.inconsistent:
+            count("reasoning_log_inconsistent")
+            return self.full()
+        if report.tbox_rows:
+            return self.full()
+        if report.empty:
+            self.last_mode = "unchanged"
+            self._record()
+            return self.last_mode
+
+        affected, changed = self.affected_rules(report)
+        if changed & self.definition_symbols:
+            # Un fait nouveau peut rendre un individu membre d'une classe définie : réalisation complète
+            return self.full()
+
+        if affected:
+            count("incremental_rules", len(affected))
+            with stage("incremental_rules"):
+                self.evaluator.evaluate(self.world, affected, self._inferences_ontology())
+        self.last_mode = "incremental"
+        self._record()
+        return self.last_mode
+
+    def _inferences_ontology(self):
+        return self.world.get_ontology(INFERENCES_ONTOLOGY)
+
+
+class HermitModuleEvaluator:
+    """Évalue un sous-ensemble de règles avec HermiT sur un module réduit.
+
+    Le module ne contient que les règles, les types (déjà inférés, super-classes comprises) des
+    individus pour les classes des règles, les faits (asserted et inférés) des propriétés des règles,
+    et la RBox qui relie ces propriétés. Il ne contient pas la TBox de SOMA/DUL.
+    """
+
+    def __init__(self, debug=1):
+        self.debug = debug
+
+    def module_ntriples(self, world, rules):
+        graph = world.graph
+        lines = []
+        node, literal = ntriples_terms(world)
+
+        # Règles : tous les triplets qui les décrivent
+        nodes = rule_nodes(world, [rule.storid for rule in rules])
+        for s in nodes:
+            for p, o in graph.execute("SELECT p, o FROM objs WHERE s=?", (s,)):
+                lines.append(f"{node(s)} {node(p)} {node(o)} .")
+            for p, o, d in graph.execute("SELECT p, o, d FROM datas WHERE s=?", (s,)):
+                lines.append(f"{node(s)} {node(p)} {literal(o, d)} .")
+
+        classes, properties = set(), set()
+        for rule in rules:
+            for atom in list(rule.body) + list(rule.head):
+                entity = getattr(atom, "class_predicate", None) or getattr(atom, "property_predicate", None)
+                if isinstance(entity, ThingClass):
+                    classes.add(entity)
+                elif isinstance(entity, (ObjectPropertyClass, DataPropertyClass)):
+                    properties.add(entity)
+
+        # RBox : super-propriétés et inverses des propriétés des règles
+        for prop in list(properties):
+            for parent in prop.ancestors():
+                if parent is not prop and not parent.iri.startswith(_BUILTIN_NAMESPACES):
+                    properties.add(parent)
+        individuals = set()
+        for cls in classes:
+            lines.append(f"{node(cls.storid)} <{_RDF_TYPE}> <{_OWL}Class> .")
+            descendants = [c.storid for c in cls.descendants()]
+            for i in range(0, len(descendants), 500):
+                chunk = descendants[i:i + 500]
+                for (s,) in graph.execute(
+                        f"SELECT DISTINCT s FROM objs WHERE p=? AND o IN ({','.join('?' * len(chunk))})",
+                        (rdf_type, *chunk)):
+                    if s > 0:
+                        individuals.add(s)
+                        lines.append(f"{node(s)} <{_RDF_TYPE}> {node(cls.storid)} .")
+        for prop in properties:
+            is_object = isinstance(prop, ObjectPropertyClass)
+            lines.append(f"{node(prop.storid)} <{_RDF_TYPE}> <{_OWL}{'ObjectProperty' if is_object else 'DatatypeProperty'}> .")
+            for parent in prop.is_a:
+                if parent in properties:
+                    lines.append(f"{node(prop.storid)} <{_RDFS}subPropertyOf> {node(parent.storid)} .")
+            if is_object:
+                if issubclass(prop, TransitiveProperty):
+                    lines.append(f"{node(prop.storid)} <{_RDF_TYPE}> <{_OWL}TransitiveProperty> .")
+                if issubclass(prop, SymmetricProperty):
+                    lines.append(f"{node(prop.storid)} <{_RDF_TYPE}> <{_OWL}SymmetricProperty> .")
+                sources = [(p.storid, False) for p in prop.descendants()]
+                if prop.inverse is not None:
+                    sources += [(p.storid, True) for p in prop.inverse.descendants()]
+                for p, reverse in sources:
+                    for s, o in graph.execute("SELECT s, o FROM objs WHERE p=?", (p,)):
+                        if s > 0 and o > 0:
+                            s, o = (o, s) if reverse else (s, o)
+                            individuals.update((s, o))
+                            lines.append(f"{node(s)} {node(prop.storid)} {node(o)} .")
+            else:
+                for p in prop.descendants():
+                    for s, o, d in graph.execute("SELECT s, o, d FROM datas WHERE p=?", (p.storid,)):
+                        if s > 0:
+                            individuals.add(s)
+                            lines.append(f"{node(s)} {node(prop.storid)} {literal(o, d)} .")
+        for s in individuals:
+            lines.append(f"{node(s)} <{_RDF_TYPE}> <{_OWL}NamedIndividual> .")
+        return "\n".join(lines) + "\n"
+
+    def evaluate(self, world, rules, inferences):
+        """Raisonne sur le module et recopie dans inferences les faits nouveaux ; retourne leur nombre"""
+        scratch = World()
+        module = scratch.get_ontology("http://incremental-module/")
+        module.load(fileobj=io.BytesIO(self.module_ntriples(world, rules).encode("utf-8")), format="ntriples")
+        sync_reasoner(scratch, infer_property_values=True, ignore_unsupported_datatypes=True, debug=self.debug)
+
+        scratch_inferences = scratch.get_ontology(INFERENCES_ONTOLOGY)
+        added = 0
+        for s, p, o in scratch.graph.execute(
+                "SELECT s, p, o FROM objs WHERE c=?", (scratch_inferences.graph.c,)):
+            if s < 0 or o < 0:
+                continue
+            s2, p2, o2 = (world._abbreviate(scratch._unabbreviate(x)) for x in (s, p, o))
+            if world._has_obj_triple_spo(s2, p2, o2):
+                continue
+            if p2 == rdf_type:
+                inferences._add_obj_triple_spo(s2, p2, o2)
+            else:
+                _apply_inferred_obj_relations(world, inferences, 0, [(s2, world._get_by_storid(p2), o2)])
+            added += 1
+        scratch.close()
+        return added
+
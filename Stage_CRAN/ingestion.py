@@ -0,0 +1,227 @@
+import types
+
+from owlready2 import Thing
+
+from change_log import version
+from context_resolver import compile_context
+from ngsi_stream import NgsiLdStreamReader
+from property_index import get_property_index
+
+IGNORED_KEYS = ("id", "type", "@context", "name")
+
+
+def entity_types(entity):
+    """Liste des types d'une entité NGSI-LD"""
+    return entity["type"] if isinstance(entity["type"], list) else [entity["type"]]
+
+
+def instance_name(entity_id):
+    """Nom de l'individu : dernière partie de l'identifiant (urn:ngsi-ld:Cobot:ur5 -> ur5)"""
+    return entity_id.split(":")[-1]
+
+
+def relationship_targets(value):
+    """Identifiants cibles d'un attribut Relationship (objet NGSI-LD ou chaîne)"""
+    values = value if isinstance(value, list) else [value]
+    for v in values:
+        if isinstance(v, dict) and "object" in v:
+            objects = v["object"]
+            yield from (objects if isinstance(objects, list) else [objects])
+        elif isinstance(v, str):
+            yield v
+
+
+def property_values(value):
+    """Valeurs d'un attribut Property (objet NGSI-LD ou valeur brute)"""
+    values = value if isinstance(value, list) else [value]
+    for v in values:
+        yield v["value"] if isinstance(v, dict) and "value" in v else v
+
+
+class EntityIngestor:
+    """Crée les individus et leurs propriétés entité par entité.
+
+    Les relations vers une entité pas encore vue sont rangées dans une table de références
+    en attente, résolue dès que la cible arrive (ou à finish()) : la mémoire utilisée dépend
+    du nombre de références non résolues, pas de la taille du fichier.
+    """
+
+    def __init__(self, world, context, ontologies=None, target_ontology=None):
+        self.world = world
+        self.context = compile_context(context, ontologies)
+        self.target_ontology = target_ontology
+        self.properties = get_property_index(world)
+        self.pending = {}       # id de l'entité cible -> [(IRI du sujet, nom de la propriété)]
+        self.touched = set()    # ontologies modifiées
+        self.count = 0
+
+    # --- résolution ---
+    def ontology_for_class(self, class_iri):
+        if self.target_ontology is not None:
+            return self.target_ontology
+        onto = self.context.ontology_for(class_iri)
+        if onto is None:
+            raise ValueError(f"Aucune ontologie trouvée pour l'IRI {class_iri}")
+        return onto
+
+    def get_class(self, type_name, onto):
+        """Classe du contexte, créée dans onto si elle n'existe pas encore"""
+        class_iri = self.context.expand(type_name)
+        cls = self.world[class_iri] if class_iri else None
+        if cls is None:
+            with onto:
+                cls = types.new_class(type_name, (Thing,))
+                if class_iri:
+                    cls.iri = class_iri
+        return cls
+
+    def find_individual(self, entity_id):
+        """Individu déjà créé pour un identifiant NGSI-LD (urn:ngsi-ld:<Type>:<nom>), ou None"""
+        parts = entity_id.split(":")
+        if len(parts) >= 4 and parts[0] == "urn":
+            class_iri = self.context.expand(parts[-2])
+            onto = self.target_ontology or (self.context.ontology_for(class_iri) if class_iri else None)
+        else:
+            onto = self.target_ontology
+        if onto is None:
+            return None
+        # seulement un individu : une classe ou une propriété de même nom n'est pas une cible
+        found = self.world[onto.base_iri + instance_name(entity_id)]
+        return found if isinstance(found, Thing) else None
+
+    # --- ingestion ---
+    def add(self, entity):
+        """Crée l'individu d'une entité puis ses propriétés ; retourne l'individu"""
+        entity_id = entity["id"]
+        names = entity_types(entity)
+        main_cls_iri = self.context.expand(names[0])
+        onto = self.ontology_for_class(main_cls_iri or names[0])
+
+        with onto:
+            inst = self.get_class(names[0], onto)(instance_name(entity_id))
+            for additional in names[1:]:
+                inst.is_a.append(self.get_class(additional, onto))
+        self.touched.add(onto)
+        self.count += 1
+
+        # Références en attente vers cette entité
+        for subject_iri, prop_name in self.pending.pop(entity_id, ()):
+            getattr(self.world[subject_iri], prop_name).append(inst)
+
+        self.add_properties(entity, inst)
+        return inst
+
+    def add_properties(self, entity, inst):
+        for prop_name, prop_value in entity.items():
+            if prop_name in IGNORED_KEYS:
+                continue
+            kind = self.properties.kind(prop_name)
+            try:
+                if kind == "object":
+                    for target_id in relationship_targets(prop_value):
+                        target = self.find_individual(target_id)
+                        if target is None:
+                            self.pending.setdefault(target_id, []).append((inst.iri, prop_name))
+                        else:
+                            getattr(inst, prop_name).append(target)
+                elif kind == "data":
+                    for v in property_values(prop_value):
+                        getattr(inst, prop_name).append(v)
+            except Exception as e:
+                print(f"🔥 Erreur avec '{prop_name}' sur '{entity['id']}': {e}")
+
+    def upsert(self, entity):
+        """Crée l'individu, ou remplace les valeurs des attributs présents dans l'entité (mise à jour NGSI-LD).
+
+        Les attributs absents de l'entité sont conservés ; un attribut dont les valeurs n'ont pas
+        changé n'est pas réécrit (aucun triplet ajouté, donc rien à ré-évaluer).
+        """
+        inst = self.find_individual(entity["id"])
+        if inst is None:
+            return self.add(entity)
+
+        onto = inst.namespace.ontology
+        with onto:
+            for name in entity_types(entity):
+                cls = self.get_class(name, onto)
+                if cls not in inst.is_a:
+                    inst.is_a.append(cls)
+        self.touched.add(onto)
+        self.count += 1
+        self.replace_properties(entity, inst)
+        return inst
+
+    def replace_properties(self, entity, inst):
+        for prop_name, prop_value in entity.items():
+            if prop_name in IGNORED_KEYS:
+                continue
+            prop = self.properties.resolve(prop_name)
+            kind = self.properties.kind(prop_name)
+            try:
+                if kind == "object":
+                    values = []
+                    for target_id in relationship_targets(prop_value):
+                        target = self.find_individual(target_id)
+                        if target is None:
+                            self.pending.setdefault(target_id, []).append((inst.iri, prop_name))
+                        else:
+                            values.append(target)
+                elif kind == "data":
+                    values = list(property_values(prop_value))
+                else:
+                    continue
+                if list(prop[inst]) != values:
+                    prop[inst] = values
+            except Exception as e:
+                print(f"🔥 Erreur avec '{prop_name}' sur '{entity['id']}': {e}")
+
+    def finish(self):
+        """Résout les dernières références en attente ; retourne celles dont la cible n'existe pas"""
+        unresolved = {}
+        for target_id, refs in self.pending.items():
+            target = self.find_individual(target_id)
+            for subject_iri, prop_name in refs:
+                if target is None:
+                    unresolved.setdefault(target_id, []).append((subject_iri, prop_name))
+                else:
+                    getattr(self.world[subject_iri], prop_name).append(target)
+        self.pending = {}
+        for target_id, refs in unresolved.items():
+            print(f"[Avertissement] Cible introuvable {target_id} ({len(refs)} relation(s))")
+        return unresolved
+
+
+def ingest_ngsi_ld_stream(path, world, ontologies=None, target_ontology=None, context=None,
+                          write_back=None, ontology_files=None, chunk_size=1 << 16):
+    """Ingestion en flux d'un fichier NGSI-LD : les instances sont créées au fil de la lecture de @graph.
+
+    Les ontologies dont les triplets ont changé sont marquées dans write_back (fichier :
+    ontology_files[IRI de base], ou le fichier déjà suivi par write_back). Retourne l'ingesteur
+    (compteurs, références non résolues).
+    """
+    versions = {onto: version(onto) for onto in world.ontologies.values()}
+    with open(path, "r") as f:
+        reader = NgsiLdStreamReader(f, chunk_size)
+        ingestor = None
+        for entity in reader:
+            if ingestor is None:
+                if context is None and reader.context is None:
+                    raise ValueError(f"{path} : @context doit précéder @graph pour l'ingestion en flux")
+                ingestor = EntityIngestor(world, context if context is not None else reader.context,
+                                          ontologies, target_ontology)
+            ingestor.add(entity)
+
+    if ingestor is None:
+        return None
+    ingestor.unresolved = ingestor.finish()
+    if write_back is not None:
+        files = ontology_files or {}
+        for onto in ingestor.touched:
+            if onto in versions and version(onto) == versions[onto]:
+                continue
+            file = files.get(onto.base_iri)
+            if file:
+                write_back.mark_dirty(onto, file)
+            else:
+                write_back.mark_dirty(onto)
+    return ingestor
@@ -0,0 +1,171 @@
+import json
+import types
+
+from owlready2 import Thing, locstr
+from owlready2.base import rdf_type, owl_named_individual, to_literal, from_literal, _universal_iri_2_abbrev
+
+from bulk_loader import BulkLoader
+from property_index import short_name
+
+
+class JsonLdLoader(BulkLoader):
+    """Import d'un document JSON-LD (@context à préfixes, @id/@type) directement en triplets dans le quadstore.
+
+    Le document est développé une seule fois : chaque nœud de @graph (et chaque nœud imbriqué doté d'un
+    @id) devient des lignes (sujet, prédicat, objet) insérées par lots comme dans BulkLoader, avec les
+    IRI du document (core:UR5 -> https://...core#UR5). Les termes absents du contexte sont ignorés comme
+    le prévoit JSON-LD (ex. "name"), ainsi que les propriétés inconnues du monde. Une chaîne associée à
+    une propriété d'objet est lue comme une référence (ex. "affordsTask": ["core:ScrewingTask"]).
+    """
+
+    def __init__(self, onto, context=None, ontologies=None, batch_size=5000):
+        # context : @context du document, compilé une fois (préfixes et termes)
+        super().__init__(onto, context or {}, ontologies, batch_size)
+        self.skipped = {}           # terme ignoré -> occurrences
+        self.unsupported = 0        # nœuds anonymes, @list, @context imbriqués
+
+    def _iri(self, term):
+        return self.context.expand(term)
+
+    def _skip(self, key):
+        self.skipped[key] = self.skipped.get(key, 0) + 1
+
+    # --- développement ---
+    def nodes(self, document):
+        """Nœuds à plat (dict avec @id) du document, imbriqués compris"""
+        if isinstance(document, list):
+            for item in document:
+                yield from self.nodes(item)
+            return
+        if not isinstance(document, dict):
+            return
+        if "@graph" in document:
+            yield from self.nodes(document["@graph"])
+            return
+        if "@id" not in document:
+            if any(not key.startswith("@") for key in document):
+                self.unsupported += 1   # nœud anonyme
+            return
+        if "@context" in document:
+            self.unsupported += 1
+        yield document
+        for key, value in document.items():
+            if not key.startswith("@"):
+                for v in value if isinstance(value, list) else [value]:
+                    if isinstance(v, dict) and "@id" in v and len(v) > 1:
+                        yield from self.nodes(v)
+
+    def _values(self, value):
+        for v in value if isinstance(value, list) else [value]:
+            if isinstance(v, dict) and "@list" in v:
+                self.unsupported += 1
+            elif isinstance(v, dict) and "@set" in v:
+                yield from self._values(v["@set"])
+            else:
+                yield v
+
+    def _literal(self, v):
+        if isinstance(v, dict):
+            value = v.get("@value")
+            if "@language" in v:
+                return to_literal(locstr(value, v["@language"]))
+            datatype = self._iri(v["@type"]) if "@type" in v else None
+            if datatype is not None and not isinstance(value, str):
+                value = str(value).lower() if isinstance(value, bool) else str(value)
+            if datatype is not None:
+                d = _universal_iri_2_abbrev.get(datatype)
+                if d is None:
+                    self._abbreviate_many([datatype])
+                    return value, self._storids[datatype]
+                o, _ = to_literal(from_literal(value, d))
+                return o, d
+            v = value
+        return to_literal(v)
+
+    def triples(self, node, iris):
+        """Triplets d'un nœud : (sujet, prédicat, objet IRI, None) ou (sujet, prédicat, valeur, type)"""
+        s = self._iri(node["@id"])
+        iris.append(s)
+        yield s, rdf_type, owl_named_individual, None
+        node_types = node.get("@type", [])
+        for type_term in node_types if isinstance(node_types, list) else [node_types]:
+            yield s, rdf_type, self._class_storid_iri(self._iri(type_term)), None
+        for key, value in node.items():
+            if key.startswith("@"):
+                continue
+            p_iri = self._iri(key)
+            if p_iri is None:
+                self._skip(key)
+                continue
+            p, kind = self._property(p_iri)
+            if kind not in ("object", "data"):
+                self._skip(key)
+                continue
+            for v in self._values(value):
+                if kind == "object":
+                    target = v.get("@id") if isinstance(v, dict) else v if isinstance(v, str) else None
+                    target_iri = self._iri(target) if target is not None else None
+                    if target_iri is None:
+                        self._skip(key)
+                        continue
+                    iris.append(target_iri)
+                    yield s, p, target_iri, None
+                else:
+                    o, d = self._literal(v)
+                    yield s, p, o, d
+
+    def _class_storid_iri(self, class_iri):
+        storid = self._classes.get(class_iri)
+        if storid is None:
+            cls = self.world[class_iri]
+            if cls is None:
+                print(f"[Avertissement] Classe {class_iri} absente du monde, créée dans {self.onto.base_iri}")
+                with self.onto:
+                    cls = types.new_class(short_name(class_iri), (Thing,))
+                    cls.iri = class_iri
+            storid = self._classes[class_iri] = cls.storid
+        return storid
+
+    # --- chargement ---
+    def load(self, document):
+        """Développe le document et charge ses triplets par lots ; retourne le nombre de nœuds"""
+        batch = []
+        for node in self.nodes(document):
+            batch.append(node)
+            if len(batch) >= self.batch_size:
+                self._load_nodes(batch)
+                batch = []
+        if batch:
+            self._load_nodes(batch)
+        self.graph.analyze()
+        for key, count in self.skipped.items():
+            print(f"[Avertissement] Terme JSON-LD '{key}' ignoré ({count} occurrence(s)) : absent du contexte ou du monde, ou valeur non conforme")
+        if self.unsupported:
+            print(f"[Avertissement] {self.unsupported} nœud(s) anonyme(s) ou @list non importé(s)")
+        return self.count
+
+    def _load_nodes(self, nodes):
+        iris, rows = [], []
+        for node in nodes:
+            rows.extend(self.triples(node, iris))
+        self._abbreviate_many(iris)
+        objs, datas = [], []
+        for s, p, o, d in rows:
+            s = self._storids[s]
+            if d is None:
+                objs.append((s, p, self._storids[o] if isinstance(o, str) else o))
+            else:
+                datas.append((s, p, o, d))
+        self._insert(objs, datas)
+        self.count += len(nodes)
+
+
+def load_jsonld(path, onto, ontologies=None, batch_size=5000):
+    """Importe un fichier JSON-LD (ex. screwing.jsonld) dans onto ; retourne le chargeur"""
+    with open(path, "r") as f:
+        document = json.load(f)
+    context = document.pop("@context", None) if isinstance(document, dict) else None
+    loader = JsonLdLoader(onto, context, ontologies, batch_size)
+    loader.load(document)
+    print(f"{loader.count} nœud(s) JSON-LD importé(s) depuis {path}")
+    return loader
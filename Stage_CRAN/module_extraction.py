@@ -0,0 +1,513 @@
+import hashlib
+import io
+import json
+
+from owlready2 import World
+from owlready2.base import (_universal_abbrev_2_iri, rdf_type, rdf_first, rdf_rest, rdf_nil, rdf_domain, rdf_range,
+                            rdfs_subclassof, rdfs_subpropertyof, rdfs_datatype, owl_class, owl_named_individual,
+                            owl_object_property, owl_data_property, owl_annotation_property, owl_ontology,
+                            owl_axiom, owl_thing, owl_nothing, owl_equivalentclass, owl_equivalentproperty,
+                            owl_equivalentindividual, owl_disjointwith, owl_propdisjointwith, owl_inverse_property,
+                            owl_propertychain, owl_disjointunion, owl_alldisjointclasses, owl_alldisjointproperties,
+                            owl_alldifferent, owl_members, owl_intersectionof, owl_unionof, owl_complementof,
+                            owl_onproperty, owl_onclass, owl_ondatarange, owl_cardinality, owl_min_cardinality,
+                            owl_max_cardinality, owl_bottomobjectproperty, owl_bottomdataproperty,
+                            SOME, ONLY, VALUE, HAS_SELF, EXACTLY, MIN, MAX, swrl_imp)
+from owlready2.namespace import CURRENT_NAMESPACES
+
+from incremental_reasoning import rule_nodes, ntriples_terms
+from reasoner_cache import (ReasonerCache, input_rows, resource_iris, canonical_lines, replay, reasoning_results,
+                            java_available, _target_ontology)
+from pipeline_trace import stage, count, sync_reasoner
+
+MODULE_CACHE_DIR = "onto/.cache/modules"
+MODULE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+MODULE_FORMAT = 1   # à incrémenter si le calcul du module ou le format des entrées change
+MODULE_ONTOLOGY = "http://locality-module/"
+
+_OWL = "http://www.w3.org/2002/07/owl#"
+_VOCABULARY_NAMESPACES = (_OWL, "http://www.w3.org/2000/01/rdf-schema#", "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+                          "http://www.w3.org/2001/XMLSchema#", "http://www.w3.org/2003/11/swrl",
+                          "http://www.lesfleursdunormal.fr/static/_downloads/owlready_ontology.owl#")
+_DECLARATIONS = {owl_class, owl_object_property, owl_data_property, owl_annotation_property, owl_named_individual,
+                 rdfs_datatype}
+_SUB_AXIOMS = {rdfs_subclassof, owl_equivalentclass, owl_disjointwith, owl_disjointunion, rdfs_subpropertyof,
+               owl_equivalentproperty, owl_propdisjointwith, owl_inverse_property, owl_propertychain,
+               rdf_domain, rdf_range}
+
+
+def _first(description, p):
+    values = description.get(p)
+    return values[0][0] if values else None
+
+
+class LocalityModule:
+    """Module extrait : N-Triples envoyés au raisonneur et statistiques"""
+
+    def __init__(self, ntriples, signature, axioms, tbox_axioms, cache):
+        self.ntriples = ntriples
+        self.signature = signature      # IRI des entités du module
+        self.axioms = axioms            # axiomes TBox retenus
+        self.tbox_axioms = tbox_axioms  # axiomes TBox de l'entrée (None si le module vient du cache)
+        self.cache = cache              # 'hit', 'miss' ou None sans cache
+
+
+class _Locality:
+    """Axiomes TBox de l'entrée et test de ⊥-localité.
+
+    Un axiome est local pour une signature Σ s'il reste vrai quand toutes les classes et propriétés
+    hors Σ sont vides : il n'apporte alors rien aux conséquences sur Σ. Les expressions sont
+    évaluées syntaxiquement à ⊥ (bot) ou à ⊤ (top) ; une construction inconnue n'est ni l'un ni
+    l'autre, ce qui rend l'axiome non local (il est conservé).
+    """
+
+    def __init__(self, world, rows, iris):
+        self.world = world
+        self.iris = iris
+        self.descriptions = {}  # nœud anonyme -> {prédicat: [(o, d)]}
+        self.rows_of = {}       # nœud anonyme -> triplets dont il est le sujet
+        for row in rows:
+            s, p, o, d = row
+            if s < 0:
+                self.descriptions.setdefault(s, {}).setdefault(p, []).append((o, d))
+                self.rows_of.setdefault(s, []).append(row)
+        self.datatypes = {s for s, p, o, d in rows if p == rdf_type and o == rdfs_datatype}
+        owl = {name: world._abbreviate(_OWL + name, False) for name in (
+            "ReflexiveProperty", "hasKey", "differentFrom", "sourceIndividual", "topObjectProperty",
+            "topDataProperty")}
+        self.reflexive = owl["ReflexiveProperty"]
+        self.has_key = owl["hasKey"]
+        self.assertion_predicates = {owl_equivalentindividual, owl["differentFrom"]}
+        self.negative_assertion = owl["sourceIndividual"]
+        self.top_properties = {owl["topObjectProperty"], owl["topDataProperty"]}
+        # Vocabulaire OWL / RDF / XSD / SWRL : jamais dans une signature
+        self.vocabulary = set(_universal_abbrev_2_iri)
+        self.vocabulary.update(x for x, iri in iris.items() if iri.startswith(_VOCABULARY_NAMESPACES))
+
+    # --- signature ---
+    def signature(self, rows):
+        entities = set()
+        for s, p, o, d in rows:
+            entities.add(p)
+            if s > 0:
+                entities.add(s)
+            if d is None and o > 0:
+                entities.add(o)
+        return entities - self.vocabulary
+
+    def tree(self, x, rows=None):
+        """Triplets qui décrivent le nœud anonyme x (expressions et listes imbriquées)"""
+        rows = [] if rows is None else rows
+        stack, seen = [x], set()
+        while stack:
+            b = stack.pop()
+            if not isinstance(b, int) or b >= 0 or b in seen:
+                continue
+            seen.add(b)
+            for row in self.rows_of.get(b, ()):
+                rows.append(row)
+                if row[3] is None and row[2] < 0:
+                    stack.append(row[2])
+        return rows
+
+    def items(self, node):
+        """Éléments d'une liste RDF"""
+        items, seen = [], set()
+        while node is not None and node != rdf_nil and node not in seen:
+            seen.add(node)
+            description = self.descriptions.get(node, {})
+            if rdf_first not in description:
+                break
+            items.append(_first(description, rdf_first))
+            node = _first(description, rdf_rest)
+        return items
+
+    # --- évaluation des expressions ---
+    def prop_bot(self, p, sig):
+        """La propriété (nommée ou inverse) est vide hors signature"""
+        if p is None:
+            return False
+        if p < 0:
+            return self.prop_bot(_first(self.descriptions.get(p, {}), owl_inverse_property), sig)
+        if p in (owl_bottomobjectproperty, owl_bottomdataproperty):
+            return True
+        return p not in sig and p not in self.top_properties and p not in self.vocabulary
+
+    def cardinality(self, description, predicates):
+        """(n, qualification) de la première restriction de cardinalité trouvée, sinon (None, None)"""
+        for p in predicates:
+            if p in description:
+                try:
+                    n = int(_first(description, p))
+                except (TypeError, ValueError):
+                    return None, None
+                return n, _first(description, owl_onclass) or _first(description, owl_ondatarange)
+        return None, None
+
+    def bot(self, x, sig):
+        if x is None:
+            return False
+        if x > 0:
+            if x == owl_nothing:
+                return True
+            return x not in sig and x not in self.datatypes and x not in self.vocabulary
+        description = self.descriptions.get(x, {})
+        if owl_intersectionof in description:
+            return any(self.bot(c, sig) for c in self.items(_first(description, owl_intersectionof)))
+        if owl_unionof in description:
+            return all(self.bot(c, sig) for c in self.items(_first(description, owl_unionof)))
+        if owl_complementof in description:
+            return self.top(_first(description, owl_complementof), sig)
+        if owl_onproperty in description:
+            prop_bot = self.prop_bot(_first(description, owl_onproperty), sig)
+            if SOME in description:
+                return prop_bot or self.bot(_first(description, SOME), sig)
+            if VALUE in description or HAS_SELF in description:
+                return prop_bot
+            n, filler = self.cardinality(description, (owl_min_cardinality, owl_cardinality, MIN, EXACTLY))
+            if n:
+                return prop_bot or self.bot(filler, sig)
+        return False
+
+    def top(self, x, sig):
+        if x is None:
+            return False
+        if x > 0:
+            return x == owl_thing
+        description = self.descriptions.get(x, {})
+        if owl_intersectionof in description:
+            return all(self.top(c, sig) for c in self.items(_first(description, owl_intersectionof)))
+        if owl_unionof in description:
+            return any(self.top(c, sig) for c in self.items(_first(description, owl_unionof)))
+        if owl_complementof in description:
+            return self.bot(_first(description, owl_complementof), sig)
+        if owl_onproperty in description:
+            prop_bot = self.prop_bot(_first(description, owl_onproperty), sig)
+            if ONLY in description:
+                return prop_bot or self.top(_first(description, ONLY), sig)
+            n, filler = self.cardinality(description, (owl_max_cardinality, MAX))
+            if n is not None:
+                return prop_bot or self.bot(filler, sig)
+            n, filler = self.cardinality(description, (owl_min_cardinality, MIN))
+            if n == 0:
+                return True
+            n, filler = self.cardinality(description, (owl_cardinality, EXACTLY))
+            if n == 0:
+                return prop_bot or self.bot(filler, sig)
+        return False
+
+    # --- axiomes ---
+    def is_local(self, s, p, o, sig):
+        """Localité de l'axiome (s p o) ; None si p n'est pas un prédicat d'axiome"""
+        if p == rdfs_subclassof:
+            return self.bot(s, sig) or self.top(o, sig)
+        if p == owl_equivalentclass:
+            return (self.bot(s, sig) and self.bot(o, sig)) or (self.top(s, sig) and self.top(o, sig))
+        if p == owl_disjointwith:
+            return self.bot(s, sig) or self.bot(o, sig)
+        if p == owl_disjointunion:
+            return self.bot(s, sig) and all(self.bot(c, sig) for c in self.items(o))
+        if p == self.has_key:
+            return self.bot(s, sig)
+        if p == rdfs_subpropertyof:
+            return self.prop_bot(s, sig)
+        if p == owl_propertychain:
+            return any(self.prop_bot(r, sig) for r in self.items(o))
+        if p in (owl_equivalentproperty, owl_inverse_property):
+            return self.prop_bot(s, sig) and self.prop_bot(o, sig)
+        if p == owl_propdisjointwith:
+            return self.prop_bot(s, sig) or self.prop_bot(o, sig)
+        if p in (rdf_domain, rdf_range):
+            return self.prop_bot(s, sig) or self.top(o, sig)
+        return None
+
+    def is_tbox(self, s, p, o, d):
+        """Triplet de sujet nommé qui porte un axiome TBox / RBox (sinon assertion, déclaration ou annotation)"""
+        if p in _SUB_AXIOMS or p == self.has_key:
+            return True
+        return p == rdf_type and d is None and o > 0 and o != owl_thing and o in self.vocabulary \
+            and o not in _DECLARATIONS and o != owl_ontology
+
+    def axioms(self, rows):
+        """Axiomes TBox : [(triplets, signature, test)] où test(sig) est vrai si l'axiome est local"""
+        axioms = []
+        referenced = {o for s, p, o, d in rows if d is None and o < 0}
+        for row in rows:
+            s, p, o, d = row
+            if s < 0:
+                continue
+            if p == rdf_type:
+                if o == self.reflexive:
+                    test = lambda sig: False
+                else:
+                    # Caractéristiques (fonctionnelle, transitive...) : locales si la propriété est hors signature
+                    test = lambda sig, s=s: s not in sig
+                axioms.append(([row], self.signature([row]), test))
+                continue
+            axiom_rows = self.tree(o, [row]) if d is None else [row]
+            axioms.append((axiom_rows, self.signature(axiom_rows),
+                           lambda sig, s=s, p=p, o=o: bool(self.is_local(s, p, o, sig))))
+        for b in self.descriptions:
+            if b in referenced:
+                continue
+            description = self.descriptions[b]
+            types = {o for o, d in description.get(rdf_type, ())}
+            if owl_axiom in types:
+                continue    # annotations d'axiomes
+            axiom_rows = self.tree(b)
+            axioms.append((axiom_rows, self.signature(axiom_rows), lambda sig, b=b: self.root_is_local(b, sig)))
+        return axioms
+
+    def root_is_local(self, b, sig):
+        """Axiome porté par un nœud anonyme racine (GCI, AllDisjointClasses, AllDisjointProperties)"""
+        description = self.descriptions[b]
+        types = {o for o, d in description.get(rdf_type, ())}
+        if owl_alldisjointclasses in types:
+            members = self.items(_first(description, owl_members))
+            return sum(1 for c in members if not self.bot(c, sig)) <= 1
+        if owl_alldisjointproperties in types:
+            members = self.items(_first(description, owl_members))
+            return sum(1 for r in members if not self.prop_bot(r, sig)) <= 1
+        # GCI : tous ses axiomes doivent être locaux ; un prédicat inconnu (hors vocabulaire) le rend non local
+        for p, values in description.items():
+            for o, d in values:
+                local = self.is_local(b, p, o, sig)
+                if local is False or (local is None and p not in self.vocabulary):
+                    return False
+        return True
+
+    def is_assertion_root(self, b):
+        """Nœud anonyme racine qui porte une assertion (AllDifferent, assertion négative de propriété)"""
+        description = self.descriptions.get(b, {})
+        types = {o for o, d in description.get(rdf_type, ())}
+        return owl_alldifferent in types or self.negative_assertion in description
+
+    def split(self, rows, annotation_properties):
+        """Sépare l'entrée en (assertions et règles : graine du module, triplets TBox)"""
+        rules = {s for s, p, o, d in rows if p == rdf_type and o == swrl_imp}
+        nodes = rule_nodes(self.world, rules) if rules else set()
+        referenced = {o for s, p, o, d in rows if d is None and o < 0}
+        seed, seed_nodes, tbox = [], set(), []
+        for row in rows:
+            s, p, o, d = row
+            if s in nodes:
+                seed.append(row)
+            elif s < 0:
+                if s not in referenced and self.is_assertion_root(s):
+                    seed_nodes.add(s)
+            elif self.is_tbox(s, p, o, d):
+                tbox.append(row)
+            elif p == rdf_type:
+                if d is None and (o < 0 or o == owl_thing or o not in self.vocabulary):
+                    seed.append(row)        # assertion de classe
+                elif o == rdfs_datatype:
+                    tbox.append(row)
+            elif p in self.assertion_predicates or not (p in self.vocabulary or p in annotation_properties):
+                seed.append(row)            # assertion de propriété (objet ou donnée), sameAs, differentFrom
+        # Expressions des assertions de classe, AllDifferent et assertions négatives
+        for s, p, o, d in list(seed):
+            if d is None and o < 0 and s not in nodes:
+                seed_nodes.add(o)
+        seed_blank = set()
+        for b in seed_nodes:
+            for row in self.tree(b):
+                seed_blank.add(row[0])
+                seed.append(row)
+        tbox += [row for row in rows if row[0] < 0 and row[0] not in nodes and row[0] not in seed_blank]
+        return seed, tbox, nodes
+
+
+class ModuleCache(ReasonerCache):
+    """Modules indexés par signature et par TBox d'entrée (mêmes fichiers JSON et éviction LRU que ReasonerCache)"""
+
+    def __init__(self, cache_dir=MODULE_CACHE_DIR, max_bytes=MODULE_CACHE_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+
+class ModuleExtractor:
+    """Module de localité (⊥-module syntaxique) de l'entrée de sync_reasoner.
+
+    La graine est la signature des assertions (ABox) et des règles SWRL, toujours envoyées ; les
+    axiomes TBox ne sont gardés que s'ils ne sont pas locaux pour la signature, qui s'agrandit de
+    celle des axiomes gardés jusqu'au point fixe. Le module a les mêmes conséquences que l'entrée
+    sur sa signature (types des individus, valeurs de propriétés, hiérarchie de ses classes) ; les
+    classes qui n'en font pas partie ne sont pas classées. Le module ne dépend que des entités de la
+    graine citées par la TBox : il est mis en cache sous cette signature et le contenu de la TBox.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache      # ModuleCache, optionnel
+
+    def extract(self, ontologies):
+        """Module des ontologies (comme sync_reasoner, sans leurs imports) ; retourne un LocalityModule"""
+        ontologies = list(ontologies)
+        world = ontologies[0].world
+        graph = world.graph
+        rows = input_rows(ontologies)
+        iris = resource_iris(graph)
+        locality = _Locality(world, rows, iris)
+        annotation_properties = {s for (s,) in graph.execute(
+            "SELECT s FROM objs WHERE p=? AND o=?", (rdf_type, owl_annotation_property))}
+        seed, tbox, nodes = locality.split(rows, annotation_properties)
+        seed_signature = locality.signature(seed) - nodes
+        key_signature = seed_signature & locality.signature(tbox)
+
+        key = entry = None
+        if self.cache is not None:
+            digest = hashlib.sha256()
+            digest.update(json.dumps({"format": MODULE_FORMAT, "signature": sorted(iris.get(x, str(x))
+                                      for x in key_signature)}).encode("utf-8"))
+            for line in canonical_lines(tbox, iris):
+                digest.update(line.encode("utf-8"))
+                digest.update(b"\n")
+            key = digest.hexdigest()
+            entry = self.cache.load(key)
+        result = None if self.cache is None else "hit" if entry is not None else "miss"
+
+        tbox_axioms = None
+        if entry is None:
+            axioms = locality.axioms(tbox)
+            tbox_axioms = len(axioms)
+            kept, signature = self.fixpoint(axioms, key_signature)
+            node, literal = ntriples_terms(world, blank="m")
+            lines = []
+            for i in kept:
+                for s, p, o, d in axioms[i][0]:
+                    lines.append(f"{node(s)} {node(p)} {node(o) if d is None else literal(o, d)} .")
+            entry = {"signature": sorted(iris.get(x) or world._unabbreviate(x) for x in signature),
+                     "lines": list(dict.fromkeys(lines)), "axioms": len(kept)}
+            if self.cache is not None:
+                self.cache.store(key, entry)
+
+        node, literal = ntriples_terms(world)
+        lines = [f"{node(s)} {node(p)} {node(o) if d is None else literal(o, d)} ." for s, p, o, d in seed]
+        lines += entry["lines"]
+        signature = seed_signature | {storid for storid in (world._abbreviate(iri, False) for iri in entry["signature"])
+                                      if storid is not None}
+        lines += self.declarations(world, signature - nodes)
+        return LocalityModule("\n".join(dict.fromkeys(lines)) + "\n", {world._unabbreviate(x) for x in signature},
+                              entry["axioms"], tbox_axioms, result)
+
+    def fixpoint(self, axioms, signature):
+        """Indices des axiomes non locaux (point fixe) et signature du module"""
+        signature = set(signature)
+        index = {}
+        for i, (_, entities, _) in enumerate(axioms):
+            for entity in entities:
+                index.setdefault(entity, []).append(i)
+        kept, pending = set(), list(range(len(axioms)))
+        while pending:
+            i = pending.pop()
+            if i in kept:
+                continue
+            _, entities, is_local = axioms[i]
+            if is_local(signature):
+                continue
+            kept.add(i)
+            # Seuls les axiomes qui citent une entité nouvelle peuvent cesser d'être locaux
+            for entity in entities - signature:
+                signature.add(entity)
+                pending.extend(index[entity])
+        return sorted(kept), signature
+
+    def declarations(self, world, entities):
+        """Déclarations (toutes ontologies du monde) des entités du module"""
+        graph = world.graph
+        node, _ = ntriples_terms(world)
+        entities, lines = list(entities), []
+        types = ",".join(str(t) for t in _DECLARATIONS)
+        for i in range(0, len(entities), 500):
+            chunk = entities[i:i + 500]
+            for s, o in graph.execute(
+                    f"SELECT DISTINCT s, o FROM objs WHERE p=? AND o IN ({types}) "
+                    f"AND s IN ({','.join('?' * len(chunk))})", (rdf_type, *chunk)):
+                lines.append(f"{node(s)} {node(rdf_type)} {node(o)} .")
+        return lines
+
+    def sync_reasoner(self, ontologies, cache=None, infer_property_values=True,
+                      ignore_unsupported_datatypes=True, debug=1):
+        """sync_reasoner sur le module des ontologies ; les résultats complets du raisonneur (voir
+        reasoner_cache.recorded_results) sont appliqués à leur monde, comme sync_reasoner l'aurait fait.
+
+        cache (ReasonerCache) met en cache le raisonnement sur le module ; retourne alors 'hit' ou 'miss'.
+        """
+        ontologies = list(ontologies)
+        world = ontologies[0].world
+        target = _target_ontology(world)
+        with stage("module_extraction"):
+            module = self.extract(ontologies)
+        count("module_axioms", module.axioms)
+        if module.cache is not None:
+            count("module_cache_" + module.cache)
+
+        # Le monde temporaire et ses inférences sont créés hors du bloc with courant (ontologie cible de target)
+        token = CURRENT_NAMESPACES.set(None)
+        try:
+            entry, result = self.reason_module(module, cache, infer_property_values, ignore_unsupported_datatypes, debug)
+        finally:
+            CURRENT_NAMESPACES.reset(token)
+        replay(world, target, entry, debug)
+        return result
+
+    def reason_module(self, module, cache=None, infer_property_values=True,
+                      ignore_unsupported_datatypes=True, debug=1):
+        """Raisonne sur le module dans un monde temporaire ; retourne (résultats complets en IRI, 'hit' / 'miss' / None)"""
+        scratch = World()
+        try:
+            onto = scratch.get_ontology(MODULE_ONTOLOGY)
+            onto.load(fileobj=io.BytesIO(module.ntriples.encode("utf-8")), format="ntriples")
+            return reasoning_results([onto], cache, infer_property_values, ignore_unsupported_datatypes, debug)
+        finally:
+            scratch.close()
+
+
+def reasoned_state(ontologies):
+    """{IRI d'individu: (types nommés, relations objet)} après raisonnement, pour comparer deux mondes"""
+    world = ontologies[0].world
+    state = {}
+    for inst in world.individuals():
+        types = sorted(c.iri for c in inst.is_a if hasattr(c, "iri"))
+        relations = sorted((prop.iri, value.iri) for prop in inst.get_properties()
+                           for value in prop[inst] if hasattr(value, "iri"))
+        state[inst.iri] = (types, relations)
+    return state
+
+
+def check_module_equivalence(build, debug=0):
+    """Compare le raisonnement sur le module à sync_reasoner sur l'entrée complète.
+
+    build() crée un monde neuf et retourne ses ontologies (appelé une fois par raisonnement) ;
+    types et relations de tous les individus doivent concorder. Nécessite Java, ignoré sinon.
+    Retourne True si tout concorde, None sans Java.
+    """
+    if not java_available():
+        print("[Avertissement] Java introuvable : comparaison module / entrée complète ignorée")
+        return None
+    ontologies = build()
+    sync_reasoner(ontologies, infer_property_values=True, ignore_unsupported_datatypes=True, debug=debug)
+    full = reasoned_state(ontologies)
+    ontologies = build()
+    ModuleExtractor().sync_reasoner(ontologies, debug=debug)
+    modular = reasoned_state(ontologies)
+
+    differences = sorted(iri for iri in full.keys() | modular.keys() if full.get(iri) != modular.get(iri))
+    for iri in differences:
+        print(f"[Module] {iri} : entrée complète {full.get(iri)}, module {modular.get(iri)}")
+    print(f"[Module] {len(full)} individu(s), {len(differences)} différence(s)")
+    return not differences
+
+
+if __name__ == "__main__":
+    import os
+    from swrl_engine import fixture_world
+
+    # Monde de test des règles (swrl_engine), puis l'ontologie produite par script.py si elle existe
+    ok = check_module_equivalence(lambda: [fixture_world()[1]])
+    if ok is not None and os.path.exists("onto/main.owl"):
+        from ontology_cache import load_base_ontologies
+
+        def main_ontology():
+            world, _ = load_base_ontologies()
+            return [world.get_ontology("onto/main.owl").load()]
+        ok = check_module_equivalence(main_ontology) and ok
+    raise SystemExit(1 if ok is False else 0)
@@ -0,0 +1,238 @@
+import heapq
+import itertools
+
+from owlready2 import ThingClass
+from owlready2.base import (rdf_type, rdfs_subclassof, owl_class, owl_named_individual, owl_object_property,
+                            owl_data_property, owl_inverse_property, from_literal)
+
+from context_resolver import ETSI_CORE_CONTEXT, FIWARE_CONTEXT
+
+
+def iri_name(iri):
+    """Nom court d'un IRI, découpé comme owlready2 (après le dernier '#', sinon le dernier '/')"""
+    for sep in ("#", "/", ":"):
+        if sep in iri:
+            return iri.rsplit(sep, 1)[1]
+    return iri
+
+
+class NgsiLdExporter:
+    """Export NGSI-LD des individus d'une ontologie par parcours ordonné du quadstore.
+
+    Les triplets des individus sont lus en une passe triée par sujet (objs et datas fusionnés), puis
+    chaque entité est construite à partir de son groupe de lignes : le coût est linéaire en nombre de
+    triplets, au lieu d'une requête prop[inst] par couple (individu, propriété). L'URN et le premier
+    type déclaré de chaque individu sont mémorisés.
+
+    Comme l'export d'origine, seules les propriétés déclarées dans l'ontologie sont exportées
+    (all_properties=True pour toutes celles du monde) et les valeurs inférées sont comprises.
+    """
+
+    def __init__(self, onto, all_properties=False):
+        self.onto = onto
+        self.world = onto.world
+        self.graph = onto.world.graph
+        self.iris = {}          # storid -> IRI
+        self.first_types = {}   # storid d'individu -> nom du premier type déclaré
+        self.class_names = {}   # storid -> nom de classe, ou None si ce n'est pas une classe
+        self.main_classes = {}  # nom du type principal -> storid de la classe
+        self.object_props = self._declared(owl_object_property, all_properties)
+        self.data_props = self._declared(owl_data_property, all_properties)
+        self.order = {p: i for i, p in enumerate(itertools.chain(self.object_props, self.data_props))}
+        # propriété inverse -> propriété exportée dont elle donne les valeurs (sujet et objet échangés)
+        self.inverses = {}
+        for p in self.object_props:
+            for (q,) in self.graph.execute(
+                    "SELECT o FROM objs WHERE s=? AND p=? UNION SELECT s FROM objs WHERE o=? AND p=?",
+                    (p, owl_inverse_property, p, owl_inverse_property)):
+                if q > 0:
+                    self.inverses.setdefault(q, []).append(p)
+
+    def _declared(self, kind, all_properties):
+        if all_properties:
+            rows = self.graph.execute("SELECT DISTINCT s FROM objs WHERE p=? AND o=? ORDER BY s", (rdf_type, kind))
+        else:
+            rows = self.graph.execute("SELECT s FROM objs WHERE c=? AND p=? AND o=? ORDER BY s",
+                                      (self.onto.graph.c, rdf_type, kind))
+        return {s: iri_name(self._iri(s)) for (s,) in rows if s > 0}
+
+    # --- mémorisation ---
+    def _iri(self, storid):
+        iri = self.iris.get(storid)
+        if iri is None:
+            iri = self.iris[storid] = self.world._unabbreviate(storid)
+        return iri
+
+    def _class_name(self, storid):
+        if storid not in self.class_names:
+            entity = self.world._get_by_storid(storid) if storid > 0 else None
+            self.class_names[storid] = entity.name if isinstance(entity, ThingClass) else None
+        return self.class_names[storid]
+
+    def _types(self, type_storids):
+        names = []
+        for o in type_storids:
+            if o != owl_named_individual:
+                name = self._class_name(o)
+                if name is not None and name not in names:
+                    names.append(name)
+        return names
+
+    def first_declared_class(self, storid):
+        if storid not in self.first_types:
+            types = self._types(o for (o,) in self.graph.execute(
+                "SELECT o FROM objs WHERE s=? AND p=? ORDER BY rowid", (storid, rdf_type)))
+            self.first_types[storid] = types[0] if types else "Entity"
+        return self.first_types[storid]
+
+    def entity_id(self, storid):
+        """urn:ngsi-ld:<premier type déclaré>:<nom>"""
+        return f"urn:ngsi-ld:{self.first_declared_class(storid)}:{iri_name(self._iri(storid))}"
+
+    # --- parcours ---
+    def individuals(self, lo=None, hi=None):
+        """storids (triés) des individus de l'ontologie, éventuellement dans [lo, hi]"""
+        query = "SELECT s FROM objs WHERE c=? AND p=? AND o=? AND s>0"
+        args = [self.onto.graph.c, rdf_type, owl_named_individual]
+        if lo is not None:
+            query += " AND s>=? AND s<=?"
+            args += [lo, hi]
+        return [s for (s,) in self.graph.execute(query + " ORDER BY s", args)]
+
+    def main_type_classes(self):
+        """{type principal: storid de la classe} sans construire les entités (premier rdf:type de chaque individu)"""
+        rows = self.graph.execute("""
+            SELECT o FROM objs WHERE rowid IN (
+                SELECT MIN(rowid) FROM objs WHERE p=? AND o>0 AND o!=? AND s IN (
+                    SELECT s FROM objs WHERE c=? AND p=? AND o=? AND s>0)
+                GROUP BY s)
+            GROUP BY o ORDER BY MIN(s)""",
+            (rdf_type, owl_named_individual, self.onto.graph.c, rdf_type, owl_named_individual))
+        classes = {}
+        for (o,) in rows:
+            name = self._class_name(o)
+            if name is not None:
+                classes.setdefault(name, o)
+        return classes
+
+    def _rows(self, lo, hi):
+        """Lignes (sujet, ordre, prédicat, valeur) des individus, triées par sujet ; les lignes inverses sont retournées"""
+        subjects = "SELECT s FROM objs WHERE c=? AND p=? AND o=? AND s>0"
+        args = [self.onto.graph.c, rdf_type, owl_named_individual]
+        if lo is not None:
+            subjects += " AND s>=? AND s<=?"
+            args += [lo, hi]
+        objs = ((s, r, p, o) for s, p, o, r in self.graph.execute(
+            f"SELECT s, p, o, rowid FROM objs WHERE s IN ({subjects}) AND o>0 ORDER BY s, rowid", args))
+        datas = ((s, r, p, from_literal(o, d)) for s, p, o, d, r in self.graph.execute(
+            f"SELECT s, p, o, d, rowid FROM datas WHERE s IN ({subjects}) ORDER BY s, rowid", args))
+        streams = [objs, datas]
+        if self.inverses:
+            marks = ",".join("?" * len(self.inverses))
+            streams.append((o, r, (q, True), s) for s, q, o, r in self.graph.execute(
+                f"SELECT s, p, o, rowid FROM objs WHERE p IN ({marks}) AND s>0 AND o IN ({subjects}) ORDER BY o, rowid",
+                [*self.inverses, *args]))
+        return heapq.merge(*streams, key=lambda row: row[0])
+
+    def iter_entities(self, lo=None, hi=None):
+        """Entités NGSI-LD des individus de l'ontologie (dans [lo, hi] si donné), triées par storid"""
+        for s, rows in itertools.groupby(self._rows(lo, hi), key=lambda row: row[0]):
+            entity = self._build(s, list(rows))
+            if entity is not None:
+                yield entity
+
+    def _build(self, s, rows):
+        types, values = [], {}
+        for _, _, p, o in rows:
+            if p == rdf_type:
+                types.append(o)
+            elif isinstance(p, tuple):
+                for exported in self.inverses[p[0]]:
+                    values.setdefault(exported, []).append(o)
+            elif p in self.object_props or p in self.data_props:
+                values.setdefault(p, []).append(o)
+
+        names = self._types(types)
+        if not names:
+            return None
+        self.first_types[s] = names[0]
+        if names[0] not in self.main_classes:
+            self.main_classes[names[0]] = next(o for o in types if self.class_names.get(o) == names[0])
+
+        entity = {"id": self.entity_id(s), "type": names, "name": iri_name(self._iri(s))}
+        for p in sorted(values, key=self.order.get):
+            vals = list(dict.fromkeys(values[p]))
+            if p in self.object_props:
+                objects = [self.entity_id(o) for o in vals]
+                entity[self.object_props[p]] = {"type": "Relationship",
+                                                "object": objects[0] if len(objects) == 1 else objects}
+            else:
+                entity[self.data_props[p]] = {"type": "Property", "value": vals[0] if len(vals) == 1 else vals}
+        return entity
+
+    def export(self):
+        return list(self.iter_entities())
+
+
+def export_entities(onto, all_properties=False):
+    """Entités NGSI-LD de onto en une passe ; retourne (entités, exporteur)"""
+    exporter = NgsiLdExporter(onto, all_properties)
+    return exporter.export(), exporter
+
+
+def used_vocabulary(onto):
+    """Classes et propriétés de onto utilisées dans le monde : ({nom: IRI} des classes, {nom: IRI} des propriétés).
+
+    Une classe est utilisée si elle a au moins une instance, directe ou par une sous-classe (comme
+    cls.instances()) ; une propriété si au moins un triplet l'emploie, elle ou son inverse (ses valeurs
+    sont alors exportées). Deux requêtes d'agrégat en tout.
+    """
+    graph = onto.world.graph
+    c = onto.graph.c
+    classes = graph.execute(f"""
+        WITH RECURSIVE used(x) AS (
+            SELECT o FROM objs WHERE p={rdf_type} AND s>0 AND o>0 GROUP BY o
+            UNION SELECT objs.o FROM objs, used WHERE objs.s=used.x AND objs.p={rdfs_subclassof} AND objs.o>0)
+        SELECT resources.iri FROM used JOIN resources ON resources.storid=used.x
+        WHERE used.x IN (SELECT s FROM objs WHERE c=? AND p={rdf_type} AND o={owl_class})
+        ORDER BY resources.iri""", (c,))
+    properties = graph.execute(f"""
+        WITH used(p) AS (SELECT p FROM objs GROUP BY p UNION SELECT p FROM datas GROUP BY p),
+             with_inverses(p) AS (
+                SELECT p FROM used
+                UNION SELECT s FROM objs WHERE p={owl_inverse_property} AND o IN (SELECT p FROM used)
+                UNION SELECT o FROM objs WHERE p={owl_inverse_property} AND s IN (SELECT p FROM used))
+        SELECT resources.iri FROM with_inverses used
+        JOIN resources ON resources.storid=used.p
+        WHERE used.p IN (SELECT s FROM objs WHERE c=? AND p={rdf_type} AND o IN ({owl_object_property}, {owl_data_property}))
+        ORDER BY resources.iri""", (c,))
+    return ({iri_name(iri): iri for (iri,) in classes}, {iri_name(iri): iri for (iri,) in properties})
+
+
+def _prefix(namespace, taken):
+    base = "".join(ch for ch in namespace.rstrip("#/").rsplit("/", 1)[-1].lower() if ch.isalnum()) or "ns"
+    if base[0].isdigit():
+        base = "ns" + base
+    prefix, i = base, 1
+    while prefix in taken:
+        i += 1
+        prefix = f"{base}{i}"
+    return prefix
+
+
+def compact_context(onto, remote_contexts=(ETSI_CORE_CONTEXT, FIWARE_CONTEXT)):
+    """@context NGSI-LD en un seul objet : un préfixe par espace de noms, chaque terme en IRI compact"""
+    classes, properties = used_vocabulary(onto)
+    definitions, prefixes = {}, {}
+    for name, iri in itertools.chain(classes.items(), properties.items()):
+        namespace = iri[:len(iri) - len(name)]
+        if namespace not in prefixes:
+            prefixes[namespace] = _prefix(namespace, set(prefixes.values()))
+        compact = f"{prefixes[namespace]}:{name}"
+        if definitions.get(name, compact) != compact:
+            print(f"[Avertissement] Terme '{name}' défini dans plusieurs espaces de noms, {definitions[name]} conservé")
+            continue
+        definitions[name] = compact
+    local = {prefix: namespace for namespace, prefix in prefixes.items()}
+    local.update(definitions)
+    return {"@context": [*remote_contexts, local]}
@@ -0,0 +1,102 @@
+import json
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]}"
+
+
+class NgsiLdStreamReader:
+    """Lecture incrémentale d'un document NGSI-LD : les entités de @graph sont produites une à une.
+
+    Le document n'est jamais chargé en entier : seule l'entité en cours de décodage est en mémoire.
+    Les clés de premier niveau autres que @graph (dont @context) sont décodées normalement ;
+    @context doit donc précéder @graph pour être connu avant la première entité.
+    """
+
+    def __init__(self, fileobj, chunk_size=1 << 16):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.context = None
+        self.extra = {}
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    # --- tampon ---
+    def _fill(self):
+        chunk = self.fileobj.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos:
+            # On ne garde que la partie non consommée du tampon
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += chunk
+        return True
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars):
+        c = self._peek()
+        if c not in chars or not c:
+            raise ValueError(f"JSON NGSI-LD invalide : '{chars}' attendu, '{c}' trouvé")
+        self._pos += 1
+        return c
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Un nombre coupé en fin de tampon ("2." de "2.5") est décodé sans erreur :
+            # on attend de voir le délimiteur qui le suit
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self._buf) or self._buf[end] not in _DELIMITERS)
+                    and not self._eof and self._fill()):
+                continue
+            self._pos = end
+            return value
+
+    # --- structure ---
+    def _array(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def __iter__(self):
+        first = self._peek()
+        if first == "[":
+            yield from self._array()
+            return
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "@graph":
+                yield from self._array()
+            elif key == "@context":
+                self.context = self._value()
+            else:
+                self.extra[key] = self._value()
+            if self._expect(",}") == "}":
+                return
+
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RECEIVER_HOST = "127.0.0.1"
+RECEIVER_PORT = 8088
+BATCH_WINDOW = 0.05     # secondes d'attente après la première notification d'un lot
+MAX_BATCH = 1000        # entités par lot au plus
+
+_REASONS = {204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+def notification_entities(payload):
+    """Entités d'une notification NGSI-LD ({"type": "Notification", "data": [...]}), d'un tableau ou d'une entité"""
+    if isinstance(payload, list):
+        return [e for e in payload if isinstance(e, dict) and "id" in e]
+    if isinstance(payload, dict):
+        if "data" in payload:
+            return notification_entities(payload["data"])
+        if "id" in payload:
+            return [payload]
+    return []
+
+
+def coalesce(batch, entity):
+    """Fusionne une mise à jour dans le lot : un seul upsert par entité, les attributs les plus récents l'emportent"""
+    current = batch.get(entity["id"])
+    if current is None:
+        batch[entity["id"]] = dict(entity)
+    else:
+        current.update(entity)
+
+
+class NotificationReceiver:
+    """Service asyncio qui reçoit des notifications NGSI-LD (POST HTTP) et les applique au monde en mémoire.
+
+    Les entités reçues sont mises en file ; une tâche les regroupe en micro-lots (fenêtre de
+    batch_window secondes après la première, max_batch entités au plus, une entité notifiée
+    plusieurs fois n'est appliquée qu'une fois), applique chaque lot par upsert (valeurs remplacées)
+    puis relance le raisonnement incrémental : seules les règles dont le corps utilise un prédicat
+    modifié (ex. FallbackToCobot pour hasExecutionState) sont ré-évaluées.
+
+    Toutes les lectures et écritures du monde passent par un unique fil de travail ; la boucle
+    asyncio continue d'accepter les notifications pendant l'application d'un lot. Comme
+    IncrementalReasoner, les inférences sont monotones : une valeur remplacée ne retire pas les
+    faits déjà inférés à partir de l'ancienne.
+    """
+
+    def __init__(self, ingestor, reasoner, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH,
+                 on_batch=None, path="/notify"):
+        self.ingestor = ingestor
+        self.reasoner = reasoner
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.on_batch = on_batch    # on_batch(entités, mode de raisonnement), appelé dans le fil de travail
+        self.path = path
+        self.queue = None
+        self.stats = {"notifications": 0, "entities": 0, "batches": 0, "last_latency": None, "max_latency": 0.0}
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="world")
+        self._batches_task = None
+
+    # --- HTTP ---
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                method, target = request_line.decode("latin-1").split()[:2]
+                status = self._receive(method, target.split("?")[0], body)
+                writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Length: 0\r\n\r\n".encode("latin-1"))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _receive(self, method, path, body):
+        if path != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        try:
+            entities = notification_entities(json.loads(body))
+        except ValueError:
+            return 400
+        received = time.perf_counter()
+        for entity in entities:
+            self.queue.put_nowait((received, entity))
+        self.stats["notifications"] += 1
+        return 204
+
+    # --- micro-lots ---
+    async def _batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first, entity = await self.queue.get()
+            batch = {}
+            coalesce(batch, entity)
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    _, entity = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                coalesce(batch, entity)
+
+            try:
+                await loop.run_in_executor(self._executor, self.apply, list(batch.values()))
+            except Exception as e:
+                print(f"🔥 Erreur lors de l'application d'un lot de {len(batch)} entité(s) : {e}")
+                continue
+            latency = time.perf_counter() - first
+            self.stats["last_latency"] = latency
+            self.stats["max_latency"] = max(self.stats["max_latency"], latency)
+
+    def apply(self, entities):
+        """Applique un lot (dans le fil de travail) : upserts puis raisonnement incrémental ; retourne le mode"""
+        for entity in entities:
+            self.ingestor.upsert(entity)
+        mode = self.reasoner.reason()
+        self.stats["batches"] += 1
+        self.stats["entities"] += len(entities)
+        if self.on_batch is not None:
+            self.on_batch(entities, mode)
+        return mode
+
+    # --- cycle de vie ---
+    async def start(self, host=RECEIVER_HOST, port=RECEIVER_PORT):
+        """Raisonnement initial si nécessaire, puis écoute ; retourne le serveur asyncio"""
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        if self.reasoner.mark is None:
+            await loop.run_in_executor(self._executor, self.reasoner.reason)
+        self._batches_task = asyncio.create_task(self._batches())
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def stop(self, server):
+        server.close()
+        await server.wait_closed()
+        if self._batches_task is not None:
+            self._batches_task.cancel()
+        self._executor.shutdown(wait=True)
+
+    async def serve(self, host=RECEIVER_HOST, port=RECEIVER_PORT):
+        server = await self.start(host, port)
+        print(f"Réception des notifications NGSI-LD sur http://{host}:{port}{self.path}")
+        try:
+            await server.serve_forever()
+        finally:
+            await self.stop(server)
+
+
+async def send_notification(entities, host=RECEIVER_HOST, port=RECEIVER_PORT, path="/notify"):
+    """Envoie une notification NGSI-LD (remplaçant local d'un broker) ; retourne le code HTTP"""
+    body = json.dumps({"type": "Notification", "data": list(entities)}).encode("utf-8")
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+        status = await reader.readline()
+        return int(status.split()[1])
+    finally:
+        writer.close()
+
+
+def check_pending_fallback():
+    """Vérifie qu'une action repassée en attente par notification relance FallbackToCobot.
+
+    Monde de test en mémoire (règle de pipeline.register_execution_rules, canPerform posé
+    directement), raisonné par le moteur natif : sans Java. La mise à jour remplace
+    hasExecutionState (suppression puis insertion qui réutilise le rowid libéré) ; le raisonnement
+    incrémental doit la voir. Retourne True si la règle a bien été ré-évaluée.
+    """
+    from owlready2 import World, Thing, ObjectProperty, Imp
+    from ingestion import EntityIngestor
+    from incremental_reasoning import IncrementalReasoner, INFERENCES_ONTOLOGY
+    from swrl_engine import SwrlEngine
+
+    world = World()
+    # L'ontologie d'inférences existe déjà, comme après un premier raisonnement : la dernière ligne du
+    # quadstore est alors l'état de l'action, et son remplacement réutilise ce rowid
+    world.get_ontology(INFERENCES_ONTOLOGY)
+    onto = world.get_ontology("http://check-pending-fallback/")
+    with onto:
+        class Action(Thing): pass
+        class Agent(Thing): pass
+        class Operator(Agent): pass
+        class Cobot(Agent): pass
+        class ExecutionStateRegion(Thing): pass
+        class performedBy(ObjectProperty): pass
+        class canPerform(ObjectProperty): pass
+        class hasExecutionState(ObjectProperty): pass
+        ExecutionStateRegion("executionStatePending")
+        Imp(name="FallbackToCobot").set_as_rule("""
+            Action(?a) ^Operator(?op) ^performedBy(?a, ?op) ^
+            hasExecutionState(?a, executionStatePending) ^ Cobot(?co) ^
+            canPerform(?co, ?a) -> performedBy(?a, ?co)
+        """)
+
+    def state(name):
+        return {"type": "Relationship", "object": f"urn:ngsi-ld:ExecutionStateRegion:{name}"}
+
+    ingestor = EntityIngestor(world, {"@vocab": onto.base_iri}, target_ontology=onto)
+    for entity in [{"id": "urn:ngsi-ld:ExecutionStateRegion:executionStateActive", "type": "ExecutionStateRegion"},
+                   {"id": "urn:ngsi-ld:Operator:operator_1", "type": "Operator"},
+                   {"id": "urn:ngsi-ld:Cobot:ur5", "type": "Cobot",
+                    "canPerform": {"type": "Relationship", "object": "urn:ngsi-ld:Action:action_1"}},
+                   {"id": "urn:ngsi-ld:Action:action_1", "type": "Action",
+                    "performedBy": {"type": "Relationship", "object": "urn:ngsi-ld:Operator:operator_1"},
+                    "hasExecutionState": state("executionStateActive")}]:
+        ingestor.add(entity)
+
+    engine = SwrlEngine()
+    engine.run(world, list(onto.rules()))
+    reasoner = IncrementalReasoner([onto], evaluator=engine)
+    reasoner.mark_reasoned()
+    receiver = NotificationReceiver(ingestor, reasoner)
+    try:
+        mode = receiver.apply([{"id": "urn:ngsi-ld:Action:action_1", "type": "Action",
+                                "hasExecutionState": state("executionStatePending")}])
+    finally:
+        receiver._executor.shutdown()
+
+    action, cobot = onto.action_1, onto.ur5
+    fired = cobot in action.performedBy
+    print(f"[Vérification] Action en attente -> raisonnement {mode}, FallbackToCobot "
+          f"{'ré-évaluée' if fired else 'NON ré-évaluée'} (performedBy : {[a.name for a in action.performedBy]})")
+    return fired
+
+
+if __name__ == "__main__":
+    import sys
+    if "--check" in sys.argv[1:]:
+        raise SystemExit(0 if check_pending_fallback() else 1)
+
+    # Service de mise à jour en continu de l'ontologie produite par script.py
+    from ontology_cache import load_base_ontologies
+    from ingestion import EntityIngestor
+    from incremental_reasoning import IncrementalReasoner
+    from swrl_engine import SwrlEngine
+
+    world, ontologies = load_base_ontologies()
+    onto_main = world.get_ontology("onto/main.owl").load()
+    with open("screwing.json", "r") as f:
+        context = json.load(f).get("@context")
+    receiver = NotificationReceiver(EntityIngestor(world, context, ontologies, target_ontology=onto_main),
+                                    IncrementalReasoner([onto_main], evaluator=SwrlEngine()))
+    try:
+        asyncio.run(receiver.serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+from collections.abc import Mapping
+
+from owlready2 import World
+
+# Ontologies de base (IRI de base -> fichier local), dans l'ordre de chargement
+ONTOLOGY_FILES = {
+    "http://www.w3.org/ns/sosa#": "onto/sosa.rdf",
+    "http://www.w3.org/ns/ssn#": "onto/ssn.rdf",
+    "http://www.ease-crc.org/ont/SOMA.owl#": "onto/SOMA.owl",
+    "https://www.ai4c2ps.eu/ontologies/2024/core#": "onto/AI4C2PS-core.owl",
+    "https://www.ai4c2ps.eu/ontologies/2024/SysAgentOnto#": "onto/SysAgent.owl",
+    "https://www.ai4c2ps.eu/ontologies/2024/CognitionOntology#": "onto/CognitionOnto.owl",
+    "http://www.ontologydesignpatterns.org/ont/dul/DUL.owl#": "onto/DUL.owl"
+}
+
+CACHE_DIR = "onto/.cache"
+CACHE_FILE = os.path.join(CACHE_DIR, "base_world.sqlite3")
+
+
+def _manifest_path(cache_file):
+    return cache_file + ".manifest.json"
+
+
+def _read_manifest(cache_file):
+    try:
+        with open(_manifest_path(cache_file), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(cache_file, manifest):
+    tmp = _manifest_path(cache_file) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, _manifest_path(cache_file))
+
+
+def file_fingerprint(path, previous=None):
+    """Empreinte (mtime, taille, sha256) d'un fichier ; le hash n'est recalculé que si mtime ou taille ont changé"""
+    st = os.stat(path)
+    if previous and previous.get("mtime") == st.st_mtime_ns and previous.get("size") == st.st_size:
+        return previous
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"mtime": st.st_mtime_ns, "size": st.st_size, "sha256": digest.hexdigest()}
+
+
+def build_cache(files=ONTOLOGY_FILES, cache_file=CACHE_FILE):
+    """Parse les fichiers RDF/XML dans un quadstore SQLite neuf, remplacé de façon atomique"""
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    tmp = cache_file + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    world = World(filename=tmp)
+    for base_iri, path in files.items():
+        with open(path, "rb") as fileobj:
+            world.get_ontology(base_iri).load(fileobj=fileobj)
+    world.save()
+    world.close()
+    os.replace(tmp, cache_file)
+
+
+def open_cached_world(cache_file=CACHE_FILE):
+    """Ouvre le cache dans un monde en mémoire : les modifications du pipeline ne touchent jamais le fichier"""
+    memory = sqlite3.connect(":memory:", check_same_thread=False)
+    source = sqlite3.connect(f"file:{cache_file}?mode=ro", uri=True)
+    try:
+        source.backup(memory)
+    finally:
+        source.close()
+    return World(filename=cache_file, exclusive=False, connection=memory)
+
+
+def get_loaded_ontology(world, base_iri):
+    """Retrouve une ontologie du cache, y compris quand son IRI réel diffère de la clé (alias)"""
+    onto = world.ontologies.get(base_iri)
+    if onto is None:
+        row = world.graph.execute(
+            "SELECT iri FROM ontology_alias WHERE alias=?", (base_iri,)).fetchone()
+        onto = world.ontologies.get(row[0]) if row else world.get_ontology(base_iri)
+    return onto.load()
+
+
+def open_base_world(files=ONTOLOGY_FILES, cache_file=CACHE_FILE):
+    """Ouvre le monde des ontologies de base depuis le cache, reconstruit si un fichier source a changé.
+
+    Aucune ontologie n'est chargée : voir get_loaded_ontology, ou LazyOntologies.
+    """
+    manifest = _read_manifest(cache_file)
+    previous = manifest.get("files", {})
+    fingerprints = {path: file_fingerprint(path, previous.get(path)) for path in files.values()}
+
+    up_to_date = (
+        os.path.exists(cache_file)
+        and manifest.get("ontologies") == list(files)
+        and set(previous) == set(fingerprints)
+        and all(previous[p]["sha256"] == fp["sha256"] for p, fp in fingerprints.items())
+    )
+    if not up_to_date:
+        build_cache(files, cache_file)
+    if not up_to_date or previous != fingerprints:
+        # Un simple changement de mtime (fichier ré-enregistré à l'identique) ne reconstruit pas le cache
+        _write_manifest(cache_file, {"ontologies": list(files), "files": fingerprints})
+
+    return open_cached_world(cache_file)
+
+
+def load_base_ontologies(files=ONTOLOGY_FILES, cache_file=CACHE_FILE):
+    """Charge les ontologies de base depuis le cache, en le reconstruisant si un fichier source a changé"""
+    world = open_base_world(files, cache_file)
+    return world, {base_iri: get_loaded_ontology(world, base_iri) for base_iri in files}
+
+
+class LazyOntologies(Mapping):
+    """{IRI de base: ontologie} des ontologies de base, chargées au premier accès.
+
+    Le cache n'est ouvert qu'au premier accès à une ontologie (ou à world) ; parcourir les clés
+    (espaces de noms, ex. CompiledContext) ne charge rien.
+    """
+
+    def __init__(self, files=ONTOLOGY_FILES, cache_file=CACHE_FILE):
+        self.files = files
+        self.cache_file = cache_file
+        self._world = None
+        self._loaded = {}
+
+    @property
+    def world(self):
+        if self._world is None:
+            self._world = open_base_world(self.files, self.cache_file)
+        return self._world
+
+    def __getitem__(self, base_iri):
+        onto = self._loaded.get(base_iri)
+        if onto is None:
+            if base_iri not in self.files:
+                raise KeyError(base_iri)
+            onto = self._loaded[base_iri] = get_loaded_ontology(self.world, base_iri)
+        return onto
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def is_loaded(self, base_iri):
+        return base_iri in self._loaded
+
+    def load(self):
+        """Charge toutes les ontologies (comme load_base_ontologies) ; retourne le dictionnaire"""
+        return {base_iri: self[base_iri] for base_iri in self.files}
@@ -0,0 +1,88 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from owlready2 import World
+
+from ngsi_export import NgsiLdExporter
+
+_worker = None   # exporteur du processus de travail
+
+
+def persist_world(world, path):
+    """Copie le quadstore (inférences comprises) dans un fichier SQLite lisible par d'autres processus"""
+    world.graph.commit()
+    target = sqlite3.connect(path)
+    try:
+        world.graph.db.backup(target)
+    finally:
+        target.close()
+    return path
+
+
+def storid_shards(storids, count):
+    """Découpe des storids triés en au plus count intervalles [lo, hi] de tailles proches"""
+    if not storids:
+        return []
+    size = -(-len(storids) // count)
+    return [(storids[i], storids[min(i + size, len(storids)) - 1]) for i in range(0, len(storids), size)]
+
+
+def _init_worker(path, base_iri, all_properties):
+    global _worker
+    world = World(filename=path, exclusive=False, read_only=True)
+    _worker = NgsiLdExporter(world.get_ontology(base_iri), all_properties)
+
+
+def _export_shard(bounds):
+    """Entités d'un intervalle de storids, déjà sérialisées, et les types principaux rencontrés"""
+    texts = [_indent(json.dumps(entity, indent=2), 4) for entity in _worker.iter_entities(*bounds)]
+    return texts, _worker.main_classes
+
+
+def _indent(text, spaces):
+    """Décale les lignes suivantes d'un bloc JSON pour l'insérer dans un document indenté"""
+    return text.replace("\n", "\n" + " " * spaces)
+
+
+def parallel_export(onto, workers=None, shards_per_worker=4, all_properties=False):
+    """Export NGSI-LD par un pool de processus, chacun sur un intervalle de storids.
+
+    Le monde est d'abord copié dans un fichier SQLite temporaire que chaque processus ouvre en lecture seule.
+    Les intervalles sont fusionnés dans l'ordre des storids : le résultat ne dépend pas du nombre de
+    processus. Retourne (entités sérialisées, {type principal: storid de la classe}).
+    """
+    workers = workers or os.cpu_count() or 1
+    storids = NgsiLdExporter(onto, all_properties).individuals()
+    shards = storid_shards(storids, workers * shards_per_worker)
+
+    fd, path = tempfile.mkstemp(suffix=".sqlite3")
+    os.close(fd)
+    try:
+        persist_world(onto.world, path)
+        texts, main_classes = [], {}
+        # fork si possible : les scripts du projet s'exécutent au niveau module, sans garde __main__
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(path, onto.base_iri, all_properties)) as pool:
+            for shard_texts, shard_classes in pool.map(_export_shard, shards):
+                texts.extend(shard_texts)
+                for name, storid in shard_classes.items():
+                    main_classes.setdefault(name, storid)
+    finally:
+        os.remove(path)
+    return texts, main_classes
+
+
+def write_ngsi_ld_document(file, context, entity_texts, rules):
+    """Écrit {"context", "entities", "rules"} comme json.dump(..., indent=2), entités déjà sérialisées"""
+    with open(file, "w") as f:
+        f.write('{\n  "context": ' + _indent(json.dumps(context, indent=2), 2) + ',\n  "entities": [')
+        for i, text in enumerate(entity_texts):
+            f.write(("," if i else "") + "\n    " + text)
+        f.write("\n  ]," if entity_texts else "],")
+        f.write('\n  "rules": ' + _indent(json.dumps(rules, indent=2), 2) + "\n}")
@@ -0,0 +1,886 @@
+import argparse
+import json
+import os
+import sys
+import owlready2
+from owlready2 import *
+from ontology_cache import ONTOLOGY_FILES, LazyOntologies
+from property_index import get_property_index, report_ambiguous_properties
+from writeback import OntologyWriteBack
+from change_log import version
+from context_resolver import compile_context
+from ingestion import ingest_ngsi_ld_stream, relationship_targets, IGNORED_KEYS
+from bulk_loader import bulk_load_ngsi_ld
+from scenario_loader import load_scenario
+from jsonld_import import load_jsonld
+from incremental_reasoning import IncrementalReasoner
+from swrl_engine import SwrlEngine, check_equivalence
+from reasoner_cache import ReasonerCache, java_available
+from module_extraction import ModuleExtractor, ModuleCache
+from fingerprint_state import FingerprintState, fingerprint
+from tbox_extensions import extend_tbox
+import pipeline_trace
+from pipeline_trace import stage
+from OWLToJson import EXPORT_SOURCE, export_ontology
+
+# Ingestion en flux pour les très gros @graph : les instances sont créées au fil de la lecture
+# et la mémoire ne dépend que des références en attente (le contexte doit précéder @graph)
+# Fichier d'entrée (la variable d'environnement NGSI_LD_FILE le remplace, ex. pipeline_benchmark.py)
+NGSI_LD_FILE = os.environ.get("NGSI_LD_FILE", "screwing.json")
+STREAMING_INGESTION = False
+# Chargement massif en triplets dans l'ontologie principale (gros ABox), sans objet Python par entité
+BULK_INGESTION = False
+# Règles SWRL ré-évaluées en Python (semi-naïf) après le premier raisonnement HermiT, sans démarrer la JVM.
+# Désactivé tant que "pipeline.py check-rules" (comparaison avec HermiT sur les règles du pipeline) n'a pas
+# été passé avec Java ; le monde de test (swrl_engine.py --fixture) ne suffit pas
+NATIVE_RULE_ENGINE = False
+# Résultats du raisonnement complet rejoués depuis onto/.cache/reasoner quand l'entrée n'a pas changé
+REASONER_CACHE = True
+# Raisonnement complet sur le seul module de localité de l'ABox et des règles SWRL (axiomes TBox utiles à
+# leur signature), mis en cache par signature dans onto/.cache/modules
+MODULE_EXTRACTION = True
+# Ré-ingestion idempotente : les entités inchangées depuis le dernier passage (empreintes dans
+# onto/.cache/ingest_state.json) sont ignorées, les autres voient leurs valeurs remplacées
+UPSERT_INGESTION = True
+INGEST_STATE_FILE = "onto/.cache/ingest_state.json"
+# Scénario au format groupé (agents, objects, tools, dispositions, actions, tasks), ex. "pick&place.json",
+# chargé dans onto/main.owl par le même chemin massif que les entités NGSI-LD
+SCENARIO_FILE = None
+# Document JSON-LD (@context à préfixes, @graph), ex. "screwing.jsonld", importé directement en triplets
+JSONLD_FILE = None
+
+SSN = "http://www.w3.org/ns/ssn#"
+SOSA = "http://www.w3.org/ns/sosa#"
+SOMA = "http://www.ease-crc.org/ont/SOMA.owl#"
+CORE = "https://www.ai4c2ps.eu/ontologies/2024/core#"
+AGENT = "https://www.ai4c2ps.eu/ontologies/2024/SysAgentOnto#"
+COGNITION = "https://www.ai4c2ps.eu/ontologies/2024/CognitionOntology#"
+DUL = "http://www.ontologydesignpatterns.org/ont/dul/DUL.owl#"
+
+
+# 2. Trouver l'ontologie cible à partir du contexte
+def find_target_ontology(class_iri, context):
+    """Détermine l'ontologie cible (plus long espace de noms correspondant) à partir du contexte compilé"""
+    onto = context.ontology_for(class_iri)
+    if onto is None:
+        raise ValueError(f"Aucune ontologie trouvée pour l'IRI {class_iri}")
+    return onto
+def find_iri_in_context(context, term):
+    """Trouve l'IRI correspondant à un terme (ou à un IRI compact soma:, dul:...) dans le contexte compilé"""
+    return context.expand(term)
+    
+def get_source_ontology(inst, ontologies):
+    """Trouve l'ontologie source d'une instance"""
+    for base_iri, onto in ontologies.items():
+        # Compare les IRIs de base
+        if inst.iri.startswith(base_iri):
+            return onto
+    return None  # ou une ontologie par défaut si nécessaire
+# 3. Fonction d'instanciation principale
+def create_instances(world, graph_data, ontologies, context):
+    """Crée les instances dans les ontologies appropriées en utilisant le contexte"""
+    instances = {}
+    # Le contexte est compilé une seule fois (sans effet s'il l'est déjà)
+    context = compile_context(context, ontologies)
+    
+    for entity in graph_data:
+        entity_id = entity["id"]
+        entity_types = entity["type"] if isinstance(entity["type"], list) else [entity["type"]]
+        
+        # Trouver l'IRI complet de la classe principale via le contexte
+        main_type = entity_types[0]
+        class_iri = find_iri_in_context(context, main_type)
+        
+        # Trouver l'ontologie cible
+        onto_target = find_target_ontology(class_iri, context)
+        
+        with onto_target:
+            # Créer l'instance
+            instance_name = entity_id.split(":")[-1]
+            
+            # Vérifier si la classe existe
+            cls = None
+            try:
+                cls = world[class_iri]
+                
+            
+            except:
+                # Créer la classe si elle n'existe pas
+                cls = types.new_class(main_type, (Thing,))
+                cls.iri = class_iri
+    
+            inst = cls(instance_name)
+            instances[entity_id] = inst
+            
+            # Ajouter les types supplémentaires
+            for additional_type in entity_types[1:]:
+                additional_iri = find_iri_in_context(context, additional_type)
+                
+                # Créer la classe si nécessaire
+                if not world[additional_iri]:
+                    with onto_target:
+                        additional_cls = types.new_class(additional_type, (Thing,))
+                        additional_cls.iri = additional_iri
+                
+                if world[additional_iri] not in inst.is_a:
+                    inst.is_a.append(world[additional_iri])
+    
+    return instances
+
+def existing_instances(world, graph_data, context):
+    """Individus déjà présents pour des entités non modifiées (cibles des relations), sans les recréer"""
+    instances = {}
+    for entity in graph_data:
+        entity_types = entity["type"] if isinstance(entity["type"], list) else [entity["type"]]
+        class_iri = find_iri_in_context(context, entity_types[0])
+        onto_target = context.ontology_for(class_iri) if class_iri else None
+        inst = world[onto_target.base_iri + entity["id"].split(":")[-1]] if onto_target else None
+        if inst is not None:
+            instances[entity["id"]] = inst
+    return instances
+
+# 4. Fonction d'ajout des propriétés
+def add_properties(world, graph_data, instances, ontologies_dict, context, write_back, replace=False,
+                   previous_attributes=None):
+    """Ajoute les propriétés directement dans les fichiers locaux (écrits au flush de write_back).
+
+    replace=True : les valeurs de chaque propriété présente remplacent les valeurs existantes au lieu
+    de s'y ajouter (ré-ingestion sans doublons) ; les attributs de previous_attributes[id] (passage
+    précédent) absents de l'entité sont vidés.
+    """
+    # Vérifier que les ontologies sont chargées
+    if not ontologies_dict:
+       
+        return
+    
+    # Index nom -> propriété construit une seule fois pour le monde
+    property_index = get_property_index(world)
+    
+    # Traiter chaque entité
+    for entity in graph_data:
+        entity_id = entity["id"]
+        
+        # Extraire l'identifiant simple (dernière partie après '#' ou '/')
+        simple_id = entity_id.split("#")[-1] if "#" in entity_id else entity_id.split("/")[-1]
+        inst = instances.get(simple_id)
+        
+        if not inst:
+            continue
+        
+        # Trouver l'ontologie source et son fichier
+        source_ontology = None
+        file_path = None
+        
+        # 1. Essayer de trouver par IRI complet
+        for base_iri, onto in ontologies_dict.items():
+            if inst.iri.startswith(base_iri):
+                source_ontology = onto
+                file_path = ONTOLOGY_FILES.get(base_iri)
+                break
+        
+        # 2. Si non trouvé, essayer de trouver par fragment
+        
+        if not source_ontology:
+            for base_iri, onto in ontologies_dict.items():
+                if "#" + simple_id in inst.iri:
+                    source_ontology = onto
+                    file_path = ONTOLOGY_FILES.get(base_iri)
+                    break
+        
+        if not source_ontology or not file_path:
+            
+            continue
+        before = version(source_ontology)
+        
+        # Travailler dans le contexte de l'ontologie
+        with source_ontology:
+            # Trouver l'instance dans l'ontologie locale
+            local_inst = source_ontology.search(iri=inst.iri)
+            if not local_inst:
+               
+                continue
+            
+            local_inst = local_inst[0]
+            
+            # Attributs retirés depuis le passage précédent : valeurs supprimées
+            if replace and previous_attributes:
+                for prop_name in previous_attributes.get(entity_id, ()):
+                    prop_obj = property_index.resolve(prop_name)
+                    if prop_name not in entity and prop_obj is not None and list(prop_obj[local_inst]):
+                        prop_obj[local_inst] = []
+
+            # Traiter chaque propriété
+            for prop_name, prop_value in entity.items():
+                if prop_name in ["id", "type", "@context", "name"]:
+                    continue
+                
+                # Recherche la propriété dans l'ontologie
+                prop_obj = property_index.resolve(prop_name)
+                if prop_obj is None:
+                   
+                    continue
+                
+                try:
+                    # Normaliser les valeurs
+                    values = prop_value if isinstance(prop_value, list) else [prop_value]
+                    if replace:
+                        new_values = []
+                        add_value = new_values.append
+                    
+                    # Propriété d'objet (relation)
+                    if isinstance(prop_obj, ObjectPropertyClass):
+                        for v in values:
+                            target_id = None
+                            
+                            # Extraire l'ID de la cible
+                            if isinstance(v, dict) and "object" in v:
+                                target_id = v["object"]
+                            elif isinstance(v, str):
+                                target_id = v
+                            
+                            if not target_id:
+                                continue
+                            
+                            # Simplifier l'ID de la cible
+                            target_simple_id = target_id.split("#")[-1] if "#" in target_id else target_id.split("/")[-1]
+                            
+                            # Trouver l'instance cible
+                            target = instances.get(target_simple_id)
+                            if target:
+                                # Ajouter la relation
+                                if replace:
+                                    add_value(target)
+                                else:
+                                    getattr(local_inst, prop_name).append(target)
+                                
+                    
+                    # Propriété de données
+                    elif isinstance(prop_obj, DataPropertyClass):
+                        for v in values:
+                            # Extraire la valeur
+                            if isinstance(v, dict) and "value" in v:
+                                v = v["value"]
+                            
+                            # Ajouter la valeur
+                            if replace:
+                                add_value(v)
+                            else:
+                                getattr(local_inst, prop_name).append(v)
+                           
+                    
+                    # Remplacement : réécrit seulement si les valeurs diffèrent
+                    if replace and list(prop_obj[local_inst]) != new_values:
+                        prop_obj[local_inst] = new_values
+                
+                except Exception as e:
+                    print(f"🔥 Erreur avec '{prop_name}' sur '{entity_id}': {e}")
+        
+        # Marquer le fichier local à sauvegarder si l'entité l'a modifié (une seule écriture au flush)
+        if version(source_ontology) != before:
+            write_back.mark_dirty(source_ontology, file_path)
+
+
+def create_instances_ngsi_ld(world, graph_data, onto_main, context):
+    """Crée les instances dans les ontologies appropriées en utilisant le contexte"""
+    instances = {}
+    context = compile_context(context)
+    
+    for entity in graph_data:
+        entity_id = entity["id"]
+        entity_types = entity["type"] if isinstance(entity["type"], list) else [entity["type"]]
+        
+        # Trouver l'IRI complet de la classe principale via le contexte
+        main_type = entity_types[0]
+        class_iri = find_iri_in_context(context, main_type)
+        
+        
+        
+        with onto_main:
+            # Créer l'instance
+            instance_name = entity_id.split(":")[-1]
+            
+            # Vérifier si la classe existe
+            cls = None
+            try:
+                cls = onto_main.search_one(iri=class_iri)
+            except:
+                # Créer la classe si elle n'existe pas
+                cls = types.new_class(main_type, (Thing,))
+                
+                cls.iri = class_iri
+            
+            inst = cls(instance_name)
+            
+            instances[entity_id] = inst
+            
+            # Ajouter les types supplémentaires
+            for additional_type in entity_types[1:]:
+                additional_iri = find_iri_in_context(context, additional_type)
+                
+                # Créer la classe si nécessaire
+                if not  onto_main.search_one(iri=class_iri):
+                    with onto_main:
+                        additional_cls = types.new_class(additional_type, (Thing,))
+                        additional_cls.iri = additional_iri
+                
+                inst.is_a.append(world[additional_iri])
+    
+    # L'ontologie principale est sauvegardée au flush, après l'ajout des propriétés
+    return instances
+
+def add_properties_ngsi_ld(world, graph_data, instances, onto_main, context, write_back):
+    property_index = get_property_index(world)
+    
+    # Traiter chaque entité
+    for entity in graph_data:
+        entity_id = entity["id"]
+        
+        # Extraire l'identifiant simple (dernière partie après '#' ou '/')
+        simple_id = entity_id.split("#")[-1] if "#" in entity_id else entity_id.split("/")[-1]
+        inst = instances.get(simple_id)
+        
+        
+            
+            # Traiter chaque propriété
+        for prop_name, prop_value in entity.items():
+                if prop_name in ["id", "type", "@context", "name"]:
+                    continue
+                
+                # Recherche la propriété dans l'ontologie
+                prop_obj = property_index.resolve(prop_name)
+                if prop_obj is None:
+                   
+                    continue
+                
+                try:
+                    # Normaliser les valeurs
+                    values = prop_value if isinstance(prop_value, list) else [prop_value]
+                    
+                    # Propriété d'objet (relation)
+                    if isinstance(prop_obj, ObjectPropertyClass):
+                        for v in values:
+                            target_id = None
+                            
+                            # Extraire l'ID de la cible
+                            if isinstance(v, dict) and "object" in v:
+                                target_id = v["object"]
+                            elif isinstance(v, str):
+                                target_id = v
+                            
+                            if not target_id:
+                                continue
+                            
+                            # Simplifier l'ID de la cible
+                            target_simple_id = target_id.split("#")[-1] if "#" in target_id else target_id.split("/")[-1]
+                            
+                            # Trouver l'instance cible
+                            target = instances.get(target_simple_id)
+                            if target:
+                                # Ajouter la relation
+                                getattr(inst, prop_name).append(target)
+                                
+                    
+                    # Propriété de données
+                    elif isinstance(prop_obj, DataPropertyClass):
+                        for v in values:
+                            # Extraire la valeur
+                            if isinstance(v, dict) and "value" in v:
+                                v = v["value"]
+                            
+                            # Ajouter la valeur
+                            getattr(inst, prop_name).append(v)
+                           
+                
+                except Exception as e:
+                    print(f"🔥 Erreur avec '{prop_name}' sur '{entity_id}': {e}")
+        
+        # Marquer l'ontologie principale à sauvegarder (une seule écriture au flush)
+        write_back.mark_dirty(onto_main, "onto/main.owl")
+
+
+def create_modular_ontology(input_ontos, output_path):
+    """Crée une ontologie modulaire avec conservation de la provenance"""
+    # Créer une nouvelle ontologie principale
+    main_onto = get_ontology("http://www.ai4c2ps.eu/ontologies/2024/")
+    
+    # Dictionnaire pour suivre les mappings
+    class_mappings = {}
+    prop_mappings = {}
+    
+    # Charger et importer chaque ontologie
+    for prefix, path in input_ontos.items():
+        
+        onto = get_ontology(path).load()
+        
+        # Ajouter l'import
+        main_onto.imported_ontologies.append(onto)
+        with main_onto:
+            for cls in onto.classes():
+                # Créer un alias dans l'ontologie principale
+                
+                    # Créer une nouvelle classe qui hérite de la classe originale
+                    #new_cls = types.new_class(cls.name, (cls,))
+                    #class_mappings[cls.iri] = new_cls
+                    types.new_class(cls.name, (cls,))
+                    
+        
+        # Mapper les propriétés
+        for prop in onto.properties():
+            # Créer un alias dans l'ontologie principale
+            with main_onto:
+                if isinstance(prop, ObjectPropertyClass):
+                    new_prop = types.new_class(prop.name, (prop, ObjectProperty,))
+                elif isinstance(prop, DataPropertyClass):
+                    new_prop = types.new_class(prop.name, (prop, DataProperty,))
+                else:
+                    new_prop = types.new_class(prop.name, (prop, AnnotationProperty,))
+                
+                prop_mappings[prop.iri] = new_prop
+    
+   
+    main_onto.save(file=output_path)
+    return main_onto, class_mappings, prop_mappings
+
+
+def register_rules(onto_main):
+    """Règles SWRL du premier raisonnement (abilities des agents, ordre des actions et des sous-tâches)"""
+    with onto_main:
+        # Règle qui permet d'inférer qu'un agent a une ability
+        rule = Imp(name = "HasAbilityRule")  # nom interne pour la retrouver
+        rule.set_as_rule("""            
+            Capability(?ab) ^  Agent (?ag ) ^hasPart(?ag, ?tool) ^
+            hasDisposition(?tool, ?ab) ^ 
+            isDescribedBy(?ab, ?aff) ^ 
+            definesBearer(?aff, ?bear) ^ hasRole(?obj, ?bear) ^ 
+            definesTrigger(?aff, ?trig) ^ hasRole(?tool, ?trig) 
+            -> hasAbility(?ag, ?ab)
+        """)
+
+        # Règle qui permet d'inférer qu'une action suit une autre action
+        # en fonction de la relation "follows" entre les tâches associées
+        # et de l'exécution des tâches dans des actions spécifiques
+        # Cette règle est utile pour établir des dépendances entre les actions
+        # en fonction de l'ordre d'exécution des tâches
+        rule = Imp(name="FollowsActionRule")
+        rule.set_as_rule("""
+        Task(?t1) ^ Task(?t2) 
+        ^ follows(?t2, ?t1)
+        ^ isExecutedIn(?t1, ?a1)
+        ^ isExecutedIn(?t2, ?a2) 
+        -> follows(?a2, ?a1)
+    """)
+        # Règle qui permet d'inférer que si une tâche B suit une tâche A , la première sous-tâche de B suit la dernière sous-tâche de A
+        # Cette règle est utile pour établir des relations de dépendance entre les sous-tâches
+        # en fonction de l'ordre d'exécution des tâches
+        # et de la structure des sous-tâches
+        rule = Imp(name="FollowsPartRule")
+        rule.set_as_rule("""
+
+        Task(?A) ^ Task(?B) ^ directlyFollows(?B,?A) ^ hasPart(?A, ?lastA)
+        ^ isLastSubtask(?lastA, true) ^ hasPart(?B, ?firstB) ^ isFirstSubtask(?firstB, true)
+        -> directlyFollows(?firstB, ?lastA)
+
+        """)
+
+
+def rename_abilities(onto_main):
+    """Post-traitement : renomme les Capability déduites par HasAbilityRule (screwability -> canScrew)"""
+    # Trouver toutes les relations hasAbility créées par la règle
+    for agent, ability in onto_main.hasAbility.get_relations():
+        if isinstance(ability, onto_main.Capability):
+            # Générer un nouveau nom basé sur la Capability
+            cap_name = ability.name
+            new_name = f"can{cap_name.capitalize().replace('ability', '')}"
+
+            # Créer une nouvelle Ability avec le nom transformé
+            new_ability = onto_main.Ability(new_name)
+
+            # Transférer les relations
+            new_ability.is_a = ability.is_a
+            for prop in onto_main.object_properties():
+                for value in prop[ability]:
+                    prop[new_ability].append(value)
+
+            # Mettre à jour la relation
+            onto_main.hasAbility[agent].remove(ability)
+            onto_main.hasAbility[agent].append(new_ability)
+
+            # Supprimer l'ancienne Capability
+            destroy_entity(ability)
+
+
+def check_unique_numbers(onto_main):
+    """Signale les hasStepNumber et hasActionNumber non uniques"""
+    # Vérification unicité des hasStepNumber
+    step_numbers = set()
+    for task in onto_main.Task.instances():
+        for num in task.hasStepNumber:
+            if num in step_numbers:
+                print(f"[Erreur] Numéro de step non unique : {num}")
+            else:
+                step_numbers.add(num)
+
+    # Vérification unicité des hasActionNumber
+    action_numbers = set()
+    for action in onto_main.Action.instances():
+        for num in action.hasActionNumber:
+            if num in action_numbers:
+                print(f"[Erreur] Numéro d'action non unique : {num}")
+            else:
+                action_numbers.add(num)
+
+
+def register_execution_rules(onto_main):
+    """Règles SWRL du second raisonnement (actions exécutables par le cobot, reprise des actions en attente)"""
+    with onto_main:
+        # Règle qui permet de vérifier si le Cobot a les abilities requises pour exécuter une action
+        rule = Imp(name="CanPerformRule")
+        rule.set_as_rule("""
+
+             Task(?t) ^ requiresAbility(?t, ?ab) ^isExecutedIn(?t, ?a) 
+             ^Cobot(?co) ^hasAbility(?co, ?ab)
+            -> canPerform(?co, ?a)
+
+        """)
+
+
+        # Règle qui permet d'assigner ,au cobot , une action censée être faite par l'opérateur si ce dernier ne l'exécute  pas 
+        rule = Imp(name="FallbackToCobot")
+        rule.set_as_rule("""
+            Action(?a) ^Operator(?op) ^performedBy(?a, ?op) ^
+            hasExecutionState(?a, executionStatePending) ^ Cobot(?co) ^
+            canPerform(?co, ?a) -> performedBy(?a, ?co)
+        """)
+
+
+def order_subtasks(onto_main):
+    """Marque la première et la dernière sous-tâche de chaque tâche (isFirstSubtask / isLastSubtask)"""
+    for task in onto_main.Task.instances():
+        subtasks = list(task.hasPart)
+
+        if subtasks:
+            # Trier en convertissant les numéros en tuples numériques
+            try:
+                subtasks.sort(key=lambda t: tuple(
+                    map(int, t.hasStepNumber[0].split('.')) 
+                    if t.hasStepNumber else (0,)
+                ))
+            except:
+                # Fallback pour les formats non standard
+                subtasks.sort(key=lambda t: t.hasStepNumber[0] if t.hasStepNumber else "")
+
+            # Réinitialiser les marqueurs
+            for subtask in subtasks:
+                subtask.isFirstSubtask =[]
+                subtask.isLastSubtask = []
+
+            # Marquer la première
+            subtasks[0].isFirstSubtask =[ True]
+
+            # Marquer la dernière
+            subtasks[-1].isLastSubtask = [True]
+
+
+def validate_ngsi_ld(graph_data, context):
+    """Vérifie un @graph NGSI-LD sans charger d'ontologie ; retourne (erreurs, avertissements).
+
+    Erreurs : entité sans id ou type, type absent du contexte ou hors des espaces de noms des ontologies
+    de base (create_instances échouerait). Avertissements : identifiant en double, relation vers une
+    entité absente du document (ignorée à l'ingestion).
+    """
+    errors, warnings = [], []
+    ids = set()
+    entities = []
+    for entity in graph_data:
+        if not isinstance(entity, dict) or not entity.get("id") or not entity.get("type"):
+            errors.append(f"Entité sans id ou sans type : {json.dumps(entity)[:80]}")
+            continue
+        if entity["id"] in ids:
+            warnings.append(f"Identifiant en double : {entity['id']} (un seul individu, propriétés cumulées)")
+            continue
+        ids.add(entity["id"])
+        entities.append(entity)
+
+    for entity in entities:
+        entity_types = entity["type"] if isinstance(entity["type"], list) else [entity["type"]]
+        for type_name in entity_types:
+            class_iri = find_iri_in_context(context, type_name)
+            if class_iri is None:
+                errors.append(f"{entity['id']} : type {type_name!r} absent du contexte")
+            elif type_name == entity_types[0] and context.namespace_of(class_iri) is None:
+                errors.append(f"{entity['id']} : type {type_name!r} ({class_iri}) hors des ontologies de base")
+        for prop_name, prop_value in entity.items():
+            values = prop_value if isinstance(prop_value, list) else [prop_value]
+            if not any(isinstance(v, dict) and v.get("type") == "Relationship" for v in values):
+                continue
+            for target in relationship_targets(prop_value):
+                if target not in ids:
+                    warnings.append(f"{entity['id']}.{prop_name} -> {target} : entité absente du document")
+    return errors, warnings
+
+
+class Pipeline:
+    """Pipeline d'instanciation de script.py en étapes explicites, sans effet à l'import.
+
+    Rien n'est chargé à la construction : le cache des ontologies de base est ouvert au premier accès à
+    world, et chaque ontologie au premier accès à son espace de noms (ssn, soma, dul...). run() enchaîne
+    les étapes dans l'ordre de script.py ; validate() et export() n'en utilisent aucune.
+    """
+
+    def __init__(self, input_file=None, ontologies=None):
+        self.input_file = input_file or NGSI_LD_FILE
+        self.ontologies = ontologies if ontologies is not None else LazyOntologies()
+        self.write_back = OntologyWriteBack()
+        self.graph_data = None
+        self.context = None
+        self.ingest_state = None
+        self.fingerprints = None
+        self.changed = None         # entités nouvelles ou modifiées (UPSERT_INGESTION)
+        self.onto_main = None
+        self.reasoner = None
+
+    @property
+    def world(self):
+        return self.ontologies.world
+
+    @property
+    def ssn(self):
+        return self.ontologies[SSN]
+
+    @property
+    def sosa(self):
+        return self.ontologies[SOSA]
+
+    @property
+    def soma(self):
+        return self.ontologies[SOMA]
+
+    @property
+    def core(self):
+        return self.ontologies[CORE]
+
+    @property
+    def agent(self):
+        return self.ontologies[AGENT]
+
+    @property
+    def cognition(self):
+        return self.ontologies[COGNITION]
+
+    @property
+    def dul(self):
+        return self.ontologies[DUL]
+
+    # --- entrée ---
+    def read_input(self):
+        """Lit le fichier NGSI-LD et compile son contexte (une seule fois) ; retourne le @graph"""
+        if self.graph_data is None:
+            with open(self.input_file, "r") as f:
+                ngsi_data = json.load(f)
+            self.graph_data = ngsi_data.get("@graph", ngsi_data)
+            # Contexte compilé une fois par fichier (contextes distants lus depuis le cache local)
+            self.context = compile_context(ngsi_data.get("@context", ngsi_data), self.ontologies)
+        return self.graph_data
+
+    def validate(self):
+        """Vérifie le fichier d'entrée (voir validate_ngsi_ld) ; retourne le nombre d'erreurs"""
+        graph_data = self.read_input()
+        errors, warnings = validate_ngsi_ld(graph_data, self.context)
+        for message in warnings:
+            print(f"[Avertissement] {message}")
+        for message in errors:
+            print(f"[Erreur] {message}")
+        print(f"{len(graph_data)} entité(s) vérifiée(s) : {len(errors)} erreur(s), {len(warnings)} avertissement(s)")
+        return len(errors)
+
+    # --- étapes ---
+    def load_ontologies(self):
+        """Charge toutes les ontologies de base d'un coup (sinon chacune l'est à son premier accès)"""
+        with stage("ontology_load"):
+            return self.ontologies.load()
+
+    def extend_tbox(self, save=True):
+        """Extensions du TBox ; idempotent, seules les ontologies modifiées sont réécrites (premier passage)"""
+        return extend_tbox(self.ssn, self.soma, self.dul, save)
+
+    def load_ingest_state(self):
+        """Empreintes du passage précédent (UPSERT_INGESTION), lues avant toute modification des fichiers
+        de base : seule une modification hors du pipeline les invalide"""
+        if UPSERT_INGESTION and not STREAMING_INGESTION and self.ingest_state is None:
+            self.ingest_state = FingerprintState(INGEST_STATE_FILE, ONTOLOGY_FILES.values())
+        return self.ingest_state
+
+    def ingest(self):
+        """Instancie les entités NGSI-LD dans les ontologies de base, puis écrit les fichiers modifiés.
+
+        Seules les ontologies dont les triplets ont changé sont réécrites : une entrée inchangée ne
+        touche pas les fichiers de base, et le cache des ontologies reste valide d'un passage à l'autre.
+        """
+        if STREAMING_INGESTION:
+            ingest_ngsi_ld_stream(self.input_file, self.world, self.ontologies, write_back=self.write_back,
+                                  ontology_files=ONTOLOGY_FILES)
+        else:
+            graph_data = self.read_input()
+            # Signaler les noms de propriétés qui correspondent à plusieurs IRI
+            report_ambiguous_properties(get_property_index(self.world), {name for entity in graph_data for name in entity})
+            if self.load_ingest_state() is not None:
+                self.fingerprints = {entity["id"]: fingerprint(entity) for entity in graph_data}
+                self.changed = [entity for entity in graph_data
+                                if self.ingest_state.fingerprints.get(entity["id"]) != self.fingerprints[entity["id"]]]
+                print(f"{len(self.changed)} entité(s) nouvelle(s) ou modifiée(s), {len(graph_data) - len(self.changed)} inchangée(s)")
+            # Fichiers de base suivis avant la création : une instance nouvelle suffit à les marquer modifiés
+            for base_iri, file in ONTOLOGY_FILES.items():
+                self.write_back.track(self.ontologies[base_iri], file)
+            # Création des instances
+            with stage("create_instances"):
+                if self.ingest_state is None:
+                    instances = create_instances(self.world, graph_data, self.ontologies, self.context)
+                else:
+                    instances = existing_instances(self.world, graph_data, self.context)
+                    instances.update(create_instances(self.world, self.changed, self.ontologies, self.context))
+            # Ajout des propriétés
+            with stage("add_properties"):
+                if self.ingest_state is None:
+                    add_properties(self.world, graph_data, instances, self.ontologies, self.context, self.write_back)
+                else:
+                    add_properties(self.world, self.changed, instances, self.ontologies, self.context,
+                                   self.write_back, replace=True, previous_attributes=self.ingest_state.attributes)
+        with stage("flush"):
+            self.write_back.flush()
+        if self.ingest_state is not None:
+            # Empreintes enregistrées après l'écriture des ontologies, avec l'état des fichiers écrits
+            attributes = {entity["id"]: sorted(name for name in entity if name not in IGNORED_KEYS)
+                          for entity in self.read_input()}
+            self.ingest_state.save(self.fingerprints, attributes)
+
+    def build_main(self):
+        """Ontologie principale onto/main.owl (importe les ontologies de base) et ses instances"""
+        with stage("modular_ontology"):
+            create_modular_ontology(ONTOLOGY_FILES, "onto/main.owl")
+        onto_main = self.onto_main = get_ontology("onto/main.owl").load()
+        self.write_back.track(onto_main, "onto/main.owl")
+        if STREAMING_INGESTION:
+            ingest_ngsi_ld_stream(self.input_file, onto_main.world, target_ontology=onto_main, write_back=self.write_back)
+        elif BULK_INGESTION:
+            bulk_load_ngsi_ld(self.read_input(), onto_main, self.context)
+        else:
+            graph_data = self.read_input()
+            with onto_main:
+                with stage("create_instances_ngsi_ld"):
+                    instances = create_instances_ngsi_ld(self.world, graph_data, onto_main, self.context)
+                with stage("add_properties_ngsi_ld"):
+                    add_properties_ngsi_ld(self.world, graph_data, instances, onto_main, self.context, self.write_back)
+        if SCENARIO_FILE:
+            load_scenario(SCENARIO_FILE, onto_main, self.context, self.ontologies)
+            self.write_back.mark_dirty(onto_main, "onto/main.owl")
+        if JSONLD_FILE:
+            load_jsonld(JSONLD_FILE, onto_main, self.ontologies)
+            self.write_back.mark_dirty(onto_main, "onto/main.owl")
+        with stage("flush"):
+            self.write_back.flush()
+        return onto_main
+
+    def infer_abilities(self):
+        """Premier raisonnement : abilities des agents (renommées, ex. canScrew) et ordre des actions"""
+        onto_main = self.onto_main
+        with stage("rule_registration"):
+            register_rules(onto_main)
+        # Premier appel : raisonnement complet ; le second ne ré-évalue que les règles touchées
+        self.reasoner = IncrementalReasoner([onto_main], evaluator=SwrlEngine() if NATIVE_RULE_ENGINE else None,
+                                            cache=ReasonerCache() if REASONER_CACHE else None,
+                                            modules=ModuleExtractor(ModuleCache()) if MODULE_EXTRACTION else None)
+        with stage("reasoning"):
+            self.reasoner.reason()
+        with stage("rename_abilities"):
+            rename_abilities(onto_main)
+
+        canScrew = onto_main.canScrew
+        for task in onto_main.Screwing.instances():
+            if not task.requiresAbility:
+                task.requiresAbility.append(canScrew)
+        with stage("flush"):
+            self.write_back.flush()
+        with stage("uniqueness_checks"):
+            check_unique_numbers(onto_main)
+
+    def infer_execution(self):
+        """Second raisonnement : actions exécutables par les cobots, reprise des actions en attente"""
+        onto_main = self.onto_main
+        with stage("rule_registration"):
+            register_execution_rules(onto_main)
+        with stage("order_subtasks"):
+            order_subtasks(onto_main)
+        with stage("reasoning"):
+            self.reasoner.reason()
+        with stage("flush"):
+            self.write_back.flush()
+
+    def run(self):
+        """Pipeline complet (script.py) ; retourne l'ontologie principale"""
+        self.load_ontologies()
+        self.load_ingest_state()
+        self.extend_tbox()
+        self.ingest()
+        self.build_main()
+        self.infer_abilities()
+        self.infer_execution()
+        return self.onto_main
+
+    def check_rule_engine(self):
+        """Compare le moteur natif à HermiT sur les règles du pipeline (register_rules et
+        register_execution_rules), au second raisonnement de run(), là où le moteur natif le remplace.
+
+        Enchaîne les étapes de run() jusqu'au premier raisonnement compris, puis évalue les règles avec
+        les deux moteurs (les inférences de HermiT restent dans le monde, rien n'est écrit). Retourne True
+        si les faits déduits concordent, None sans Java (comparaison ignorée).
+        """
+        if not java_available():
+            print(f"[Avertissement] Java introuvable ({owlready2.JAVA_EXE}) : comparaison avec HermiT ignorée")
+            return None
+        self.load_ontologies()
+        self.load_ingest_state()
+        self.extend_tbox()
+        self.ingest()
+        onto_main = self.build_main()
+        self.infer_abilities()
+        register_execution_rules(onto_main)
+        order_subtasks(onto_main)
+        report = check_equivalence([onto_main])
+        return not report["missing"] and not report["extra"]
+
+    def export(self, source=EXPORT_SOURCE, output="output_ontology.json"):
+        """Export NGSI-LD d'une ontologie (OWLToJson.py), dans son propre monde"""
+        return export_ontology(source, output)
+
+
+def main(argv=None):
+    """Point d'entrée : python pipeline.py [--trace BASE] {run,validate,export} [options]"""
+    parser = argparse.ArgumentParser(prog="pipeline.py", description="Pipeline NGSI-LD -> ontologies AI4C2PS")
+    parser.add_argument("--trace", metavar="BASE", help="trace des étapes dans BASE.json et BASE.trace.json")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="instanciation et raisonnement complets (script.py)")
+    run.add_argument("--input", help=f"fichier NGSI-LD (défaut : {NGSI_LD_FILE})")
+    validate = commands.add_parser("validate", help="vérifie le fichier d'entrée sans charger d'ontologie")
+    validate.add_argument("--input", help=f"fichier NGSI-LD (défaut : {NGSI_LD_FILE})")
+    commands.add_parser("check-rules", help="compare le moteur natif à HermiT sur les règles du pipeline (Java requis)")
+    export = commands.add_parser("export", help="export NGSI-LD d'une ontologie (OWLToJson.py)")
+    export.add_argument("--source", default=EXPORT_SOURCE, help=f"ontologie exportée (défaut : {EXPORT_SOURCE})")
+    export.add_argument("--output", default="output_ontology.json", help="document NGSI-LD produit")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        pipeline_trace.enable(args.trace)
+    pipeline = Pipeline(getattr(args, "input", None))
+    if args.command == "validate":
+        return 1 if pipeline.validate() else 0
+    if args.command == "check-rules":
+        return 0 if pipeline.check_rule_engine() is not False else 1
+    if args.command == "export":
+        pipeline.export(args.source, args.output)
+    else:
+        pipeline.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
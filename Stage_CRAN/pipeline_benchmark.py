@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from pipeline_trace import STAGE_FILE_ENV
+from workcell_generator import write_workcell
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Tailles de cellule mesurées (paramètres de generate_workcell)
+BENCHMARK_SCALES = {
+    "small": {"agents": 2, "tools": 2, "tasks": 5, "subtasks": 4},
+    "medium": {"agents": 8, "tools": 12, "tasks": 50, "subtasks": 5},
+    "large": {"agents": 20, "tools": 40, "tasks": 250, "subtasks": 6},
+}
+# Références par taille (temps par étape, mémoire maximale), propres à la machine qui les a enregistrées
+BASELINE_FILE = os.path.join(SOURCE_DIR, "benchmark_baselines.json")
+# Régression : plus de REGRESSION_THRESHOLD (relatif) au-dessus de la référence, et plus de
+# MIN_REGRESSION_SECONDS en absolu (les étapes de quelques millisecondes sont bruitées)
+REGRESSION_THRESHOLD = 0.25
+MIN_REGRESSION_SECONDS = 0.05
+# Enregistrer les mesures comme nouvelles références au lieu de les comparer
+UPDATE_BASELINE = False
+# Programmes du pipeline exécutés dans l'ordre (l'export lit l'ontologie principale produite par script.py)
+PIPELINE = (
+    ("script.py", {}),
+    ("OWLToJson.py", {"EXPORT_SOURCE": "file://onto/main.owl"}),
+)
+
+
+def prepare_workdir(workdir, sizes):
+    """Copie onto/ dans un répertoire de travail et y génère la cellule.
+
+    Le cache des ontologies de base est copié (chargement à chaud, comme en usage normal) ; les résultats
+    de raisonnement et les empreintes d'ingestion / d'export ne le sont pas, pour mesurer le travail réel.
+    """
+    shutil.copytree(os.path.join(SOURCE_DIR, "onto"), os.path.join(workdir, "onto"),
+                    ignore=shutil.ignore_patterns("reasoner", "ingest_state.json", "export_state.json"))
+    input_file = os.path.join(workdir, "workcell.json")
+    count = write_workcell(input_file, context=_reference_context(), **sizes)
+    return input_file, count
+
+
+def _reference_context():
+    with open(os.path.join(SOURCE_DIR, "screwing.json"), "r") as f:
+        return json.load(f)["@context"]
+
+
+def run_program(program, workdir, env):
+    """Exécute un programme du pipeline ; retourne (étapes, secondes, mémoire max en Mo, JVM comprise)"""
+    stage_file = os.path.join(workdir, os.path.splitext(program)[0] + ".stages.json")
+    env = dict(os.environ, PYTHONPATH=SOURCE_DIR, **env)
+    env[STAGE_FILE_ENV] = stage_file
+    log_path = os.path.join(workdir, os.path.splitext(program)[0] + ".log")
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        process = subprocess.Popen([sys.executable, os.path.join(SOURCE_DIR, program)],
+                                   cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        # wait4 : ressources de ce seul processus et de ses descendants attendus (JVM du raisonneur)
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"{program} a échoué (code {process.returncode}), voir {log_path}")
+    with open(stage_file, "r") as f:
+        stages = json.load(f)
+    return stages, seconds, usage.ru_maxrss / 1024
+
+
+def benchmark_scale(name, sizes, keep=False):
+    """Mesure une taille de cellule : temps de chaque étape de chaque programme et mémoire maximale"""
+    workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    input_file, count = prepare_workdir(workdir, sizes)
+    result = {"sizes": sizes, "entities": count, "stages": {}, "programs": {}, "peak_rss_mb": 0.0}
+    for program, env in PIPELINE:
+        # En cas d'échec, le répertoire de travail (journaux) est conservé
+        stages, seconds, peak_rss = run_program(program, workdir, dict(env, NGSI_LD_FILE=input_file))
+        label = os.path.splitext(program)[0]
+        result["programs"][label] = {"seconds": seconds, "peak_rss_mb": peak_rss}
+        result["peak_rss_mb"] = max(result["peak_rss_mb"], peak_rss)
+        for record in stages:
+            key = f"{label}:{record['path']}"
+            # Étape exécutée plusieurs fois : numérotée (ex. script:reasoning#2)
+            n = 2
+            while key in result["stages"]:
+                key = f"{label}:{record['path']}#{n}"
+                n += 1
+            result["stages"][key] = {"seconds": record["seconds"], "peak_rss_mb": record["peak_rss_mb"]}
+    if keep:
+        print(f"Répertoire de travail conservé : {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def compare(result, baseline, threshold=REGRESSION_THRESHOLD, min_seconds=MIN_REGRESSION_SECONDS):
+    """Régressions d'une mesure par rapport à sa référence : [(étape, référence, mesure)]"""
+    regressions = []
+    for key, measured in result["stages"].items():
+        reference = baseline["stages"].get(key)
+        if reference is None:
+            continue
+        if measured["seconds"] > reference["seconds"] * (1 + threshold) \
+                and measured["seconds"] - reference["seconds"] > min_seconds:
+            regressions.append((key, reference["seconds"], measured["seconds"]))
+    if result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + threshold):
+        regressions.append(("peak_rss_mb", baseline["peak_rss_mb"], result["peak_rss_mb"]))
+    return regressions
+
+
+def load_baselines(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baselines(baselines, path=BASELINE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(baselines, f, indent=2)
+    os.replace(tmp, path)
+
+
+def print_result(name, result):
+    print(f"== {name} : {result['entities']} entité(s), mémoire max {result['peak_rss_mb']:.0f} Mo")
+    for key, measured in result["stages"].items():
+        print(f"  {key:<40} {measured['seconds']:9.3f} s  {measured['peak_rss_mb']:7.0f} Mo")
+    for label, program in result["programs"].items():
+        print(f"  {label + ' (total)':<40} {program['seconds']:9.3f} s  {program['peak_rss_mb']:7.0f} Mo")
+
+
+def run_benchmarks(scales=BENCHMARK_SCALES, update_baseline=UPDATE_BASELINE):
+    """Mesure chaque taille, puis enregistre les références ou les compare ; retourne False en cas de régression"""
+    baselines = load_baselines()
+    ok = True
+    for name, sizes in scales.items():
+        result = benchmark_scale(name, sizes)
+        print_result(name, result)
+        if update_baseline:
+            baselines[name] = result
+            continue
+        baseline = baselines.get(name)
+        if baseline is None:
+            print(f"[Avertissement] Pas de référence pour '{name}' (UPDATE_BASELINE = True pour l'enregistrer)")
+            continue
+        if baseline["sizes"] != sizes:
+            print(f"[Avertissement] Référence '{name}' mesurée avec d'autres tailles, comparaison ignorée")
+            continue
+        for key, reference, measured in compare(result, baseline):
+            print(f"[Erreur] Régression {name} {key} : {reference:.3f} -> {measured:.3f}")
+            ok = False
+    if update_baseline:
+        save_baselines(baselines)
+        print(f"Références enregistrées dans {BASELINE_FILE}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_benchmarks() else 1)
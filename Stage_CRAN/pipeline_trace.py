@@ -0,0 +1,317 @@
+import atexit
+import json
+import os
+import resource
+import subprocess
+import threading
+import time
+
+import owlready2
+import owlready2.namespace
+import owlready2.reasoning
+import owlready2.triplelite
+
+# Mesures par étape au format de pipeline_benchmark.py (liste d'enregistrements)
+STAGE_FILE_ENV = "PIPELINE_STAGE_FILE"
+# Trace complète : <base>.json (résumé par étape, compteurs) et <base>.trace.json (chrome://tracing, Perfetto)
+TRACE_ENV = "PIPELINE_TRACE"
+# Estimer le démarrage de la JVM par un lancement à vide du raisonneur (une fois par processus)
+JVM_STARTUP_PROBE = True
+
+_tracer = None
+
+
+def _rss_mb(who):
+    # ru_maxrss est en Ko sous Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "path", "start", "counters", "args", "closed")
+
+    def __init__(self, tracer, name, category, args=None):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.closed = False
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.path = f"{stack[-1].path}/{self.name}" if stack else self.name
+        self.counters = dict(self.tracer.counters)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.close(self)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class Tracer:
+    """Étapes imbriquées, compteurs et découpage du temps de raisonnement.
+
+    Compteurs (installés par enable, aucun coût sinon) :
+    - sql_select / sql_write / sql_other : requêtes exécutées sur les quadstores SQLite ;
+    - search / search_one / search_wildcard : recherches owlready2 (search_one compte aussi un search) ;
+    - saves : Ontology.save / World.save hors raisonneur ;
+    - reasoner_invocations, et tout compteur ajouté par count().
+    Chaque appel de sync_reasoner (voir sync_reasoner ci-dessous) est découpé en serialize (écriture
+    N-Triples), jvm (sous-processus, dont jvm_startup estimé par un lancement à vide et reasoning)
+    et apply_inferences (lecture de la sortie et écriture des inférences).
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.counters = {}
+        self.events = []        # spans fermés, dans l'ordre de fermeture
+        self._local = threading.local()
+        self.jvm_startup = None
+        self.pid = os.getpid()
+
+    def stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, category="stage", args=None):
+        return _Span(self, name, category, args)
+
+    def close(self, span, end=None):
+        if span.closed:
+            return
+        end = time.perf_counter() if end is None else end
+        stack = self.stack()
+        # Les sous-étapes encore ouvertes (ex. apply_inferences) se terminent avec leur parent
+        while stack and stack[-1] is not span:
+            self.close(stack[-1], end)
+        if stack:
+            stack.pop()
+        span.closed = True
+        counters = {k: v - span.counters.get(k, 0) for k, v in self.counters.items() if v != span.counters.get(k, 0)}
+        self.events.append({"name": span.name, "path": span.path, "cat": span.category,
+                            "start": span.start - self.origin, "seconds": end - span.start,
+                            "depth": len(stack), "tid": threading.get_ident(), "counters": counters,
+                            "args": span.args or {},
+                            "peak_rss_mb": _rss_mb(resource.RUSAGE_SELF),
+                            "children_rss_mb": _rss_mb(resource.RUSAGE_CHILDREN)})
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def in_reasoner(self):
+        return any(span.category == "reasoner" for span in self.stack())
+
+    # --- sorties ---
+    def summary(self):
+        """Résumé par chemin d'étape : appels, temps total, temps propre (hors sous-étapes), compteurs"""
+        stages = {}
+        child_seconds = {}
+        for event in self.events:
+            entry = stages.setdefault(event["path"], {"path": event["path"], "calls": 0, "seconds": 0.0,
+                                                      "counters": {}})
+            entry["calls"] += 1
+            entry["seconds"] += event["seconds"]
+            for k, v in event["counters"].items():
+                entry["counters"][k] = entry["counters"].get(k, 0) + v
+            parent = event["path"].rpartition("/")[0]
+            if parent:
+                child_seconds[parent] = child_seconds.get(parent, 0.0) + event["seconds"]
+        for path, entry in stages.items():
+            entry["self_seconds"] = entry["seconds"] - child_seconds.get(path, 0.0)
+        reasoner = {"invocations": self.counters.get("reasoner_invocations", 0)}
+        for phase in ("serialize", "jvm", "jvm_startup", "reasoning", "apply_inferences"):
+            reasoner[phase + "_seconds"] = sum(e["seconds"] for e in self.events
+                                               if e["cat"] == "reasoner" and e["name"] == phase)
+        reasoner["seconds"] = sum(e["seconds"] for e in self.events if e["name"] == "sync_reasoner")
+        return {"wall_seconds": time.perf_counter() - self.origin,
+                "peak_rss_mb": _rss_mb(resource.RUSAGE_SELF),
+                "counters": dict(self.counters), "reasoner": reasoner,
+                "stages": sorted(stages.values(), key=lambda e: e["path"])}
+
+    def chrome_trace(self):
+        """Événements au format Trace Event (chrome://tracing, ui.perfetto.dev)"""
+        events = [{"name": e["name"], "cat": e["cat"], "ph": "X", "pid": self.pid, "tid": e["tid"],
+                   "ts": e["start"] * 1e6, "dur": e["seconds"] * 1e6,
+                   "args": dict(e["args"], **e["counters"])} for e in self.events]
+        events.sort(key=lambda e: (e["ts"], -e["dur"]))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def stage_records(self):
+        return [{"stage": e["name"], "path": e["path"], "seconds": e["seconds"],
+                 "peak_rss_mb": e["peak_rss_mb"], "children_rss_mb": e["children_rss_mb"]}
+                for e in sorted(self.events, key=lambda e: e["start"])]
+
+    def save(self, trace_base=None, stage_file=None):
+        for span in list(self.stack()):
+            self.close(span)
+        if stage_file:
+            _dump(self.stage_records(), stage_file)
+        if trace_base:
+            _dump(self.summary(), trace_base + ".json")
+            _dump(self.chrome_trace(), trace_base + ".trace.json")
+
+    # --- compteurs SQLite ---
+    def watch(self, db):
+        db.set_trace_callback(self._sql)
+
+    def _sql(self, statement):
+        verb = statement.lstrip()[:6].upper()
+        if verb == "SELECT":
+            self.count("sql_select")
+        elif verb in ("INSERT", "UPDATE", "DELETE", "REPLAC"):
+            self.count("sql_write")
+        else:
+            self.count("sql_other")
+
+    # --- JVM du raisonneur ---
+    def run_java(self, run, command, *args, **kwargs):
+        """subprocess.check_output du raisonneur : jvm = jvm_startup (estimé) + reasoning"""
+        if JVM_STARTUP_PROBE and self.jvm_startup is None:
+            with self.span("jvm_startup_probe", "probe"):
+                self.jvm_startup = _probe_jvm_startup(command)
+        with self.span("jvm", "reasoner", {"command": command[-1]}):
+            start = time.perf_counter()
+            output = run(command, *args, **kwargs)
+            end = time.perf_counter()
+            if self.jvm_startup is not None:
+                startup = min(self.jvm_startup, end - start)
+                with self.span("jvm_startup", "reasoner", {"estimated": True}) as span:
+                    span.start = start
+                    self.close(span, start + startup)
+                with self.span("reasoning", "reasoner") as span:
+                    span.start = start + startup
+                    self.close(span, end)
+        # La suite de sync_reasoner (analyse de la sortie, inférences) jusqu'à la fin de l'appel
+        self.span("apply_inferences", "reasoner").__enter__()
+        return output
+
+
+def _dump(data, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def _probe_jvm_startup(command):
+    """Durée d'un lancement du raisonneur sans ontologie (--help) : démarrage JVM et chargement des classes"""
+    if "-cp" not in command:
+        return None
+    main = command.index("-cp") + 2
+    start = time.perf_counter()
+    try:
+        subprocess.run(command[:main + 1] + ["--help"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    return time.perf_counter() - start
+
+
+class _ModuleProxy:
+    """Module dont quelques fonctions sont remplacées (le reste est délégué)"""
+
+    def __init__(self, module, **overrides):
+        self._module = module
+        self.__dict__.update(overrides)
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+def _install(tracer):
+    graph_manager = owlready2.namespace._GraphManager
+    original_search, original_search_one = graph_manager.search, graph_manager.search_one
+
+    def search(self, *args, **kwargs):
+        tracer.count("search")
+        if any(isinstance(v, str) and "*" in v for v in kwargs.values()):
+            tracer.count("search_wildcard")
+        return original_search(self, *args, **kwargs)
+
+    def search_one(self, **kwargs):
+        tracer.count("search_one")
+        return original_search_one(self, **kwargs)
+
+    graph_manager.search, graph_manager.search_one = search, search_one
+
+    def traced_save(original, kind):
+        def save(self, file=None, *args, **kwargs):
+            if tracer.in_reasoner():
+                with tracer.span("serialize", "reasoner"):
+                    return original(self, file, *args, **kwargs)
+            tracer.count("saves")
+            target = file if isinstance(file, str) else getattr(file, "name", None) or getattr(self, "base_iri", kind)
+            with tracer.span("save", "io", {"file": str(target)}):
+                return original(self, file, *args, **kwargs)
+        return save
+
+    for cls, kind in ((owlready2.namespace.Ontology, "ontology"), (owlready2.namespace.World, "world")):
+        cls.save = traced_save(cls.save, kind)
+
+    # Requêtes SQLite : connexions ouvertes après l'activation, et le monde par défaut déjà ouvert
+    def connect(*args, **kwargs):
+        db = _sqlite3.connect(*args, **kwargs)
+        tracer.watch(db)
+        return db
+
+    _sqlite3 = owlready2.triplelite.sqlite3
+    owlready2.triplelite.sqlite3 = _ModuleProxy(_sqlite3, connect=connect)
+    tracer.watch(owlready2.default_world.graph.db)
+
+    # Sous-processus Java lancés par owlready2.reasoning (HermiT, Pellet)
+    def check_output(command, *args, **kwargs):
+        if tracer.in_reasoner() and command and command[0] == owlready2.JAVA_EXE:
+            return tracer.run_java(subprocess.check_output, command, *args, **kwargs)
+        return subprocess.check_output(command, *args, **kwargs)
+
+    owlready2.reasoning.subprocess = _ModuleProxy(subprocess, check_output=check_output)
+
+
+def enable(trace_base=None, stage_file=None):
+    """Active le traçage pour le processus ; les fichiers sont écrits à la sortie. Retourne le Tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+        _install(_tracer)
+    atexit.register(_tracer.save, trace_base, stage_file)
+    return _tracer
+
+
+def stage(name):
+    """Chronomètre une étape du pipeline (imbriquable) : with stage("create_instances"): ..."""
+    return _NO_STAGE if _tracer is None else _tracer.span(name)
+
+
+def count(name, n=1):
+    """Incrémente un compteur de la trace (sans effet si le traçage est désactivé)"""
+    if _tracer is not None:
+        _tracer.count(name, n)
+
+
+def sync_reasoner(*args, **kwargs):
+    """owlready2.sync_reasoner compté et découpé (serialize, jvm, apply_inferences) quand le traçage est actif"""
+    if _tracer is None:
+        return owlready2.sync_reasoner(*args, **kwargs)
+    _tracer.count("reasoner_invocations")
+    with _tracer.span("sync_reasoner", "reasoner"):
+        return owlready2.sync_reasoner(*args, **kwargs)
+
+
+if os.environ.get(STAGE_FILE_ENV) or os.environ.get(TRACE_ENV):
+    enable(os.environ.get(TRACE_ENV), os.environ.get(STAGE_FILE_ENV))
@@ -0,0 +1,113 @@
+import weakref
+
+from owlready2.base import (rdf_type, owl_object_property, owl_data_property,
+                            owl_annotation_property)
+
+PROPERTY_KINDS = {
+    owl_object_property: "object",
+    owl_data_property: "data",
+    owl_annotation_property: "annotation",
+}
+
+
+def short_name(iri):
+    """Nom court d'un IRI (partie après '#' ou le dernier '/')"""
+    return iri.rsplit("#", 1)[-1] if "#" in iri else iri.rsplit("/", 1)[-1]
+
+
+class PropertyIndex:
+    """Index nom court / IRI -> propriété, construit en une seule requête sur le quadstore"""
+
+    def __init__(self, world):
+        self.world = world
+        self.refresh()
+
+    def refresh(self):
+        """Reconstruit l'index (à appeler si des propriétés sont créées après sa construction)"""
+        self._by_iri = {}
+        self._by_name = {}
+        self._entities = {}
+
+        placeholders = ",".join("?" * len(PROPERTY_KINDS))
+        rows = self.world.graph.execute(
+            f"""SELECT q.s, q.o, r.iri FROM objs q, resources r
+                WHERE q.p=? AND q.o IN ({placeholders}) AND r.storid=q.s
+                ORDER BY q.s""",
+            (rdf_type, *PROPERTY_KINDS))
+        for storid, kind, iri in rows:
+            if iri in self._by_iri:
+                continue  # déclarée dans plusieurs ontologies : même entité
+            self._by_iri[iri] = (storid, PROPERTY_KINDS[kind])
+            self._by_name.setdefault(short_name(iri), []).append(iri)
+
+    def _entity(self, iri):
+        entity = self._entities.get(iri)
+        if entity is None:
+            entity = self._entities[iri] = self.world._get_by_storid(self._by_iri[iri][0])
+        return entity
+
+    def _iri(self, name_or_iri):
+        if name_or_iri in self._by_iri:
+            return name_or_iri
+        candidates = self._by_name.get(name_or_iri)
+        # Même choix que l'ancien search_one : la première propriété déclarée dans le quadstore
+        return candidates[0] if candidates else None
+
+    def resolve(self, name_or_iri):
+        """Propriété correspondant à un nom court ou un IRI complet, ou None"""
+        iri = self._iri(name_or_iri)
+        return self._entity(iri) if iri else None
+
+    def kind(self, name_or_iri):
+        """'object', 'data', 'annotation' ou None si la propriété est inconnue"""
+        iri = self._iri(name_or_iri)
+        return self._by_iri[iri][1] if iri else None
+
+    def candidates(self, name):
+        """Tous les IRI dont le nom court vaut name"""
+        return list(self._by_name.get(name, []))
+
+    def ambiguous_names(self):
+        """Noms courts qui correspondent à plus d'un IRI"""
+        return {name: list(iris) for name, iris in self._by_name.items() if len(iris) > 1}
+
+    def _of_kind(self, kind):
+        return [self._entity(iri) for iri, (_, k) in self._by_iri.items() if k == kind]
+
+    def object_properties(self):
+        return self._of_kind("object")
+
+    def data_properties(self):
+        return self._of_kind("data")
+
+    def annotation_properties(self):
+        return self._of_kind("annotation")
+
+    def __contains__(self, name_or_iri):
+        return self._iri(name_or_iri) is not None
+
+    def __len__(self):
+        return len(self._by_iri)
+
+
+_INDEXES = weakref.WeakKeyDictionary()
+
+
+def get_property_index(world, refresh=False):
+    """Index de propriétés du monde, construit une seule fois par monde"""
+    index = _INDEXES.get(world)
+    if index is None:
+        index = _INDEXES[world] = PropertyIndex(world)
+    elif refresh:
+        index.refresh()
+    return index
+
+
+def report_ambiguous_properties(index, names=None):
+    """Affiche les noms courts ambigus (optionnellement restreints aux noms utilisés)"""
+    ambiguous = index.ambiguous_names()
+    if names is not None:
+        ambiguous = {n: iris for n, iris in ambiguous.items() if n in names}
+    for name, iris in sorted(ambiguous.items()):
+        print(f"[Avertissement] Propriété '{name}' ambiguë, {iris[0]} retenue parmi : {', '.join(iris)}")
+    return ambiguous
@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import owlready2
+import owlready2.reasoning
+from owlready2.base import owl_imports
+from owlready2.namespace import CURRENT_NAMESPACES
+from owlready2.reasoning import _apply_reasoning_results, _apply_inferred_obj_relations, _INFERRENCES_ONTOLOGY
+
+from pipeline_trace import sync_reasoner
+
+REASONER_CACHE_DIR = "onto/.cache/reasoner"
+REASONER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FORMAT = 2   # à incrémenter si le format des entrées ou le calcul de la clé change
+
+
+def java_available():
+    """Vrai si la JVM de owlready2 (owlready2.JAVA_EXE) est trouvable : HermiT peut être lancé"""
+    return shutil.which(owlready2.JAVA_EXE) is not None or os.path.isfile(owlready2.JAVA_EXE)
+
+
+def resource_iris(graph):
+    return dict(graph.execute("SELECT storid, iri FROM resources"))
+
+
+def input_rows(ontologies):
+    """Triplets (s, p, o, d) des ontologies tels que sync_reasoner les envoie (sans owl:imports) ; d vaut None pour objs"""
+    graph = ontologies[0].world.graph
+    rows = []
+    for onto in ontologies:
+        c = onto.graph.c
+        rows.extend((s, p, o, None) for s, p, o in graph.execute(
+            "SELECT s, p, o FROM objs WHERE c=? AND p!=?", (c, owl_imports)))
+        rows.extend(graph.execute("SELECT s, p, o, d FROM datas WHERE c=?", (c,)))
+    return rows
+
+
+def canonical_lines(rows, iris):
+    """Triplets (s, p, o, d) en lignes canoniques triées.
+
+    Les nœuds anonymes n'ont pas d'identifiant stable : ils sont nommés par le hachage de leur
+    description (récursivement), ce qui rend les lignes indépendantes de l'ordre de chargement.
+    """
+    descriptions = {}
+    for s, p, o, d in rows:
+        if s < 0:
+            descriptions.setdefault(s, []).append((p, o, d))
+    labels = {}
+
+    def term(x):
+        if isinstance(x, int) and x < 0:
+            return blank(x)
+        return f"<{iris.get(x, x)}>"
+
+    def literal(o, d):
+        datatype = d if isinstance(d, str) else iris.get(d, d)
+        return f"{json.dumps(o if isinstance(o, str) else repr(o))}^^{datatype}"
+
+    def blank(b):
+        if b in labels:
+            return labels[b]
+        labels[b] = "_:cycle"
+        parts = sorted(f"{term(p)} {term(o) if d is None else literal(o, d)}" for p, o, d in descriptions.get(b, ()))
+        labels[b] = "_:" + hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:32]
+        return labels[b]
+
+    return sorted(f"{term(s)} {term(p)} {term(o) if d is None else literal(o, d)}" for s, p, o, d in rows)
+
+
+def canonical_triples(ontologies):
+    """Triplets des ontologies tels que sync_reasoner les envoie (sans owl:imports), en lignes canoniques triées"""
+    return canonical_lines(input_rows(ontologies), resource_iris(ontologies[0].world.graph))
+
+
+def reasoning_key(ontologies, **options):
+    """Clé du résultat : triplets d'entrée (règles SWRL comprises) et options du raisonneur"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"format": CACHE_FORMAT, "options": options}, sort_keys=True).encode("utf-8"))
+    for line in canonical_triples(ontologies):
+        digest.update(line.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class ReasonerCache:
+    """Résultats de sync_reasoner indexés par le contenu de l'entrée ; éviction LRU bornée en taille disque.
+
+    Une entrée contient les résultats complets du raisonneur (IRI), tels que owlready2 les applique :
+    parents (tous les types et super-classes rapportés, pas seulement les nouveaux), équivalences et
+    valeurs de propriétés (voir recorded_results). L'ordre LRU suit la date de modification des
+    fichiers, mise à jour à chaque lecture.
+    """
+
+    def __init__(self, cache_dir=REASONER_CACHE_DIR, max_bytes=REASONER_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return entry
+
+    def store(self, key, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def entries(self):
+        """(date d'accès, taille, chemin) des entrées, de la plus ancienne à la plus récente"""
+        found = []
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    found.append((stat.st_mtime_ns, stat.st_size, os.path.join(self.cache_dir, name)))
+        return sorted(found)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes ; retourne leur nombre"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
+
+
+def _target_ontology(world):
+    """Ontologie où sync_reasoner range ses résultats (celle du bloc with courant, sinon les inférences)"""
+    namespaces = CURRENT_NAMESPACES.get()
+    return namespaces[-1].ontology if namespaces else world.get_ontology(_INFERRENCES_ONTOLOGY)
+
+
+@contextmanager
+def recorded_results(world):
+    """Enregistre, pendant un sync_reasoner sur world, les résultats que owlready2 applique ; donne l'entrée de cache.
+
+    owlready2 remplace les is_a des entités chargées par la liste de parents du raisonneur : rejouer
+    seulement les triplets ajoutés ferait perdre les types assertés. L'entrée garde donc les listes
+    complètes passées à _apply_reasoning_results et _apply_inferred_obj_relations.
+    """
+    iri = world._unabbreviate
+    entry = {"parents": [], "equivs": [], "relations": []}
+
+    def apply_results(applied_world, ontology, debug, new_parents, new_equivs, entity_2_type):
+        if applied_world is world:
+            for name, table in (("parents", new_parents), ("equivs", new_equivs)):
+                for a, bs in table.items():
+                    entry[name].extend([iri(a), iri(b), entity_2_type[a]] for b in bs)
+        return _apply_reasoning_results(applied_world, ontology, debug, new_parents, new_equivs, entity_2_type)
+
+    def apply_relations(applied_world, ontology, debug, relations):
+        if applied_world is world:
+            entry["relations"].extend([iri(s), prop.iri, iri(o)] for s, prop, o in relations)
+        return _apply_inferred_obj_relations(applied_world, ontology, debug, relations)
+
+    owlready2.reasoning._apply_reasoning_results = apply_results
+    owlready2.reasoning._apply_inferred_obj_relations = apply_relations
+    try:
+        yield entry
+    finally:
+        owlready2.reasoning._apply_reasoning_results = _apply_reasoning_results
+        owlready2.reasoning._apply_inferred_obj_relations = _apply_inferred_obj_relations
+
+
+def replay(world, target, entry, debug=0):
+    """Rejoue une entrée de cache comme sync_reasoner aurait appliqué ses résultats"""
+    new_parents, new_equivs, entity_2_type = {}, {}, {}
+    for (name, table) in (("parents", new_parents), ("equivs", new_equivs)):
+        for a, b, kind in entry[name]:
+            a, b = world._abbreviate(a), world._abbreviate(b)
+            table.setdefault(a, []).append(b)
+            entity_2_type[a] = kind
+    _apply_reasoning_results(world, target, debug, new_parents, new_equivs, entity_2_type)
+
+    relations = []
+    for s, p, o in entry["relations"]:
+        s, o, prop = world._abbreviate(s), world._abbreviate(o), world[p]
+        if (prop is not None and not world._has_obj_triple_spo(s, prop.storid, o)
+                and (not prop._inverse_property or not world._has_obj_triple_spo(o, prop._inverse_storid, s))):
+            relations.append((s, prop, o))
+    _apply_inferred_obj_relations(world, target, debug, relations)
+
+
+def reasoning_results(ontologies, cache=None, infer_property_values=True,
+                      ignore_unsupported_datatypes=True, debug=1):
+    """Résultats complets de sync_reasoner sur les ontologies ; retourne (entrée, 'hit' / 'miss' / None).
+
+    Sans cache ou sur un miss, le raisonnement est lancé (et appliqué à leur monde) ; sur un hit,
+    rien n'est appliqué : voir replay.
+    """
+    ontologies = list(ontologies)
+    world = ontologies[0].world
+    key = None
+    if cache is not None:
+        key = reasoning_key(ontologies, infer_property_values=infer_property_values,
+                            ignore_unsupported_datatypes=ignore_unsupported_datatypes)
+        entry = cache.load(key)
+        if entry is not None:
+            cache.hits += 1
+            return entry, "hit"
+
+    with recorded_results(world) as entry:
+        sync_reasoner(ontologies, infer_property_values=infer_property_values,
+                      ignore_unsupported_datatypes=ignore_unsupported_datatypes, debug=debug)
+    if cache is None:
+        return entry, None
+    cache.store(key, entry)
+    cache.misses += 1
+    return entry, "miss"
+
+
+def cached_sync_reasoner(ontologies, cache=None, infer_property_values=True,
+                         ignore_unsupported_datatypes=True, debug=1):
+    """sync_reasoner avec cache de résultats ; retourne 'hit' ou 'miss'"""
+    ontologies = list(ontologies)
+    entry, result = reasoning_results(ontologies, cache or ReasonerCache(), infer_property_values,
+                                      ignore_unsupported_datatypes, debug)
+    if result == "hit":
+        world = ontologies[0].world
+        replay(world, _target_ontology(world), entry, debug)
+    return result
+
+
+def check_cache_replay(debug=0):
+    """Vérifie qu'un hit du cache donne le même monde qu'un miss (types assertés compris).
+
+    Deux mondes identiques (A asserté sur x, B ≡ ∃p.Thing inféré) : le premier est raisonné par
+    HermiT (miss), le second rejoue l'entrée (hit) ; is_a et relations doivent concorder. Nécessite
+    Java, ignoré sinon. Retourne True si tout concorde, None sans Java.
+    """
+    if not java_available():
+        print(f"[Avertissement] Java introuvable ({owlready2.JAVA_EXE}) : vérification du cache ignorée")
+        return None
+    from owlready2 import World, Thing, ObjectProperty, TransitiveProperty
+
+    def fixture():
+        world = World()
+        onto = world.get_ontology("http://check-cache-replay/")
+        with onto:
+            class A(Thing): pass
+            class p(ObjectProperty, TransitiveProperty): pass
+            class B(Thing):
+                equivalent_to = [p.some(Thing)]
+            x, y, z = A("x"), Thing("y"), Thing("z")
+            x.p, y.p = [y], [z]
+        return world, onto
+
+    def state(onto):
+        return {inst.name: (sorted(c.name for c in inst.is_a), sorted(i.name for i in inst.p))
+                for inst in onto.individuals()}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ReasonerCache(cache_dir)
+        states = []
+        for expected in ("miss", "hit"):
+            world, onto = fixture()
+            with onto:
+                result = cached_sync_reasoner([onto], cache, debug=debug)
+            states.append(state(onto))
+            if result != expected:
+                print(f"[Erreur] Cache : {result} au lieu de {expected}")
+                return False
+    ok = states[0] == states[1]
+    print(f"[Vérification] Cache du raisonneur : miss {states[0]}, hit {states[1]} -> "
+          f"{'identiques' if ok else 'DIFFÉRENTS'}")
+    return ok
+
+
+if __name__ == "__main__":
+    # Vérification hit / miss sur un petit monde (nécessite Java)
+    raise SystemExit(1 if check_cache_replay() is False else 0)
@@ -0,0 +1,118 @@
+import json
+
+from owlready2.base import (rdf_type, rdfs_subclassof, rdfs_subpropertyof, owl_equivalentclass,
+                            owl_equivalentproperty, owl_equivalentindividual, owl_named_individual,
+                            owl_class, owl_thing, owl_ontology, from_literal)
+
+from change_log import ChangeLog, INSERT
+
+# Triplets de TBox ajoutés par le raisonneur (classification) : comptés mais pas listés
+HIERARCHY_PREDICATES = {rdfs_subclassof, rdfs_subpropertyof, owl_equivalentclass, owl_equivalentproperty}
+IGNORED_TYPES = {owl_named_individual, owl_class, owl_thing, owl_ontology}
+
+
+class ReasoningSnapshot:
+    """État du quadstore avant raisonnement : une position dans le journal des modifications (change_log).
+
+    Le raisonnement ne fait pas qu'ajouter des triplets : owlready2 réinitialise les is_a (suppression
+    puis réinsertion), et SQLite réattribue les rowids libérés. Le delta se calcule donc sur le
+    journal, en O(triplets modifiés) : un triplet est nouveau si sa première opération depuis
+    l'instantané est une insertion (il n'existait pas) et sa dernière aussi (il existe encore).
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.log = ChangeLog(world, f"snapshot-{id(self)}")
+        self.mark = self.log.position()
+        self._delta = None
+
+    def delta(self):
+        """Delta depuis l'instantané : nouveaux rdf:type et nouvelles assertions de propriétés.
+
+        Calculé une fois ; le journal est ensuite libéré.
+        """
+        if self._delta is not None:
+            return self._delta
+        first, last = {}, {}
+        for table, op, c, s, p, o, d in self.log.changes(self.mark):
+            key = (table, s, p, o, d)
+            first.setdefault((key, c), op)
+            last[key, c] = op
+        self.log.close()
+
+        # Triplets nouveaux, avec les ontologies où ils ont été ajoutés
+        added = {}
+        for (key, c), op in first.items():
+            if op == INSERT and last[key, c] == INSERT and key[1] > 0:
+                added.setdefault(key, set()).add(c)
+
+        graph = self.world.graph
+        delta = self._delta = ReasoningDelta(self.world)
+        for (table, s, p, o, d), contexts in added.items():
+            # Présent aussi dans une autre ontologie, sans y avoir été ajouté : il existait déjà
+            if table == "datas":
+                rows = graph.execute("SELECT c FROM datas WHERE s=? AND p=? AND o=? AND d IS ?", (s, p, o, d))
+            else:
+                rows = graph.execute("SELECT c FROM objs WHERE s=? AND p=? AND o=?", (s, p, o))
+            if any(c not in contexts for (c,) in rows):
+                continue
+            if table == "datas":
+                delta.values.add((s, p, o, d))
+            elif o < 0:
+                continue
+            elif p == rdf_type:
+                if o not in IGNORED_TYPES:
+                    delta.types.add((s, o))
+            elif p in HIERARCHY_PREDICATES or p == owl_equivalentindividual:
+                delta.hierarchy += 1
+            else:
+                delta.relations.add((s, p, o))
+        return delta
+
+
+class ReasoningDelta:
+    """Assertions ajoutées par le raisonnement, en storids ; converties en entités à la demande"""
+
+    def __init__(self, world):
+        self.world = world
+        self.types = set()      # (individu, classe)
+        self.relations = set()  # (sujet, propriété objet, objet)
+        self.values = set()     # (sujet, propriété donnée, valeur, type)
+        self.hierarchy = 0      # subClassOf / equivalentClass... inférés
+
+    def __len__(self):
+        return len(self.types) + len(self.relations) + len(self.values)
+
+    def _entity(self, storid):
+        return self.world._get_by_storid(storid)
+
+    def new_types(self):
+        """[(individu, classe)] inférés"""
+        return [(self._entity(s), self._entity(o)) for s, o in sorted(self.types)]
+
+    def new_relations(self):
+        """[(sujet, propriété, objet ou valeur)] inférés, ex. (ur5, hasAbility, canScrew)"""
+        facts = [(self._entity(s), self._entity(p), self._entity(o)) for s, p, o in sorted(self.relations)]
+        facts += [(self._entity(s), self._entity(p), from_literal(o, d))
+                  for s, p, o, d in sorted(self.values, key=str)]
+        return facts
+
+    def to_json(self, entity_id=None):
+        """Delta exportable ; entity_id(individu) donne l'identifiant (IRI par défaut, ou URN NGSI-LD)"""
+        entity_id = entity_id or (lambda entity: entity.iri)
+
+        def name(entity):
+            return entity.name if hasattr(entity, "name") else str(entity)
+
+        return {
+            "types": [{"id": entity_id(inst), "type": name(cls)} for inst, cls in self.new_types()
+                      if inst is not None and cls is not None],
+            "relations": [{"id": entity_id(s), "property": name(p),
+                           "object" if hasattr(o, "storid") else "value": entity_id(o) if hasattr(o, "storid") else o}
+                          for s, p, o in self.new_relations() if s is not None and p is not None],
+            "hierarchy": self.hierarchy,
+        }
+
+    def save(self, file, entity_id=None):
+        with open(file, "w") as f:
+            json.dump(self.to_json(entity_id), f, indent=2, default=str)
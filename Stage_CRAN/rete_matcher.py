@@ -0,0 +1,279 @@
+import random
+import time
+from collections import Counter
+
+from ccml import load_ccml
+
+
+class Production:
+    """Une conjonction de conditions d'une règle CCML (une règle 'a or b' donne plusieurs productions)"""
+
+    def __init__(self, rule, conditions, index):
+        self.rule = rule
+        self.name = rule.name
+        self.conditions = conditions
+        self.index = index      # ordre dans le fichier : ordre de déclenchement
+
+    def __repr__(self):
+        return f"Production({self.name!r}, #{self.index})"
+
+
+def compile_productions(rules):
+    productions = []
+    for rule in rules:
+        for conditions in rule.alternatives():
+            if conditions:
+                productions.append(Production(rule, conditions, len(productions)))
+    return productions
+
+
+class WorkingMemory:
+    """Faits (attribut, valeur) ; un attribut peut porter plusieurs valeurs, set_slot n'en garde qu'une"""
+
+    def __init__(self):
+        self.slots = {}         # attribut -> {valeurs}
+
+    def add(self, attr, value):
+        values = self.slots.setdefault(attr, set())
+        if value in values:
+            return False
+        values.add(value)
+        self._added(attr, value, len(values) == 1)
+        return True
+
+    def remove(self, attr, value):
+        values = self.slots.get(attr)
+        if not values or value not in values:
+            return False
+        values.remove(value)
+        self._removed(attr, value, not values)
+        return True
+
+    def set_slot(self, attr, value):
+        """Remplace les valeurs de l'attribut (événement de perception, ex. vis#assembled motor_true)"""
+        for old in list(self.slots.get(attr, ())):
+            if old != value:
+                self.remove(attr, old)
+        self.add(attr, value)
+
+    def holds(self, condition):
+        values = self.slots.get(condition.attr)
+        present = bool(values) if condition.value is None else bool(values) and condition.value in values
+        return present != condition.negated
+
+    def _added(self, attr, value, first):
+        pass
+
+    def _removed(self, attr, value, last):
+        pass
+
+    # --- déclenchement ---
+    def activations(self):
+        raise NotImplementedError
+
+    def fire(self):
+        """Applique les conclusions des productions actives pas encore déclenchées (réfraction) ; retourne les règles"""
+        fired = []
+        for production in sorted(self.activations() - self.fired, key=lambda p: p.index):
+            self.fired.add(production)
+            for conclusion in production.rule.conclusions:
+                self.set_slot(conclusion.attr, conclusion.value)
+            fired.append(production.name)
+        return fired
+
+    def run(self, max_cycles=100):
+        """Déclenche jusqu'à stabilité ; retourne les noms des règles déclenchées, dans l'ordre"""
+        fired = []
+        for _ in range(max_cycles):
+            step = self.fire()
+            if not step:
+                break
+            fired.extend(step)
+        return fired
+
+
+class NaiveMatcher(WorkingMemory):
+    """Référence : toutes les productions sont ré-évaluées sur la mémoire de travail à chaque consultation"""
+
+    def __init__(self, rules):
+        super().__init__()
+        self.productions = compile_productions(rules)
+        self._fired = set()
+
+    @property
+    def fired(self):
+        active = self.activations()
+        self._fired &= active
+        return self._fired
+
+    def activations(self):
+        return {p for p in self.productions if all(self.holds(c) for c in p.conditions)}
+
+
+class AlphaMemory:
+    """Test constant partagé : présence de (attribut, valeur), ou de l'attribut avec n'importe quelle valeur"""
+
+    def __init__(self, attr, value):
+        self.attr = attr
+        self.value = value
+        self.present = False
+        self.successors = []    # noeuds beta qui testent cette mémoire
+
+
+class BetaNode:
+    """Préfixe de conditions partagé par les productions qui le commencent ; actif si tout le préfixe est satisfait"""
+
+    def __init__(self, parent, alpha, negated):
+        self.parent = parent
+        self.alpha = alpha
+        self.negated = negated
+        self.active = False
+        self.children = []
+        self.productions = []   # productions dont ce noeud termine les conditions
+
+    def update(self, matcher):
+        active = (self.parent is None or self.parent.active) and (self.alpha.present != self.negated)
+        if active == self.active:
+            return
+        self.active = active
+        matcher.beta_updates += 1
+        for production in self.productions:
+            if active:
+                matcher.active.add(production)
+            else:
+                matcher.active.discard(production)
+                matcher.fired.discard(production)
+        for child in self.children:
+            child.update(matcher)
+
+
+class ReteMatcher(WorkingMemory):
+    """Réseau Rete compilé depuis des règles CCML.
+
+    Chaque test (attribut, valeur) est une mémoire alpha unique, partagée par toutes les règles qui
+    l'utilisent ; les conditions de chaque production sont ordonnées par fréquence décroissante, de
+    sorte que les préfixes communs (ex. goal#3 puis -set-goal-2.2) forment un seul chemin de noeuds
+    beta. Un fait ne réveille que les noeuds beta de ses mémoires alpha, et seulement si la présence
+    change (premier ajout, dernier retrait) : les correspondances partielles non concernées ne sont
+    pas revisitées. Les conditions niées sont des noeuds beta satisfaits quand la mémoire est vide.
+    """
+
+    def __init__(self, rules):
+        super().__init__()
+        self.productions = compile_productions(rules)
+        self.alphas = {}        # (attribut, valeur ou None) -> AlphaMemory
+        self.roots = {}
+        self.betas = {}         # (id du parent, clé alpha, négation) -> BetaNode
+        self.active = set()
+        self.fired = set()
+        self.beta_updates = 0
+
+        frequency = Counter(c for p in self.productions for c in set(p.conditions))
+        for production in self.productions:
+            ordered = sorted(set(production.conditions), key=lambda c: (-frequency[c], c.attr, str(c.value), c.negated))
+            node = None
+            for condition in ordered:
+                node = self._beta(node, condition)
+            node.productions.append(production)
+        # état initial (mémoire vide) : les chaînes qui ne commencent que par des négations sont actives
+        for root in self.roots.values():
+            root.update(self)
+
+    def _alpha(self, attr, value):
+        key = (attr, value)
+        if key not in self.alphas:
+            self.alphas[key] = AlphaMemory(attr, value)
+        return self.alphas[key]
+
+    def _beta(self, parent, condition):
+        alpha = self._alpha(condition.attr, condition.value)
+        key = (id(parent), condition.attr, condition.value, condition.negated)
+        node = self.betas.get(key)
+        if node is None:
+            node = self.betas[key] = BetaNode(parent, alpha, condition.negated)
+            alpha.successors.append(node)
+            if parent is None:
+                self.roots[key] = node
+            else:
+                parent.children.append(node)
+        return node
+
+    def _set_present(self, alpha, present):
+        if alpha is None or alpha.present == present:
+            return
+        alpha.present = present
+        for node in alpha.successors:
+            node.update(self)
+
+    def _added(self, attr, value, first):
+        self._set_present(self.alphas.get((attr, value)), True)
+        if first:
+            self._set_present(self.alphas.get((attr, None)), True)
+
+    def _removed(self, attr, value, last):
+        self._set_present(self.alphas.get((attr, value)), False)
+        if last:
+            self._set_present(self.alphas.get((attr, None)), False)
+
+    def activations(self):
+        return set(self.active)
+
+    def stats(self):
+        shared = sum(len(p.conditions) for p in self.productions)
+        return {"productions": len(self.productions), "alpha_memories": len(self.alphas),
+                "beta_nodes": len(self.betas), "conditions": shared}
+
+
+def perception_events(rules, count, seed=0):
+    """Suite reproductible d'événements set_slot sur les attributs et valeurs cités par les règles"""
+    vocabulary = {}
+    for rule in rules:
+        for condition in [c for alternative in rule.alternatives() for c in alternative] + rule.conclusions:
+            values = vocabulary.setdefault(condition.attr, set())
+            values.add(condition.value if condition.value is not None else "1")
+    slots = sorted((attr, sorted(values)) for attr, values in vocabulary.items())
+    rng = random.Random(seed)
+    for _ in range(count):
+        attr, values = rng.choice(slots)
+        yield attr, rng.choice(values)
+
+
+def benchmark(rules, events=10000, seed=0, check_every=1):
+    """Débit de mise à jour du conflit (événements/s) : réseau Rete contre ré-évaluation naïve de toutes les règles.
+
+    Après chaque événement, chaque moteur calcule l'ensemble des productions actives ; les deux
+    ensembles sont comparés tous les check_every événements (hors chronométrage).
+    """
+    stream = list(perception_events(rules, events, seed))
+    result = {"events": events}
+    agendas = {}
+    for label, cls in (("rete", ReteMatcher), ("naive", NaiveMatcher)):
+        matcher = cls(rules)
+        trace = []
+        start = time.perf_counter()
+        for i, (attr, value) in enumerate(stream):
+            matcher.set_slot(attr, value)
+            active = matcher.activations()
+            if i % check_every == 0:
+                trace.append(active)
+        seconds = time.perf_counter() - start
+        agendas[label] = [{p.index for p in active} for active in trace]
+        result[label] = {"seconds": seconds, "events_per_second": events / seconds if seconds else float("inf")}
+        if label == "rete":
+            result["network"] = matcher.stats()
+            result["beta_updates"] = matcher.beta_updates
+    result["equivalent"] = agendas["rete"] == agendas["naive"]
+    result["speedup"] = result["naive"]["seconds"] / result["rete"]["seconds"] if result["rete"]["seconds"] else None
+    return result
+
+
+if __name__ == "__main__":
+    for path in ("rules.ccml", "frs3.ccml"):
+        store = load_ccml(path)
+        report = benchmark(store.rules, events=20000)
+        print(f"{path} : {report['network']['productions']} production(s), "
+              f"{report['network']['alpha_memories']} mémoire(s) alpha, {report['network']['beta_nodes']} noeud(s) beta "
+              f"pour {report['network']['conditions']} condition(s)")
+        print(f"  Rete  : {report['rete']['events_per_second']:,.0f} événements/s")
+        print(f"  naïf  : {report['naive']['events_per_second']:,.0f} événements/s "
+              f"(x{report['speedup']:.1f}, résultats {'identiques' if report['equivalent'] else 'DIFFÉRENTS'})")
@@ -0,0 +1,174 @@
+import difflib
+import json
+
+from owlready2.base import rdf_type, owl_class
+
+from bulk_loader import BulkLoader
+from context_resolver import compile_context
+from property_index import get_property_index, short_name
+
+# Groupes du format scénario (pick&place.json), dans l'ordre de chargement
+SCENARIO_GROUPS = ("agents", "objects", "tools", "dispositions", "actions", "tasks")
+
+
+def class_index(world):
+    """{nom court: IRI} des classes nommées du monde, en une requête (premier IRI si le nom est ambigu)"""
+    index = {}
+    for (iri,) in world.graph.execute(
+            "SELECT r.iri FROM objs q, resources r WHERE q.p=? AND q.o=? AND q.s>0 AND r.storid=q.s ORDER BY q.s",
+            (rdf_type, owl_class)):
+        index.setdefault(short_name(iri), iri)
+    return index
+
+
+class ScenarioReport:
+    """Problèmes détectés avant chargement : types, références et propriétés non résolus"""
+
+    def __init__(self):
+        self.renamed_types = {}     # type écrit -> type retenu (espaces superflus)
+        self.unknown_types = {}     # type -> [noms des éléments]
+        self.unresolved = {}        # (élément, propriété) -> nom cible introuvable
+        self.unknown_properties = {}  # propriété -> nombre d'occurrences
+        self.duplicates = []
+
+    def __bool__(self):
+        return bool(self.renamed_types or self.unknown_types or self.unresolved
+                    or self.unknown_properties or self.duplicates)
+
+    def print(self, suggestions=None):
+        suggestions = suggestions or {}
+        for written, kept in self.renamed_types.items():
+            print(f"[Avertissement] Type {written!r} lu comme {kept!r}")
+        for type_name, names in self.unknown_types.items():
+            hint = f" (vouliez-vous dire {suggestions[type_name]!r} ?)" if type_name in suggestions else ""
+            print(f"[Avertissement] Type inconnu {type_name!r}{hint} : {len(names)} élément(s), ex. {names[0]}")
+        for (name, prop), target in self.unresolved.items():
+            print(f"[Avertissement] {name}.{prop} -> {target!r} : aucun élément de ce nom")
+        for prop, count in self.unknown_properties.items():
+            print(f"[Avertissement] Propriété inconnue {prop!r} ({count} occurrence(s)), ignorée")
+        for name in self.duplicates:
+            print(f"[Avertissement] Nom en double {name!r}, premier élément conservé")
+
+
+class ScenarioLoader:
+    """Chargeur du format groupé : {"agents": [{"name", "type", propriété: nom ou valeur}], "objects": [...], ...}.
+
+    Une première passe construit la table des symboles (nom -> type) et vérifie types, références et
+    propriétés ; chaque élément devient ensuite une entité NGSI-LD (urn:ngsi-ld:<Type>:<nom>, relations
+    vers les identifiants de la table) chargée par BulkLoader, comme les fichiers NGSI-LD. Les types sont
+    résolus par le contexte s'il est fourni, sinon par le nom court des classes du monde.
+    """
+
+    def __init__(self, onto, context=None, ontologies=None, batch_size=5000):
+        self.onto = onto
+        self.world = onto.world
+        self.ontologies = ontologies
+        self.batch_size = batch_size
+        self.raw_context = context
+        self.context = compile_context(context, ontologies) if context is not None else None
+        self.classes = class_index(self.world)
+        self.properties = get_property_index(self.world)
+        self.report = ScenarioReport()
+        self.symbols = {}       # nom -> identifiant NGSI-LD
+        self.types = {}         # type écrit -> type retenu, ou None
+
+    def _type(self, written):
+        if written in self.types:
+            return self.types[written]
+        kept = None
+        for candidate in dict.fromkeys((written, " ".join(written.split()))):
+            if (self.context is not None and self.context.expand(candidate) and self.world[self.context.expand(candidate)]) \
+                    or candidate in self.classes:
+                kept = candidate
+                break
+        if kept is not None and kept != written:
+            self.report.renamed_types[written] = kept
+        self.types[written] = kept
+        return kept
+
+    def _items(self, scenario):
+        for group in SCENARIO_GROUPS:
+            yield from scenario.get(group, ())
+        for group in scenario:
+            if group not in SCENARIO_GROUPS:
+                print(f"[Avertissement] Groupe {group!r} inconnu, chargé comme les autres")
+                yield from scenario[group]
+
+    def check(self, scenario):
+        """Première passe : table des symboles et rapport, sans rien écrire dans le monde"""
+        items = []
+        for item in self._items(scenario):
+            name = item["name"]
+            if name in self.symbols:
+                self.report.duplicates.append(name)
+                continue
+            type_names = item["type"] if isinstance(item["type"], list) else [item["type"]]
+            kept = [self._type(t) for t in type_names]
+            for written, resolved in zip(type_names, kept):
+                if resolved is None:
+                    self.report.unknown_types.setdefault(written, []).append(name)
+            main = next((t for t in kept if t), "Entity")
+            self.symbols[name] = f"urn:ngsi-ld:{main}:{name}"
+            items.append((item, [t for t in kept if t]))
+
+        for item, _ in items:
+            for prop, value in item.items():
+                if prop in ("name", "type"):
+                    continue
+                kind = self.properties.kind(prop)
+                if kind is None:
+                    self.report.unknown_properties[prop] = self.report.unknown_properties.get(prop, 0) + 1
+                elif kind == "object":
+                    for target in value if isinstance(value, list) else [value]:
+                        if target not in self.symbols:
+                            self.report.unresolved[(item["name"], prop)] = target
+        return items
+
+    def entities(self, items):
+        """Éléments vérifiés -> entités NGSI-LD (références introuvables et propriétés inconnues retirées)"""
+        for item, types in items:
+            entity = {"id": self.symbols[item["name"]], "type": types}
+            for prop, value in item.items():
+                if prop in ("name", "type") or prop in self.report.unknown_properties:
+                    continue
+                values = value if isinstance(value, list) else [value]
+                if self.properties.kind(prop) == "object":
+                    targets = [self.symbols[v] for v in values if v in self.symbols]
+                    if targets:
+                        entity[prop] = {"type": "Relationship", "object": targets[0] if len(targets) == 1 else targets}
+                else:
+                    entity[prop] = {"type": "Property", "value": values[0] if len(values) == 1 else values}
+            yield entity
+
+    def suggestions(self):
+        names = list(self.classes)
+        found = {}
+        for type_name in self.report.unknown_types:
+            close = difflib.get_close_matches(type_name.strip(), names, n=1)
+            if close:
+                found[type_name] = close[0]
+        return found
+
+    def load(self, scenario):
+        """Vérifie puis charge un scénario ; retourne le BulkLoader (compteurs)"""
+        items = self.check(scenario)
+        if self.report:
+            self.report.print(self.suggestions())
+        # Types retenus et nom court -> IRI pour ceux que le contexte ne définit pas
+        local = {t: self.classes[t] for t in self.types.values() if t and t in self.classes
+                 and not (self.context is not None and self.context.expand(t))}
+        context = [self.raw_context, local] if self.raw_context is not None else local
+        loader = BulkLoader(self.onto, context, self.ontologies, self.batch_size)
+        loader.load(self.entities(items))
+        loader.unresolved = loader.finish()
+        return loader
+
+
+def load_scenario(path, onto, context=None, ontologies=None, batch_size=5000):
+    """Charge un fichier scénario (pick&place.json) dans onto ; retourne le ScenarioLoader (rapport, symboles)"""
+    with open(path, "r") as f:
+        scenario = json.load(f)
+    loader = ScenarioLoader(onto, context, ontologies, batch_size)
+    loader.bulk = loader.load(scenario)
+    print(f"{loader.bulk.count} élément(s) chargé(s) depuis {path}")
+    return loader
@@ -0,0 +1,549 @@
+import time
+
+import owlready2
+from owlready2 import ThingClass, DataPropertyClass, TransitiveProperty, SymmetricProperty, LOADING
+from owlready2.base import rdf_type, from_literal, to_literal
+from owlready2.reasoning import _apply_inferred_obj_relations, _apply_inferred_data_relations
+from owlready2.rule import (Variable, ClassAtom, IndividualPropertyAtom, DatavaluedPropertyAtom,
+                            BuiltinAtom, SameIndividualAtom, DifferentIndividualsAtom)
+
+from incremental_reasoning import INFERENCES_ONTOLOGY
+from reasoner_cache import java_available
+from pipeline_trace import sync_reasoner
+
+# Comparaisons SWRL supportées (les autres built-ins rendent la règle non compilable)
+COMPARISONS = {
+    "equal": lambda a, b: a == b,
+    "notEqual": lambda a, b: a != b,
+    "lessThan": lambda a, b: a < b,
+    "lessThanOrEqual": lambda a, b: a <= b,
+    "greaterThan": lambda a, b: a > b,
+    "greaterThanOrEqual": lambda a, b: a >= b,
+}
+
+
+class UnsupportedRule(ValueError):
+    pass
+
+
+def literal_key(value):
+    """Clé de comparaison d'un littéral : True et 1, ou 2 et 2.0 ne se confondent pas entre types"""
+    if isinstance(value, bool):
+        return ("bool", value)
+    if isinstance(value, (int, float)):
+        return ("num", value)
+    return ("str", str(value))
+
+
+class Relation:
+    """Extension d'une propriété : paires (sujet, objet) indexées dans les deux sens"""
+
+    def __init__(self, transitive=False, symmetric=False):
+        self.pairs = set()
+        self.by_s = {}
+        self.by_o = {}
+        self.transitive = transitive
+        self.symmetric = symmetric
+
+    def _insert(self, s, o):
+        if (s, o) in self.pairs:
+            return False
+        self.pairs.add((s, o))
+        self.by_s.setdefault(s, set()).add(o)
+        self.by_o.setdefault(o, set()).add(s)
+        return True
+
+    def add(self, s, o):
+        """Ajoute (s, o) et sa fermeture (symétrie, transitivité) ; retourne les paires nouvelles"""
+        added, todo = [], [(s, o)]
+        while todo:
+            pair = todo.pop()
+            if not self._insert(*pair):
+                continue
+            added.append(pair)
+            a, b = pair
+            if self.symmetric:
+                todo.append((b, a))
+            if self.transitive:
+                todo.extend((x, b) for x in list(self.by_o.get(a, ())))
+                todo.extend((a, y) for y in list(self.by_s.get(b, ())))
+        return added
+
+
+class CompiledRule:
+    """Règle SWRL compilée : atomes (type, prédicat, arguments) et un plan de jointure par atome delta"""
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.name = rule.name
+        self.body = [self._atom(atom) for atom in rule.body]
+        self.head = [self._atom(atom) for atom in rule.head]
+        for kind, _, _ in self.head:
+            if kind not in ("class", "object", "data"):
+                raise UnsupportedRule(f"{self.name} : atome {kind} en tête")
+        head_vars = {a for _, _, args in self.head for a in args if isinstance(a, str)}
+        body_vars = {a for _, _, args in self.body for a in args if isinstance(a, str)}
+        if head_vars - body_vars:
+            raise UnsupportedRule(f"{self.name} : variable(s) {sorted(head_vars - body_vars)} absente(s) du corps")
+        self.plans = {i: self._plan(i) for i, atom in enumerate(self.body) if atom[0] in ("class", "object", "data")}
+        if not self.plans:
+            raise UnsupportedRule(f"{self.name} : corps sans atome de classe ou de propriété")
+
+    @staticmethod
+    def _argument(value):
+        if isinstance(value, Variable):
+            return value.name               # variable : chaîne
+        if hasattr(value, "storid"):
+            return ("ind", value.storid)    # individu constant
+        return ("lit", literal_key(value), to_literal(value))
+
+    def _atom(self, atom):
+        args = tuple(self._argument(a) for a in atom.arguments)
+        if isinstance(atom, ClassAtom):
+            if not isinstance(atom.class_predicate, ThingClass):
+                raise UnsupportedRule(f"{self.name} : expression de classe {atom.class_predicate}")
+            return ("class", atom.class_predicate, args)
+        if isinstance(atom, IndividualPropertyAtom):
+            return ("object", atom.property_predicate, args)
+        if isinstance(atom, DatavaluedPropertyAtom):
+            return ("data", atom.property_predicate, args)
+        if isinstance(atom, SameIndividualAtom):
+            return ("builtin", "equal", args)
+        if isinstance(atom, DifferentIndividualsAtom):
+            return ("builtin", "notEqual", args)
+        if isinstance(atom, BuiltinAtom) and atom.builtin in COMPARISONS:
+            return ("builtin", atom.builtin, args)
+        raise UnsupportedRule(f"{self.name} : atome non supporté {atom}")
+
+    def _plan(self, first):
+        """Ordre des atomes quand l'atome first parcourt le delta : le plus lié d'abord, built-ins dès que possible"""
+        bound = {a for a in self.body[first][2] if isinstance(a, str)}
+        order, remaining = [first], [i for i in range(len(self.body)) if i != first]
+        while remaining:
+            def score(i):
+                # Tests (tout lié) d'abord, puis propriétés à un côté lié, classes à parcourir, produits en dernier
+                kind, _, args = self.body[i]
+                free = len({a for a in args if isinstance(a, str) and a not in bound})
+                if free == 0:
+                    return 0
+                if kind == "builtin":
+                    return 4
+                if kind == "class":
+                    return 2
+                return 1 if free == 1 else 3
+            best = min(remaining, key=score)
+            if self.body[best][0] == "builtin" and score(best) == 4:
+                raise UnsupportedRule(f"{self.name} : built-in sur une variable non liée")
+            order.append(best)
+            remaining.remove(best)
+            bound.update(a for a in self.body[best][2] if isinstance(a, str))
+        return order
+
+
+class SwrlEngine:
+    """Moteur SWRL en chaînage avant, évaluation semi-naïve, sans JVM.
+
+    Les règles (clauses de Horn) sont compilées en jointures indexées sur les extensions des classes et
+    propriétés qu'elles utilisent, lues une fois dans le quadstore (assertions et inférences déjà présentes,
+    sous-classes, sous-propriétés et inverses compris). À chaque tour, seules les instanciations qui utilisent
+    au moins un fait nouveau du tour précédent sont calculées, jusqu'au point fixe. Les faits déduits sont
+    ajoutés à l'ontologie d'inférences comme le fait sync_reasoner(infer_property_values=True).
+
+    La TBox n'est pas classifiée : les types inférés par HermiT doivent déjà être dans le quadstore.
+    """
+
+    def __init__(self, debug=0):
+        self.debug = debug
+        self.stats = {}
+
+    # --- chargement ---
+    def _prepare(self, world, rules):
+        self.world = world
+        self.graph = world.graph
+        self.compiled = []
+        for rule in rules:
+            try:
+                self.compiled.append(CompiledRule(rule))
+            except UnsupportedRule as e:
+                print(f"[Avertissement] Règle ignorée par le moteur natif : {e}")
+        self.classes = {}       # storid de classe -> ensemble d'individus
+        self.relations = {}     # storid de propriété -> Relation
+        self.listeners = {}     # storid de classe/propriété assertée -> [(clé, inverse)]
+        self.raw = {}           # clé de littéral -> (o, d) du quadstore
+        for compiled in self.compiled:
+            for kind, entity, _ in compiled.body + compiled.head:
+                if kind == "class":
+                    self._load_class(entity)
+                elif kind in ("object", "data"):
+                    self._load_property(entity, kind)
+
+    def _value(self, o, d):
+        key = literal_key(from_literal(o, d))
+        self.raw.setdefault(key, (o, d))
+        return ("lit", key)
+
+    def _load_class(self, cls):
+        if cls.storid in self.classes:
+            return
+        members = self.classes[cls.storid] = set()
+        storids = [c.storid for c in cls.descendants()]
+        for c in storids:
+            self.listeners.setdefault(("class", c), []).append((("class", cls.storid), False))
+        for i in range(0, len(storids), 500):
+            chunk = storids[i:i + 500]
+            members.update(s for (s,) in self.graph.execute(
+                f"SELECT s FROM objs WHERE p=? AND o IN ({','.join('?' * len(chunk))})",
+                (rdf_type, *chunk)) if s > 0)
+
+    def _load_property(self, prop, kind):
+        if prop.storid in self.relations:
+            return
+        # L'inverse d'une propriété transitive (symétrique) l'est aussi : isPartOf pour hasPart
+        inverse = getattr(prop, "inverse", None) if kind == "object" else None
+        characteristics = [p for p in (prop, inverse) if p is not None] if kind == "object" else []
+        relation = self.relations[prop.storid] = Relation(
+            transitive=any(issubclass(p, TransitiveProperty) for p in characteristics),
+            symmetric=any(issubclass(p, SymmetricProperty) for p in characteristics))
+        sources = [(p.storid, False) for p in prop.descendants()]
+        if inverse is not None:
+            sources += [(p.storid, True) for p in inverse.descendants()]
+        for p, reverse in sources:
+            self.listeners.setdefault(("prop", p), []).append((("prop", prop.storid), reverse))
+            if kind == "object":
+                for s, o in self.graph.execute("SELECT s, o FROM objs WHERE p=?", (p,)):
+                    if s > 0 and o > 0:
+                        relation.add(*((o, s) if reverse else (s, o)))
+            else:
+                for s, o, d in self.graph.execute("SELECT s, o, d FROM datas WHERE p=?", (p,)):
+                    if s > 0:
+                        relation.add(s, self._value(o, d))
+
+    # --- évaluation ---
+    def _resolve(self, arg, binding):
+        if isinstance(arg, str):
+            return binding.get(arg)
+        if arg[0] == "lit":
+            self.raw.setdefault(arg[1], arg[2])
+            return ("lit", arg[1])
+        return arg[1]
+
+    def _match(self, atom, binding, source=None):
+        """Extensions de binding qui satisfont atom (source : ensemble delta à utiliser à la place de l'extension)"""
+        kind, entity, args = atom
+        if kind == "builtin":
+            values = [self._resolve(a, binding) for a in args]
+            values = [from_literal(*self.raw[v[1]]) if isinstance(v, tuple) else v for v in values]
+            if COMPARISONS[entity](*values):
+                yield binding
+            return
+
+        if kind == "class":
+            members = self.classes[entity.storid] if source is None else source
+            value = self._resolve(args[0], binding)
+            if value is not None:
+                if value in members:
+                    yield binding
+            else:
+                for member in members:
+                    yield {**binding, args[0]: member}
+            return
+
+        relation = self.relations[entity.storid]
+        s, o = self._resolve(args[0], binding), self._resolve(args[1], binding)
+        if source is not None:
+            candidates = ((a, b) for a, b in source if (s is None or a == s) and (o is None or b == o))
+        elif s is not None and o is not None:
+            candidates = [(s, o)] if (s, o) in relation.pairs else []
+        elif s is not None:
+            candidates = ((s, b) for b in relation.by_s.get(s, ()))
+        elif o is not None:
+            candidates = ((a, o) for a in relation.by_o.get(o, ()))
+        else:
+            candidates = relation.pairs
+        for a, b in candidates:
+            extended = dict(binding)
+            if isinstance(args[0], str):
+                extended[args[0]] = a
+            if isinstance(args[1], str):
+                if args[0] == args[1] and a != b:
+                    continue
+                extended[args[1]] = b
+            yield extended
+
+    def _join(self, compiled, first, delta):
+        bindings = [{}]
+        for position, i in enumerate(compiled.plans[first]):
+            bindings = [extended for binding in bindings
+                        for extended in self._match(compiled.body[i], binding, delta if position == 0 else None)]
+            if not bindings:
+                return []
+        return bindings
+
+    def _head_facts(self, compiled, bindings):
+        for binding in bindings:
+            for kind, entity, args in compiled.head:
+                values = tuple(self._resolve(a, binding) for a in args)
+                if kind == "class":
+                    yield ("class", entity.storid), values
+                else:
+                    yield ("prop", entity.storid), values
+
+    def _assert(self, key, values, delta):
+        """Ajoute un fait aux extensions chargées qui en dépendent ; les ajouts effectifs vont dans delta"""
+        added = False
+        for (target_kind, target), reverse in self.listeners.get(key, ()):
+            if target_kind == "class":
+                if values[0] not in self.classes[target]:
+                    self.classes[target].add(values[0])
+                    delta.setdefault(("class", target), set()).add(values)
+                    added = True
+            else:
+                pair = (values[1], values[0]) if reverse else values
+                for new in self.relations[target].add(*pair):
+                    delta.setdefault(("prop", target), set()).add(new)
+                    added = True
+        return added
+
+    def _size(self, atom):
+        kind, entity, _ = atom
+        return len(self.classes[entity.storid] if kind == "class" else self.relations[entity.storid].pairs)
+
+    def _delta_source(self, atom, delta):
+        kind, entity, _ = atom
+        if kind == "class":
+            facts = delta.get(("class", entity.storid))
+            return {values[0] for values in facts} if facts else None
+        return delta.get(("prop", entity.storid))
+
+    def infer(self, world, rules):
+        """Calcule le point fixe ; retourne les faits déduits absents du quadstore [(clé, valeurs)]"""
+        start = time.perf_counter()
+        self._prepare(world, rules)
+        derived, rounds = [], 0
+
+        # Premier tour naïf : toutes les instanciations ; ensuite seulement celles qui touchent le delta
+        delta = None
+        while True:
+            rounds += 1
+            new_delta = {}
+            for compiled in self.compiled:
+                start_atom = min(compiled.plans, key=lambda i: self._size(compiled.body[i]))
+                for first in compiled.plans:
+                    if delta is None:
+                        if first != start_atom:
+                            continue
+                        source = None
+                    else:
+                        source = self._delta_source(compiled.body[first], delta)
+                        if not source:
+                            continue
+                    for key, values in self._head_facts(compiled, self._join(compiled, first, source)):
+                        if self._assert(key, values, new_delta):
+                            derived.append((key, values))
+            if not new_delta:
+                break
+            delta = new_delta
+
+        self.stats = {"rules": len(self.compiled), "rounds": rounds, "derived": len(derived),
+                      "seconds": time.perf_counter() - start}
+        if self.debug:
+            print(f"[SWRL] {self.stats}")
+        return derived
+
+    # --- écriture ---
+    def write(self, derived, inferences):
+        """Ajoute les faits déduits à l'ontologie d'inférences ; retourne leur nombre"""
+        world = inferences.world
+        written = 0
+        for (kind, storid), values in derived:
+            entity = world._get_by_storid(storid)
+            if kind == "class":
+                s = values[0]
+                if world._has_obj_triple_spo(s, rdf_type, storid):
+                    continue
+                inferences._add_obj_triple_spo(s, rdf_type, storid)
+                individual = world._entities.get(s)
+                if individual is not None and entity not in individual.is_a:
+                    with LOADING:
+                        individual.is_a._append(entity)
+            elif isinstance(entity, DataPropertyClass):
+                o, d = self.raw[values[1][1]]
+                if world._has_data_triple_spod(values[0], storid, o, d):
+                    continue
+                _apply_inferred_data_relations(world, inferences, self.debug, [(values[0], entity, o, d)])
+            else:
+                if world._has_obj_triple_spo(values[0], storid, values[1]):
+                    continue
+                _apply_inferred_obj_relations(world, inferences, self.debug, [(values[0], entity, values[1])])
+            written += 1
+        return written
+
+    def run(self, world, rules, inferences=None):
+        """Évalue les règles et écrit les faits déduits ; retourne le nombre de triplets ajoutés"""
+        derived = self.infer(world, rules)
+        return self.write(derived, inferences or world.get_ontology(INFERENCES_ONTOLOGY))
+
+    def evaluate(self, world, rules, inferences):
+        """Interface d'évaluateur de IncrementalReasoner"""
+        return self.run(world, rules, inferences)
+
+
+def run_rules(ontologies, debug=0):
+    """Applique en Python les règles SWRL des ontologies ; retourne le moteur (stats)"""
+    ontologies = list(ontologies)
+    engine = SwrlEngine(debug)
+    engine.run(ontologies[0].world, [rule for onto in ontologies for rule in onto.rules()])
+    return engine
+
+
+def check_equivalence(ontologies, debug=0):
+    """Compare les faits déduits par le moteur natif à ceux de HermiT, sur les prédicats des têtes de règles.
+
+    Le moteur est évalué sans écrire, puis sync_reasoner est lancé : le monde contient ensuite les
+    inférences de HermiT. Retourne {"missing": déduits par HermiT seulement, "extra": par le moteur seulement},
+    ou None sans Java (comparaison ignorée).
+    """
+    if not java_available():
+        print(f"[Avertissement] Java introuvable ({owlready2.JAVA_EXE}) : comparaison avec HermiT ignorée")
+        return None
+    ontologies = list(ontologies)
+    world = ontologies[0].world
+    rules = [rule for onto in ontologies for rule in onto.rules()]
+    engine = SwrlEngine(debug)
+    derived = engine.infer(world, rules)
+    native = {(key[1], values) for key, values in derived}
+    heads = {(kind, entity.storid) for compiled in engine.compiled for kind, entity, _ in compiled.head}
+
+    def snapshot():
+        facts = set()
+        for kind, storid in heads:
+            if kind == "class":
+                facts.update((storid, (s,)) for (s,) in world.graph.execute(
+                    "SELECT s FROM objs WHERE p=? AND o=?", (rdf_type, storid)))
+            elif kind == "object":
+                facts.update((storid, (s, o)) for s, o in world.graph.execute(
+                    "SELECT s, o FROM objs WHERE p=?", (storid,)))
+            else:
+                facts.update((storid, (s, engine._value(o, d))) for s, o, d in world.graph.execute(
+                    "SELECT s, o, d FROM datas WHERE p=?", (storid,)))
+        return facts
+
+    before = snapshot()
+    start = time.perf_counter()
+    sync_reasoner(ontologies, infer_property_values=True, ignore_unsupported_datatypes=True, debug=debug)
+    hermit_seconds = time.perf_counter() - start
+    hermit = snapshot() - before
+
+    report = {"missing": hermit - native, "extra": native - hermit,
+              "native_seconds": engine.stats["seconds"], "hermit_seconds": hermit_seconds}
+    iri = world._unabbreviate
+    for label, facts in (("HermiT seulement", report["missing"]), ("moteur natif seulement", report["extra"])):
+        for storid, values in sorted(facts, key=str):
+            print(f"[Équivalence] {label} : {iri(storid)} {values}")
+    print(f"[Équivalence] {len(native)} fait(s) natif(s), {len(hermit)} fait(s) HermiT, "
+          f"{len(report['missing'])} manquant(s), {len(report['extra'])} en trop "
+          f"({report['native_seconds'] * 1000:.1f} ms contre {hermit_seconds:.1f} s)")
+    return report
+
+
+# Monde de test : les règles du pipeline en réduction, avec sous-classes, propriété transitive, inverse
+# et symétrique. Pas de built-in (HermiT ne les prend pas en charge).
+FIXTURE_RULES = {
+    "HasAbilityRule": "Screwer(?t) ^ isPartOf(?t, ?c) ^ Cobot(?c) -> hasAbility(?c, canScrew)",
+    "CanPerformRule": "Action(?a) ^ requiresAbility(?a, ?ab) ^ Cobot(?co) ^ hasAbility(?co, ?ab) -> canPerform(?co, ?a)",
+    "FallbackToCobot": "Action(?a) ^ Operator(?op) ^ performedBy(?a, ?op) ^ hasExecutionState(?a, executionStatePending)"
+                       " ^ Cobot(?co) ^ canPerform(?co, ?a) -> performedBy(?a, ?co)",
+    "CollaborativeRule": "nextTo(?x, ?y) ^ Operator(?y) -> Collaborative(?x)",
+}
+
+# Faits que HermiT déduit sur le monde de test (prédicat de tête, arguments) : fermeture des règles sur
+# Screwer ⊑ Tool, hasPart transitive (ur5 -> gripper -> screwer), isPartOf inverse de hasPart, nextTo symétrique
+FIXTURE_EXPECTED = {
+    ("hasAbility", ("ur5", "canScrew")),
+    ("canPerform", ("ur5", "action_1")),
+    ("canPerform", ("ur5", "action_2")),
+    ("performedBy", ("action_1", "ur5")),
+    ("Collaborative", ("ur5",)),
+}
+
+
+def fixture_world():
+    """Monde de test en mémoire (voir FIXTURE_RULES) ; retourne (monde, ontologie)"""
+    from owlready2 import World, Thing, ObjectProperty, Imp
+
+    world = World()
+    onto = world.get_ontology("http://swrl-engine-fixture/")
+    with onto:
+        class Agent(Thing): pass
+        class Cobot(Agent): pass
+        class Operator(Agent): pass
+        class Tool(Thing): pass
+        class Screwer(Tool): pass
+        class Action(Thing): pass
+        class Capability(Thing): pass
+        class ExecutionStateRegion(Thing): pass
+        class Collaborative(Thing): pass
+        class hasPart(ObjectProperty, TransitiveProperty): pass
+        class isPartOf(ObjectProperty):
+            inverse_property = hasPart
+        class nextTo(ObjectProperty, SymmetricProperty): pass
+        class hasAbility(ObjectProperty): pass
+        class requiresAbility(ObjectProperty): pass
+        class canPerform(ObjectProperty): pass
+        class performedBy(ObjectProperty): pass
+        class hasExecutionState(ObjectProperty): pass
+
+        can_screw = Capability("canScrew")
+        pending, active = ExecutionStateRegion("executionStatePending"), ExecutionStateRegion("executionStateActive")
+        ur5, operator = Cobot("ur5"), Operator("operator_1")
+        gripper, screwer = Thing("gripper"), Screwer("screwer")
+        ur5.hasPart = [gripper]
+        gripper.hasPart = [screwer]
+        operator.nextTo = [ur5]
+        for name, state in (("action_1", pending), ("action_2", active)):
+            action = Action(name)
+            action.performedBy = [operator]
+            action.requiresAbility = [can_screw]
+            action.hasExecutionState = [state]
+
+        for name, rule in FIXTURE_RULES.items():
+            Imp(name=name).set_as_rule(rule)
+    return world, onto
+
+
+def check_fixture(debug=0):
+    """Vérifie le moteur natif sur le monde de test : faits attendus (FIXTURE_EXPECTED), puis HermiT si Java
+    est disponible (sinon cette comparaison est ignorée). Retourne True si tout concorde."""
+    world, onto = fixture_world()
+    engine = SwrlEngine(debug)
+    derived = engine.infer(world, list(onto.rules()))
+
+    def name(storid):
+        return world._get_by_storid(storid).name
+
+    native = {(name(storid), tuple(name(x) for x in values)) for (_, storid), values in derived}
+    for label, facts in (("attendu seulement", FIXTURE_EXPECTED - native), ("moteur natif seulement", native - FIXTURE_EXPECTED)):
+        for fact in sorted(facts):
+            print(f"[Équivalence] {label} : {fact}")
+    ok = native == FIXTURE_EXPECTED
+    print(f"[Équivalence] Monde de test : {len(native)} fait(s) natif(s), {len(FIXTURE_EXPECTED)} attendu(s)"
+          f"{'' if ok else ' -> différence'}")
+
+    report = check_equivalence([onto], debug)
+    if report is not None:
+        ok = ok and not report["missing"] and not report["extra"]
+    return ok
+
+
+if __name__ == "__main__":
+    import sys
+    if "--fixture" in sys.argv[1:]:
+        # Monde de test en mémoire : utilisable sans onto/ ni Java
+        raise SystemExit(0 if check_fixture() else 1)
+
+    # Vérification sur l'ontologie produite par script.py (règles comprises)
+    from ontology_cache import load_base_ontologies
+    world, _ = load_base_ontologies()
+    onto_main = world.get_ontology("onto/main.owl").load()
+    report = check_equivalence([onto_main])
+    raise SystemExit(1 if report and (report["missing"] or report["extra"]) else 0)
@@ -0,0 +1,132 @@
+from owlready2 import *
+
+from change_log import version
+
+TBOX_FILES = ("onto/ssn.rdf", "onto/SOMA.owl", "onto/DUL.owl")
+
+
+def _set(entity, attribute, values):
+    """Affecte une liste (domain, range...) seulement si elle diffère : rien n'est réécrit sinon"""
+    if list(getattr(entity, attribute)) != values:
+        setattr(entity, attribute, values)
+
+
+def _add_equivalence(cls, expression):
+    """Ajoute une équivalence absente ; une expression identique déjà présente n'est pas dupliquée"""
+    if all(str(existing) != str(expression) for existing in cls.equivalent_to):
+        cls.equivalent_to.append(expression)
+
+
+def extend_tbox(onto_ssn, onto_soma, onto_dul, save=True):
+    """Extensions du TBox utilisées par le pipeline : domaines de ssn, mouvements et Screwability dans SOMA,
+    propriétés des actions et des tâches dans DUL.
+
+    Idempotent : un second appel ne modifie aucun triplet. save=True réécrit les fichiers locaux
+    (onto/ssn.rdf, onto/*.owl) des seules ontologies modifiées ; retourne la liste de ces ontologies.
+    """
+    ontologies = (onto_ssn, onto_soma, onto_dul)
+    versions = [version(onto) for onto in ontologies]
+
+    _set(onto_ssn.hasInput, "domain", [onto_dul.Action])
+    _set(onto_ssn.hasInput, "range", [onto_dul.Object])
+    _set(onto_ssn.hasOutput, "domain", [onto_dul.Action])
+    _set(onto_ssn.hasOutput, "range", [onto_dul.Object])
+
+    with onto_soma:
+        class hasGoalLocalization(ObjectProperty):
+            domain = [onto_soma.Positioning]
+            range = [onto_soma.Localization]
+            comment = ["Relates a Positioning task to the target Localization where the object should be placed."]
+        class Screwability(onto_soma.Disposition):
+            equivalent_to = [
+                onto_soma.Disposition
+                & (onto_dul.isDescribedBy.exactly(1,
+                    onto_soma.Affordance
+                    & (onto_soma.definesBearer.exactly(1, onto_dul.Role))
+                    & (onto_soma.definesTrigger.exactly(1, onto_dul.Role))
+                    & (onto_dul.definesTask.exactly(1, onto_dul.Task))
+                ))
+            ]
+            comment = [
+                "Capability representing the potential to perform a screwing task, "
+                "characterized by its associated affordance, trigger, bearer, and task."
+            ]
+        class Rotation(onto_soma.Motion): pass
+        class Translation(onto_soma.Motion): pass
+        class HelicalMotion(onto_soma.Motion): pass
+
+        # Définir les propriétés d’objet (nommées : retrouvées telles quelles au passage suivant)
+        class hasRotation(ObjectProperty):
+            domain = [onto_soma.Motion]
+            range = [Rotation]
+
+        class hasTranslation(ObjectProperty):
+            domain = [onto_soma.Motion]
+            range = [Translation]
+
+        # Définir les propriétés de données (optionnel)
+        class hasAngle(DataProperty):
+            domain = [Rotation]
+            range = [float]
+
+        class hasDistance(DataProperty):
+            domain = [Translation]
+            range = [float]
+
+        # Définir l'équivalence logique : HelicalMotion ≡ Movement ⊓ ∃hasRotation.Rotation ⊓ ∃hasTranslation.Translation
+        _add_equivalence(HelicalMotion,
+            onto_soma.Motion 
+            & hasRotation.some(Rotation)
+            & hasTranslation.some(Translation)
+        )
+
+        class hasPitch(DataProperty):
+            domain = [HelicalMotion]
+            range = [float]
+            comment = [
+                "The thread pitch of the motion, expressed in millimeters (e.g., 1.5)."
+            ]
+
+    
+        class isMotionFor(ObjectProperty):
+            domain = [HelicalMotion]
+            range = [onto_dul.Task]
+            comment = [
+                "Links the helical motion to the task that requires it (e.g., ScrewingTask)."
+            ]
+
+
+    with onto_dul:
+        class performedBy(ObjectProperty):
+            domain=[onto_dul.Action]
+            range=[onto_dul.Agent]
+            comment=["Represents the relationship between an action and the agent (e.g., robot or human) performing that action."]
+        
+        class canPerform(ObjectProperty):
+            domain = [onto_dul.Agent]
+            range = [onto_dul.Action]
+            comment = ["Indicates that an agent has the ability or authorization to perform a given action."]
+
+        class isFirstSubtask(DataProperty,FunctionalProperty):
+            domain = [onto_dul.Task]  # apply to tasks
+            range = [bool]  
+            comment = ["Mark the first subtask of a parent task"]
+
+        class isLastSubtask(DataProperty,FunctionalProperty):
+            domain = [onto_dul.Task]  #apply to tasks
+            range = [bool]   
+            comment = ["Mark the last subtask of a parent task"]
+        class hasStepNumber(DataProperty):
+            domain = [onto_dul.Task]
+            range = [str]
+            comment = ["Indicates the step number in a sequence of tasks."]
+        class hasActionNumber(DataProperty):
+            domain=[onto_dul.Action]
+            range=[str]
+
+    changed = [onto for onto, before in zip(ontologies, versions) if version(onto) != before]
+    if save:
+        for onto, file in zip(ontologies, TBOX_FILES):
+            if onto in changed:
+                onto.save(file=file)
+    return changed
@@ -1,43 +1,19 @@
 from owlready2 import *
 import json
+from ontology_cache import load_base_ontologies
+from reasoning_delta import ReasoningSnapshot
+from ngsi_export import NgsiLdExporter, compact_context
 
 def load_all_dependencies():
-    deps = [
-        "onto/ssn.rdf",
-        "onto/sosa.rdf",
-        "onto/SysAgent.owl",
-        "onto/CognitionOnto.owl",
-        "onto/SOMA.owl",
-        "onto/DUL.owl",
-        "onto/AI4C2PS-core.owl"
-    ]
-    return [get_ontology(f"file://{path}").load() for path in deps]
+    # Ontologies de base ouvertes depuis le cache SQLite, sans re-parser le RDF/XML
+    world, ontologies = load_base_ontologies()
+    return world, list(ontologies.values())
 
-# Extraire les namespaces des classes instanciées et des propriétés
+# Extraire les namespaces des classes instanciées et des propriétés utilisées
 def generate_ngsi_ld_context(onto):
-    context = {
-        "@context": [
-            "https://uri.etsi.org/ngsi-ld/v1/ngsi-ld-core-context-v1.jsonld",
-            "https://schema.lab.fiware.org/ld/context"
-        ]
-    }
+    # Un seul objet de contexte (préfixes + termes compacts), calculé par requêtes d'agrégat
+    return compact_context(onto)
 
-    # Parcours des classes de l'ontologie, mais uniquement celles ayant des instances
-    for cls in onto.classes():
-        # Si la classe a des instances, on l'ajoute au contexte
-        if len(cls.instances()) > 0:  # La classe a des individus instanciés
-            ns = cls.iri.split("#")[0]  # Extrait le namespace à partir de l'IRI de la classe
-            context["@context"].append({cls.name : ns})
-
-    # Ajouter les propriétés de l'ontologie au contexte
-    for prop in onto.object_properties() :
-        ns = prop.iri.split("#")[0]  # Extrait le namespace de la propriété
-        context["@context"].append({prop.name: ns})
-    for prop in onto.data_properties():
-        ns = prop.iri.split("#")[0]
-        context["@context"].append({prop.name: ns})
-        
-    return context
 def get_first_declared_class(inst):
     """Récupère la première classe déclarée dans le fichier OWL"""
     # Accès direct à la déclaration RDF de l'instance
@@ -61,26 +37,8 @@ def get_first_declared_class(inst):
     return "Entity"
 # Enregistrer l'état pré-raisonnement des individus
 def record_pre_reasoning_state(onto):
-    state = {}
-    for inst in onto.individuals():
-        # Capture les classes directes
-        classes = {cls for cls in inst.is_a if isinstance(cls, ThingClass)}
-        
-        # Capture les propriétés
-        obj_props = {}
-        for prop in onto.object_properties():
-            obj_props[prop] = set(prop[inst])
-        
-        data_props = {}
-        for prop in onto.data_properties():
-            data_props[prop] = set(prop[inst])
-        
-        state[inst] = {
-            "classes": classes,
-            "object_properties": obj_props,
-            "data_properties": data_props
-        }
-    return state
+    # Instantané du quadstore (journal des modifications) : le delta se calcule sur les triplets ajoutés
+    return ReasoningSnapshot(onto.world)
 
 def iri_to_ngsi_ld(inst):
     """Génère un IRI NGSI-LD avec le premier type déclaré"""
@@ -90,39 +48,10 @@ def iri_to_ngsi_ld(inst):
 def extract_ontology_to_ngsi_ld(onto, context):
     sync_reasoner([onto], infer_property_values=True, ignore_unsupported_datatypes=True)
 
-    entities = []
+    # Entités construites en une passe sur le quadstore (triplets groupés par sujet)
+    entities = NgsiLdExporter(onto).export()
     rules = []
 
-    for inst in onto.individuals():
-        classes = [cls.name for cls in inst.is_a if isinstance(cls, ThingClass)]
-        if not classes:
-            continue
-        main_class = classes[0]
-        entity = {
-            "id": iri_to_ngsi_ld(inst),
-            "type": list(set(cls.name for cls in inst.is_a if isinstance(cls, ThingClass))),
-            "name": inst.name
-        }
-
-        for prop in onto.object_properties():
-            values = list(prop[inst])
-            if values:
-                objects = [iri_to_ngsi_ld(v) for v in values]
-                entity[prop.name] = {
-                    "type": "Relationship",
-                    "object": objects[0] if len(objects) == 1 else objects
-                }
-
-        for prop in onto.data_properties():
-            values = list(prop[inst])
-            if values:
-                entity[prop.name] = {
-                    "type": "Property",
-                    "value": values[0] if len(values) == 1 else values
-                }
-
-        entities.append(entity)
-
     for rule in onto.rules():
         try:
             rule_name = rule.name if rule.name else f"Rule_{abs(hash(rule))}"
@@ -136,17 +65,23 @@ def extract_ontology_to_ngsi_ld(onto, context):
 
     return {"context": context, "entities": entities, "rules": rules}
 
-# Chargement des ontologies
-ontos = load_all_dependencies()
-onto_main = get_ontology("file://onto/main_onto.owl").load()
-record_pre_reasoning_state(onto_main)
+if __name__ == "__main__":
+    # Chargement des ontologies
+    world, ontos = load_all_dependencies()
+    onto_main = world.get_ontology("file://onto/main_onto.owl").load()
+    pre_reasoning_state = record_pre_reasoning_state(onto_main)
+
+    # Génération automatique du contexte NGSI-LD
+    ngsi_ld_context = generate_ngsi_ld_context(onto_main)
 
-# Génération automatique du contexte NGSI-LD
-ngsi_ld_context = generate_ngsi_ld_context(onto_main)
+    # Extraction des données avec inférences et ajout du contexte
+    ontology_json = extract_ontology_to_ngsi_ld(onto_main, ngsi_ld_context)
 
-# Extraction des données avec inférences et ajout du contexte
-ontology_json = extract_ontology_to_ngsi_ld(onto_main, ngsi_ld_context)
+    # Sauvegarde
+    with open("output.json", "w") as f:
+        json.dump(ontology_json, f, indent=2)
 
-# Sauvegarde
-with open("output.json", "w") as f:
-    json.dump(ontology_json, f, indent=2)
+    # Inférences du raisonnement (nouveaux types et nouvelles relations), à côté de l'export NGSI-LD
+    reasoning_delta = pre_reasoning_state.delta()
+    reasoning_delta.save("output_inferences.json", iri_to_ngsi_ld)
+    print(f"{len(reasoning_delta)} assertion(s) inférée(s)")
@@ -0,0 +1,155 @@
+import json
+import random
+
+# Le contexte (types et propriétés) est repris du scénario de référence
+CONTEXT_SOURCE = "screwing.json"
+
+# Types des sous-tâches, dans l'ordre de rotation (comme les étapes de screwing.json)
+SUBTASK_TYPES = ("Holding", "Positioning", "LookingFor", "Orienting", "Perceiving", "Screwing")
+
+
+def _id(type_name, name):
+    return f"urn:ngsi-ld:{type_name}:{name}"
+
+
+def _rel(*targets):
+    rels = [{"type": "Relationship", "object": t} for t in targets]
+    return rels[0] if len(rels) == 1 else rels
+
+
+def _prop(value):
+    return {"type": "Property", "value": value}
+
+
+def _entity(type_name, name, **props):
+    types = type_name if isinstance(type_name, list) else [type_name]
+    entity = {"id": _id(types[0], name), "type": type_name, "name": name}
+    entity.update(props)
+    return entity
+
+
+def generate_workcell(agents=2, tools=2, tasks=3, actions=None, subtasks=4, seed=0, context=None):
+    """Cellule de travail synthétique au format NGSI-LD de screwing.json.
+
+    - agents : cobots et opérateurs en alternance (le premier cobot s'appelle ur5, comme dans script.py) ;
+    - tools : outils répartis sur les cobots (hasPart), chacun avec une disposition (screwability /
+      graspability) décrite par une affordance, pour la règle HasAbilityRule ;
+    - tasks : tâches parentes (hasStepNumber "k") chaînées par directlyFollows, chacune avec
+      `subtasks` sous-tâches (hasPart, "k.s") elles aussi chaînées ;
+    - actions : actions exécutant les sous-tâches (isExecutedIn), une par sous-tâche par défaut ;
+      au-delà, des actions sans tâche. Une action sur trois est en attente (règle FallbackToCobot).
+    La même graine donne le même document.
+    """
+    rng = random.Random(seed)
+    if context is None:
+        with open(CONTEXT_SOURCE, "r") as f:
+            context = json.load(f)["@context"]
+    if actions is None:
+        actions = tasks * subtasks
+    graph = []
+
+    # Éléments partagés : états d'exécution, rôles, affordances, capacités requises
+    active = _id("ExecutionStateRegion", "executionStateActive")
+    pending = _id("ExecutionStateRegion", "executionStatePending")
+    grasping_tool, screwing_tool = _id("Grasper", "graspingTool"), _id("Screwer", "screwingTool")
+    bearer = _id("Patient", "screwingBearer")
+    graph += [
+        _entity("ExecutionStateRegion", "executionStateActive"),
+        _entity("ExecutionStateRegion", "executionStatePending"),
+        _entity("Grasper", "graspingTool"),
+        _entity("Screwer", "screwingTool"),
+        _entity("Patient", "screwingBearer"),
+        _entity("Affordance", "screwable", definesBearer=_rel(bearer), definesTrigger=_rel(grasping_tool)),
+        _entity("Affordance", "graspable", definesBearer=_rel(bearer), definesTrigger=_rel(grasping_tool)),
+        _entity("Ability", "canGrasp"),
+        _entity("PerceptionAbility", "visualPerception"),
+    ]
+
+    # Agents : cobots (indices pairs) et opérateurs (indices impairs)
+    cobots, operators = [], []
+    for i in range(max(agents, 1)):
+        if i % 2 == 0:
+            cobots.append("ur5" if i == 0 else f"ur5_{i}")
+        else:
+            operators.append(f"operator_{i}")
+
+    # Outils et dispositions (les premiers s'appellent screwability / graspability : canScrew après renommage)
+    parts = {name: [] for name in cobots}
+    for j in range(tools):
+        screwing = j % 2 == 0
+        kind = "screwability" if screwing else "graspability"
+        suffix = "" if j < 2 else f"_{j}"
+        disposition_types = ["Screwability", "Capability"] if screwing else ["Capability", "Graspability"]
+        disposition = _entity(disposition_types, kind + suffix,
+                              isDescribedBy=_rel(_id("Affordance", "screwable" if screwing else "graspable")))
+        tool_type = "Screwdriver" if screwing else "Hand-E"
+        tool = _entity(tool_type, f"tool_{j}", hasDisposition=_rel(disposition["id"]),
+                       hasRole=_rel(grasping_tool, screwing_tool) if screwing else _rel(grasping_tool))
+        graph += [disposition, tool]
+        parts[cobots[j % len(cobots)]].append(tool["id"])
+    for name in cobots:
+        cobot = _entity("Cobot", name)
+        if parts[name]:
+            cobot["hasPart"] = _rel(*parts[name])
+        graph.append(cobot)
+    graph += [_entity("Operator", name) for name in operators]
+
+    # Tâches parentes, sous-tâches et actions
+    executors = []          # (id de sous-tâche, numéro d'étape, id du composant)
+    parent_ids = []
+    for k in range(1, tasks + 1):
+        component = _entity("DesignedComponent", f"component_{k}", hasRole=_rel(bearer))
+        subtask_ids = []
+        for s in range(1, subtasks + 1):
+            type_name = SUBTASK_TYPES[(k + s) % len(SUBTASK_TYPES)]
+            subtask = _entity(type_name, f"{type_name[0].lower() + type_name[1:]}Task_{k}_{s}",
+                              hasStepNumber=_prop(f"{k}.{s}"),
+                              performedBy=_rel(_id("Cobot", rng.choice(cobots))))
+            if type_name != "Screwing":     # canScrew est ajouté par script.py
+                ability = _id("PerceptionAbility", "visualPerception") if type_name in ("LookingFor", "Perceiving") \
+                    else _id("Ability", "canGrasp")
+                subtask["requiresAbility"] = _rel(ability)
+            if subtask_ids:
+                subtask["directlyFollows"] = _rel(subtask_ids[-1])
+            subtask_ids.append(subtask["id"])
+            executors.append((subtask, f"{k}.{s}", component["id"]))
+            graph.append(subtask)
+        parent = _entity("PhysicalTask", f"task_{k}", hasStepNumber=_prop(str(k)), hasPart=_rel(*subtask_ids))
+        if parent_ids:
+            parent["directlyFollows"] = _rel(parent_ids[-1])
+        parent_ids.append(parent["id"])
+        graph += [component, parent]
+    if parent_ids:
+        graph.append(_entity("Workflow", "workflow", hasStep=_rel(*parent_ids)))
+
+    for i in range(actions):
+        performers = [_id("Cobot", rng.choice(cobots))]
+        if operators:
+            performers.append(_id("Operator", rng.choice(operators)))
+        if i < len(executors):
+            subtask, step, component = executors[i]
+            number = f"{step}.1"
+        else:
+            subtask, number, component = None, f"0.{i}", None
+        action = _entity("Action", f"action_{i}", hasActionNumber=_prop(number), performedBy=_rel(*performers),
+                         hasExecutionState=_rel(pending if i % 3 == 0 else active))
+        if component:
+            action["hasInput"] = _rel(component)
+        if subtask is not None:
+            subtask["isExecutedIn"] = _rel(action["id"])
+        graph.append(action)
+
+    return {"@context": context, "@graph": graph}
+
+
+def write_workcell(path, **sizes):
+    """Écrit une cellule générée (mêmes paramètres que generate_workcell) ; retourne le nombre d'entités"""
+    document = generate_workcell(**sizes)
+    with open(path, "w") as f:
+        json.dump(document, f)
+    return len(document["@graph"])
+
+
+if __name__ == "__main__":
+    count = write_workcell("workcell_synthetic.json", agents=4, tools=6, tasks=20, subtasks=5)
+    print(f"{count} entité(s) écrite(s) dans workcell_synthetic.json")
@@ -0,0 +1,82 @@
+import os
+import stat
+import tempfile
+
+from change_log import version
+
+
+def atomic_save(onto, file, format="rdfxml"):
+    """Sérialise l'ontologie dans un fichier temporaire puis le renomme : jamais de fichier à moitié écrit"""
+    directory = os.path.dirname(os.path.abspath(file))
+    fd, tmp = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            onto.save(file=f, format=format)
+        # mkstemp crée le fichier en 0600 : le fichier remplacé garde ses droits
+        if os.path.exists(file):
+            os.chmod(tmp, stat.S_IMODE(os.stat(file).st_mode))
+        os.replace(tmp, file)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class OntologyWriteBack:
+    """Suit les ontologies modifiées pendant un passage du pipeline et les écrit une seule fois, à la validation.
+
+    Utilisation :
+        with OntologyWriteBack() as write_back:
+            write_back.track(onto_main, "onto/main.owl")
+            ...                       # modifications, sans save() dans les boucles
+        # -> onto/main.owl est écrit une fois à la sortie du bloc (rien n'est écrit en cas d'exception)
+    """
+
+    def __init__(self):
+        self._files = {}       # ontologie -> (fichier, format)
+        self._snapshots = {}   # ontologie -> version (change_log) au dernier flush
+        self._dirty = set()
+
+    def track(self, onto, file, format="rdfxml"):
+        """Associe une ontologie à son fichier ; elle sera écrite au flush si elle a changé"""
+        if onto not in self._files:
+            self._snapshots[onto] = version(onto)
+        self._files[onto] = (file, format)
+        return onto
+
+    def mark_dirty(self, onto, file=None, format="rdfxml"):
+        """Force l'écriture de l'ontologie au prochain flush"""
+        if file is not None:
+            self.track(onto, file, format)
+        elif onto not in self._files:
+            raise ValueError(f"Aucun fichier associé à l'ontologie {onto.base_iri}")
+        self._dirty.add(onto)
+
+    def dirty(self):
+        """Ontologies à écrire : marquées explicitement ou dont les triplets ont changé"""
+        return [onto for onto in self._files
+                if onto in self._dirty or version(onto) != self._snapshots[onto]]
+
+    def flush(self):
+        """Écrit chaque ontologie modifiée exactement une fois et retourne les fichiers écrits"""
+        written = []
+        for onto in self.dirty():
+            file, format = self._files[onto]
+            atomic_save(onto, file, format)
+            self._snapshots[onto] = version(onto)
+            written.append(file)
+        self._dirty.clear()
+        return written
+
+    def discard(self):
+        """Oublie les modifications en attente sans rien écrire"""
+        for onto in self._files:
+            self._snapshots[onto] = version(onto)
+        self._dirty.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()